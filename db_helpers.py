@@ -1,18 +1,318 @@
 import re
+import sys
+import csv
+import functools
+import queue
 import sqlite3
 import hashlib
+import threading
+import numpy as np
 import pandas as pd
-from datetime import date
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import date, timedelta
 from datetime import datetime
 
 DB_NAME = "business_ledger.db"
 
-def get_connection():
-    conn = sqlite3.connect(DB_NAME)
+# -------------------------------
+# Connection Pool
+# -------------------------------
+
+# Tuning applied once per connection (change here as per your server)
+DB_POOL_SIZE = 8                      # idle connections kept for reuse
+DB_CACHE_SIZE_KB = 64000              # page cache per connection (~64 MB)
+DB_MMAP_SIZE = 256 * 1024 * 1024      # memory-mapped I/O (256 MB)
+
+_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+_local = threading.local()
+
+def _configure_connection(conn):
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
+def _checkout():
+    while True:
+        try:
+            db_name, conn = _pool.get_nowait()
+        except queue.Empty:
+            break
+        if db_name == DB_NAME:
+            return conn
+        conn.close()   # DB_NAME was switched, drop the stale connection
+
+    # check_same_thread=False: a pooled connection is handed to whichever
+    # Streamlit script thread checks it out next (never two at once).
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    return _configure_connection(conn)
+
+def _checkin(conn, db_name):
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait((db_name, conn))
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def db_connection():
+    """
+    Pooled connection for the current thread.
+    Commits on success, rolls back on error and returns the connection to the
+    pool. Nested calls on the same thread share the outer connection and its
+    transaction: only the outermost block commits, so helpers never call
+    conn.commit() themselves (it would commit the caller's work too).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+
+    db_name = DB_NAME
+    conn = _checkout()
+    _local.conn = conn
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        _checkin(conn, db_name)
+
+def close_all_connections():
+    """
+    Checkpoints the WAL into the main database file and closes every idle
+    pooled connection. Call before copying, downloading or replacing the
+    .db file.
+    """
+    while True:
+        try:
+            _, conn = _pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
+def checkpoint_wal():
+    """
+    Copies the WAL into the main database file on a pooled connection,
+    leaving the pool open. Returns False when a reader still held part of
+    the WAL: the .db file alone is then not a complete copy.
+    """
+    with db_connection() as conn:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return busy == 0
+
+def get_connection():
+    """Stand-alone connection owned by the caller (must be closed by caller)."""
+    conn = sqlite3.connect(DB_NAME)
+    return _configure_connection(conn)
+
+# -------------------------------
+# Amounts (stored as INTEGER paise)
+# -------------------------------
+# transactions.amount, opening_balances.amount and the period balances
+# hold paise. Callers always pass and receive rupees; convert here only.
+
+def to_paise(amount):
+    """Rupees (float / str / Decimal) -> integer paise, half rounded up."""
+    if amount is None:
+        return None
+    rupees = Decimal(str(amount))
+    return int((rupees * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def from_paise(paise):
+    """Integer paise -> rupees."""
+    return (paise or 0) / 100
+
+# -------------------------------
+# Master Data Cache
+# -------------------------------
+# Financial years, groups and accounts are read several times on every
+# rerun but change rarely. Readers marked @_master_cached answer from
+# memory until a helper marked @_master_write bumps the version.
+_master_version = 0
+_master_cache = {}      # (db, helper, args) -> (version, value)
+_master_stats = {"hits": 0, "misses": 0}
+_master_lock = threading.Lock()
+
+def _copy_master(value):
+    # Callers get their own list / dicts; sqlite3.Row is immutable
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+def _master_cached(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (DB_NAME, fn.__name__, args, tuple(sorted(kwargs.items())))
+
+        with _master_lock:
+            version = _master_version
+            entry = _master_cache.get(key)
+
+            if entry is not None and entry[0] == version:
+                _master_stats["hits"] += 1
+                return _copy_master(entry[1])
+
+            _master_stats["misses"] += 1
+
+        # Tagged with the version seen *before* reading: a write landing
+        # meanwhile leaves this entry stale rather than wrongly current
+        value = fn(*args, **kwargs)
+
+        with _master_lock:
+            _master_cache[key] = (version, value)
+
+        return _copy_master(value)
+
+    return wrapper
+
+def _master_write(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            clear_master_cache()
+
+    return wrapper
+
+def clear_master_cache():
+    """Invalidates cached master data (call after writing it outside the helpers)."""
+    global _master_version
+
+    with _master_lock:
+        _master_version += 1
+        _master_cache.clear()
+
+def get_master_cache_stats():
+    """Hit / miss counters of the master data cache."""
+    with _master_lock:
+        total = _master_stats["hits"] + _master_stats["misses"]
+        return {
+            "hits": _master_stats["hits"],
+            "misses": _master_stats["misses"],
+            "hit_rate": _master_stats["hits"] / total if total else 0.0,
+            "version": _master_version,
+            "entries": len(_master_cache)
+        }
+
+# -------------------------------
+# Report Result Cache (process-wide LRU)
+# -------------------------------
+# Results of the expensive report helpers, shared by every session.
+# The key carries the data version (last change_log seq + master data
+# version), so any write makes older entries unreachable; they age out
+# of the LRU once the size budget is used up.
+REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_report_cache = OrderedDict()     # key -> (size, value), oldest first
+_report_cache_bytes = 0
+_report_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_report_lock = threading.Lock()
+
+def get_data_version():
+    """(last change_log seq, master data version): changes on every write."""
+    with db_connection() as conn:
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    return seq, _master_version
+
+def _result_size(value):
+    """Approximate bytes held by a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_result_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        # Long row lists: extrapolate from an evenly spaced sample
+        sample = value[::max(1, len(value) // 64)]
+        per_item = sum(_result_size(v) for v in sample) / len(sample) if sample else 0
+        return sys.getsizeof(value) + int(per_item * len(value))
+    return sys.getsizeof(value)
+
+def _copy_result(value):
+    # Callers may add columns / edit rows; the cached copy stays intact
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_result(v) if isinstance(v, (dict, list)) else v for v in value]
+    if isinstance(value, tuple):
+        copied = (_copy_result(v) for v in value)
+        # Named tuples (e.g. CashFlow) keep their type
+        return type(value)(*copied) if hasattr(value, "_fields") else tuple(copied)
+    return value
+
+def _report_cached(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _report_cache_bytes
+
+        # Version read before the query: a write racing it leaves the entry unreachable
+        key = (DB_NAME, fn.__name__, args, tuple(sorted(kwargs.items())), get_data_version())
+
+        with _report_lock:
+            entry = _report_cache.get(key)
+
+            if entry is not None:
+                _report_cache.move_to_end(key)
+                _report_stats["hits"] += 1
+                return _copy_result(entry[1])
+
+            _report_stats["misses"] += 1
+
+        value = fn(*args, **kwargs)
+        size = _result_size(value)
+
+        with _report_lock:
+            if size <= REPORT_CACHE_MAX_BYTES and key not in _report_cache:
+                _report_cache[key] = (size, value)
+                _report_cache_bytes += size
+
+                while _report_cache_bytes > REPORT_CACHE_MAX_BYTES:
+                    _, (old_size, _) = _report_cache.popitem(last=False)
+                    _report_cache_bytes -= old_size
+                    _report_stats["evictions"] += 1
+
+        return _copy_result(value)
+
+    return wrapper
+
+def clear_report_cache():
+    """Drops every cached report result (e.g. after a restore)."""
+    global _report_cache_bytes
+
+    with _report_lock:
+        _report_cache.clear()
+        _report_cache_bytes = 0
+
+def get_report_cache_stats():
+    """Hit / miss / eviction counters and memory use of the report cache."""
+    with _report_lock:
+        total = _report_stats["hits"] + _report_stats["misses"]
+        return {
+            **_report_stats,
+            "hit_rate": _report_stats["hits"] / total if total else 0.0,
+            "entries": len(_report_cache),
+            "bytes": _report_cache_bytes,
+            "max_bytes": REPORT_CACHE_MAX_BYTES
+        }
+
 # -------------------------------
 # User Authentication Helpers  
 # ------------------------------- 
@@ -27,13 +327,13 @@ def verify_password(password, stored_hash):
 # Financial Year Helpers
 # -------------------------------
 
+@_master_cached
 def get_active_financial_year():
-    conn = get_connection()
-    cur = conn.cursor()
-    # 1. Fetch all needed columns
-    cur.execute("SELECT id, label, start_date, end_date FROM financial_years WHERE is_active = 1")
-    row = cur.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        # 1. Fetch all needed columns
+        cur.execute("SELECT id, label, start_date, end_date FROM financial_years WHERE is_active = 1")
+        row = cur.fetchone()
 
     if row:
         # 2. Return a dictionary so the calling code works
@@ -47,8 +347,9 @@ def get_active_financial_year():
         # 3. Return None instead of a string for cleaner logic
         return None
 
+@_master_cached
 def get_all_financial_years():
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             SELECT id, label, start_date, end_date, is_active
@@ -58,8 +359,9 @@ def get_all_financial_years():
         return cur.fetchall()
 
 
+@_master_write
 def set_active_financial_year(year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         # deactivate all
@@ -71,8 +373,6 @@ def set_active_financial_year(year_id):
             SET is_active = 1 
             WHERE id = ?
         """, (year_id,))
-
-        conn.commit()
         
 # -------------------------------
 # Financial Year CRUD Helpers
@@ -108,17 +408,17 @@ def generate_fy_dates(label):
 
     return start_date.isoformat(), end_date.isoformat()
 
+@_master_write
 def add_financial_year(label):
     try:
         start_date, end_date = generate_fy_dates(label)
 
-        with get_connection() as conn:
+        with db_connection() as conn:
             cur = conn.cursor()
             cur.execute("""
                 INSERT INTO financial_years (label, start_date, end_date, is_active)
                 VALUES (?, ?, ?, 0)
             """, (label.strip(), start_date, end_date))
-            conn.commit()
 
         return True, ""
 
@@ -129,12 +429,13 @@ def add_financial_year(label):
         return False, f"Financial Year '{label}' already exists"
 
 
+@_master_write
 def update_financial_year(year_id, label):
 
     label = label.strip()
     start_date, end_date = generate_fy_dates(label)
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         # 🔒 Check duplicate label EXCEPT current record
@@ -154,10 +455,8 @@ def update_financial_year(year_id, label):
             WHERE id = ?
         """, (label, start_date, end_date, year_id))
 
-        conn.commit()
-
 def can_delete_financial_year(year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         cur.execute(
@@ -176,38 +475,49 @@ def can_delete_financial_year(year_id):
 
         return True
 
+@_master_write
 def delete_financial_year(year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM financial_years WHERE id = ?", (year_id,))
-        conn.commit()
         
 # -------------------------------
 # Groups Helpers
 # -------------------------------
-
-def add_group(group_name):
-    with get_connection() as conn:
+# Account nature of a group (groups.nature, indexed). Reports classify
+# accounts by these values, never by group name or id.
+ACCOUNT_NATURES = {
+    "ASSET": "Asset",
+    "LIABILITY": "Liability",
+    "INCOME": "Income",
+    "EXPENSE": "Expense",
+    "EQUITY": "Equity",
+    "CASH_BANK": "Cash & Bank",
+    "DEBTOR": "Debtor (Receivable)",
+    "CREDITOR": "Creditor (Payable)",
+}
+
+# Balance sheet sides
+ASSET_NATURES = ("ASSET", "CASH_BANK", "DEBTOR")
+LIABILITY_NATURES = ("LIABILITY", "CREDITOR", "EQUITY")
+
+@_master_write
+def add_group(group_name, nature=None):
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute(
-            "INSERT INTO groups (group_name) VALUES (?)",
-            (group_name.strip(),)
+            "INSERT INTO groups (group_name, nature) VALUES (?, ?)",
+            (group_name.strip(), nature)
         )
-        conn.commit()
-
-def get_all_groups():
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, group_name FROM groups ORDER BY group_name")
-        return cur.fetchall()
 
-def update_group(group_id, new_name):
+@_master_write
+def update_group(group_id, new_name, nature):
     new_name = new_name.strip()
 
     if not new_name:
         raise ValueError("Group name cannot be empty")
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         # Duplicate check
@@ -221,14 +531,12 @@ def update_group(group_id, new_name):
 
         cur.execute("""
             UPDATE groups
-            SET group_name = ?
+            SET group_name = ?, nature = ?
             WHERE id = ?
-        """, (new_name, group_id))
-
-        conn.commit()
+        """, (new_name, nature, group_id))
 
 def can_delete_group(group_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute(
             "SELECT COUNT(*) FROM accounts WHERE group_id = ?",
@@ -236,11 +544,11 @@ def can_delete_group(group_id):
         )
         return cur.fetchone()[0] == 0
 
+@_master_write
 def delete_group(group_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM groups WHERE id = ?", (group_id,))
-        conn.commit()
 
 
 # -------------------------------
@@ -249,18 +557,20 @@ def delete_group(group_id):
 
 import sqlite3
 
+@_master_cached
 def get_all_groups():
-    with get_connection() as conn:
+    with db_connection() as conn:
         # This ensures row['column'] works, but we'll go one step further
         conn.row_factory = sqlite3.Row 
         cur = conn.cursor()
-        cur.execute("SELECT id, group_name FROM groups ORDER BY group_name")
+        cur.execute("SELECT id, group_name, nature FROM groups ORDER BY group_name")
         rows = cur.fetchall()
         # Convert to true dictionaries so .get() works in Streamlit
         return [dict(row) for row in rows]
 
+@_master_cached
 def get_all_accounts():
-    with get_connection() as conn:
+    with db_connection() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
         cur.execute("""
@@ -274,15 +584,16 @@ def get_all_accounts():
         rows = cur.fetchall()
         return [dict(row) for row in rows]
 
+@_master_write
 def add_account(name, group_id, phone="", address=""):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             INSERT INTO accounts (name, group_id, phone, address)
             VALUES (?, ?, ?, ?)
         """, (name.strip(), group_id, phone.strip(), address.strip()))
-        conn.commit()
 
+@_master_write
 def update_account(account_id, name, group_id, phone="", address=""):
     name = name.strip()
     if not name:
@@ -290,7 +601,7 @@ def update_account(account_id, name, group_id, phone="", address=""):
     if group_id is None:
         raise ValueError("Group ID is required")
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         # Check for duplicate names
@@ -309,40 +620,37 @@ def update_account(account_id, name, group_id, phone="", address=""):
             WHERE id = ?
         """, (name, group_id, phone, address, account_id))
 
-        conn.commit()
-
+@_master_write
 def deactivate_account(account_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             UPDATE accounts
             SET is_active = 0
             WHERE id = ?
         """, (account_id,))
-        conn.commit()
 
+@_master_cached
 def get_groups_for_dropdown():
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("SELECT id, group_name FROM groups ORDER BY group_name")
         return cur.fetchall()
 
+@_master_write
 def toggle_account_status(account_id, is_active):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        UPDATE accounts
-        SET is_active = ?
-        WHERE id = ?
-    """, (is_active, account_id))
+    with db_connection() as conn:
+        cur = conn.cursor()
 
-    conn.commit()
-    conn.close()
+        cur.execute("""
+            UPDATE accounts
+            SET is_active = ?
+            WHERE id = ?
+        """, (is_active, account_id))
         
 def can_delete_account(account_id):
     """Checks if the account is linked to any transactions or opening balances."""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         # Check Transactions
         cur.execute("SELECT COUNT(*) FROM transactions WHERE from_acc_id = ? OR to_acc_id = ?", (account_id, account_id))
@@ -354,20 +662,21 @@ def can_delete_account(account_id):
         
     return True
 
+@_master_write
 def delete_account(account_id):
     """Permanently removes an account."""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
-        conn.commit()
 
        
 # -------------------------------
 # OPENING BALANCE HELPERS
 # -------------------------------
 
+@_master_cached
 def get_all_accounts_simple():
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("SELECT id, name FROM accounts WHERE is_active = 1 ORDER BY name")
         return cur.fetchall()
@@ -377,21 +686,20 @@ def add_opening_balance(account_id, financial_year_id, amount):
     if has_transactions(account_id, financial_year_id):
         raise ValueError("Opening balance locked (transactions exist)")
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             INSERT OR REPLACE INTO opening_balances
             (account_id, financial_year_id, amount)
             VALUES (?, ?, ?)
-        """, (account_id, financial_year_id, amount))
-        conn.commit()
+        """, (account_id, financial_year_id, to_paise(amount)))
 
 # gete multiple opening balances
 def get_opening_balances(financial_year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
-            SELECT a.name, ob.amount
+            SELECT a.name, ob.amount / 100.0 AS amount
             FROM opening_balances ob
             JOIN accounts a ON ob.account_id = a.id
             WHERE ob.financial_year_id = ?
@@ -400,7 +708,7 @@ def get_opening_balances(financial_year_id):
         return cur.fetchall()
 
 def has_transactions(account_id, financial_year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             SELECT COUNT(*)
@@ -412,7 +720,7 @@ def has_transactions(account_id, financial_year_id):
 
 # get single account opening balance
 def get_opening_balance(account_id, financial_year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             SELECT amount
@@ -422,7 +730,7 @@ def get_opening_balance(account_id, financial_year_id):
         """, (account_id, financial_year_id))
 
         row = cur.fetchone()
-        return float(row["amount"]) if row and row["amount"] is not None else 0.0
+        return from_paise(row["amount"]) if row and row["amount"] is not None else 0.0
 
 # ---------------------------------
 # TRANSACTIONS HELPERS
@@ -437,53 +745,49 @@ def add_transaction(
     financial_year_id,
     created_by=1   # 👈 default
 ):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO transactions 
-        (txn_date, from_acc_id, to_acc_id, amount, note, financial_year_id, created_by, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        txn_date,
-        from_acc_id,
-        to_acc_id,
-        amount,
-        note,
-        financial_year_id,
-        created_by,
-        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    ))
+    with db_connection() as conn:
+        cur = conn.cursor()
 
-    conn.commit()
-    conn.close()
+        cur.execute("""
+            INSERT INTO transactions 
+            (txn_date, from_acc_id, to_acc_id, amount, note, financial_year_id, created_by, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            txn_date,
+            from_acc_id,
+            to_acc_id,
+            to_paise(amount),
+            note,
+            financial_year_id,
+            created_by,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ))
 
 def get_transactions_by_year(financial_year_id):
-    conn = get_connection()
-    cur = conn.cursor()
+    with db_connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute("""
-        SELECT 
-            t.id,
-            t.txn_date,
-            a1.name AS from_account,
-            a2.name AS to_account,
-            t.amount,
-            t.note
-        FROM transactions t
-        JOIN accounts a1 ON t.from_acc_id = a1.id
-        JOIN accounts a2 ON t.to_acc_id = a2.id
-        WHERE t.financial_year_id = ?
-        ORDER BY t.txn_date DESC, t.id DESC
-    """, (financial_year_id,))
-
-    rows = cur.fetchall()
-    conn.close()
+        cur.execute("""
+            SELECT 
+                t.id,
+                t.txn_date,
+                a1.name AS from_account,
+                a2.name AS to_account,
+                t.amount / 100.0 AS amount,
+                t.note
+            FROM transactions t
+            JOIN accounts a1 ON t.from_acc_id = a1.id
+            JOIN accounts a2 ON t.to_acc_id = a2.id
+            WHERE t.financial_year_id = ?
+            ORDER BY t.txn_date DESC, t.id DESC
+        """, (financial_year_id,))
+
+        rows = cur.fetchall()
     return rows
 
 def get_transaction_summary(financial_year_id):
     """Returns total Debit, Credit and Entry Count for a financial year"""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         # Total Debit
@@ -492,7 +796,7 @@ def get_transaction_summary(financial_year_id):
             FROM transactions
             WHERE financial_year_id = ?
         """, (financial_year_id,))
-        total_debit = cur.fetchone()[0] or 0.0
+        total_debit = from_paise(cur.fetchone()[0])
 
         # Total Credit (same total in double-entry, but kept explicit)
         cur.execute("""
@@ -500,7 +804,7 @@ def get_transaction_summary(financial_year_id):
             FROM transactions
             WHERE financial_year_id = ?
         """, (financial_year_id,))
-        total_credit = cur.fetchone()[0] or 0.0
+        total_credit = from_paise(cur.fetchone()[0])
 
         # Entry count
         cur.execute("""
@@ -516,50 +820,487 @@ def get_transaction_summary(financial_year_id):
             "entries": entry_count
         }
 
+def get_transactions_page(financial_year_id, page_size=50, after=None, before=None):
+    """
+    One page of the year's transactions, newest first, keyset-paginated
+    on (txn_date, id) using idx_txn_fy_date:
+        after  -> key of the last row shown: next (older) page
+        before -> key of the first row shown: previous (newer) page
+        neither -> newest page; after=(date, MAX_KEY_ID) jumps to a date
+    Returns dict: rows (id, txn_date, from_account, to_account, amount, note),
+    has_prev, has_next
+    """
+    where = ["t.financial_year_id = ?"]
+    params = [financial_year_id]
+
+    if before is not None:
+        where.append("(t.txn_date, t.id) > (?, ?)")
+        params += list(before)
+        order = "ASC"
+    else:
+        if after is not None:
+            where.append("(t.txn_date, t.id) < (?, ?)")
+            params += list(after)
+        order = "DESC"
+
+    with db_connection() as conn:
+        # One extra row tells whether there is a page beyond this one
+        rows = conn.execute(f"""
+            SELECT 
+                t.id,
+                t.txn_date,
+                a1.name AS from_account,
+                a2.name AS to_account,
+                t.amount / 100.0 AS amount,
+                t.note
+            FROM transactions t
+            JOIN accounts a1 ON t.from_acc_id = a1.id
+            JOIN accounts a2 ON t.to_acc_id = a2.id
+            WHERE {" AND ".join(where)}
+            ORDER BY t.txn_date {order}, t.id {order}
+            LIMIT ?
+        """, params + [page_size + 1]).fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before is not None:
+        rows.reverse()
+        return {"rows": rows, "has_prev": has_more, "has_next": True}
+
+    return {"rows": rows, "has_prev": after is not None, "has_next": has_more}
+
+# Largest id, for jumping to the end of a date: after=(date, MAX_KEY_ID)
+MAX_KEY_ID = 2 ** 63 - 1
+
+def _fts_query(text):
+    """
+    Turns free text into an FTS5 query: every word must match, each as a
+    prefix ("ram sal" finds "Ramesh ... salary"). Quoting each word keeps
+    FTS5 operators and punctuation in the input from breaking the query.
+    """
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+def search_transactions(financial_year_id, query, limit=50, offset=0):
+    """
+    Full-text search of a year's transactions over account names and
+    note (transactions_fts), best matches first, newest first on ties.
+    Account-name hits rank above note hits.
+    Returns dict: rows (id, txn_date, from_account, to_account, amount, note),
+    has_prev, has_next
+    """
+    match = _fts_query(query)
+
+    if not match:
+        return {"rows": [], "has_prev": False, "has_next": False}
+
+    with db_connection() as conn:
+        # One extra row tells whether there is a page beyond this one
+        rows = conn.execute("""
+            SELECT
+                t.id,
+                t.txn_date,
+                a1.name AS from_account,
+                a2.name AS to_account,
+                t.amount / 100.0 AS amount,
+                t.note
+            FROM transactions_fts f
+            JOIN transactions t ON t.id = f.rowid
+            JOIN accounts a1 ON t.from_acc_id = a1.id
+            JOIN accounts a2 ON t.to_acc_id = a2.id
+            WHERE transactions_fts MATCH ?
+            ORDER BY bm25(transactions_fts, 2.0, 2.0, 1.0, 0.0), t.txn_date DESC, t.id DESC
+            LIMIT ? OFFSET ?
+        """, (
+            f"fy : fy{int(financial_year_id)} AND {{from_account to_account note}} : ({match})",
+            limit + 1,
+            offset
+        )).fetchall()
+
+    return {
+        "rows": rows[:limit],
+        "has_prev": offset > 0,
+        "has_next": len(rows) > limit
+    }
+
+def get_transaction_totals(financial_year_id):
+    """Turnover, cash in / out and entry count of a year in one aggregate query."""
+    with db_connection() as conn:
+        row = conn.execute("""
+            SELECT
+                COALESCE(SUM(t.amount), 0),
+                COALESCE(SUM(CASE WHEN tg.nature IS 'CASH_BANK' AND fg.nature IS NOT 'CASH_BANK'
+                             THEN t.amount ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN fg.nature IS 'CASH_BANK' AND tg.nature IS NOT 'CASH_BANK'
+                             THEN t.amount ELSE 0 END), 0),
+                COUNT(*)
+            FROM transactions t
+            JOIN accounts fa ON t.from_acc_id = fa.id
+            JOIN accounts ta ON t.to_acc_id = ta.id
+            JOIN groups fg ON fa.group_id = fg.id
+            JOIN groups tg ON ta.group_id = tg.id
+            WHERE t.financial_year_id = ?
+        """, (financial_year_id,)).fetchone()
+
+    return {
+        "turnover": from_paise(row[0]),
+        "cash_in": from_paise(row[1]),
+        "cash_out": from_paise(row[2]),
+        "entries": row[3]
+    }
+
+def get_account_turnover(financial_year_id):
+    """
+    Total In (debit) / Total Out (credit) of every active account which
+    moved in the year, from account_period_balances.
+    """
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT
+                a.name,
+                SUM(p.debit) / 100.0 AS total_in,
+                SUM(p.credit) / 100.0 AS total_out
+            FROM account_period_balances p
+            JOIN accounts a ON p.account_id = a.id
+            WHERE p.financial_year_id = ?
+              AND a.is_active = 1
+            GROUP BY a.id, a.name
+            HAVING SUM(p.debit) > 0 OR SUM(p.credit) > 0
+            ORDER BY a.name
+        """, (financial_year_id,))
+        return cur.fetchall()
+
 def delete_transaction(txn_id):
     """Removes a transaction from the database."""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM transactions WHERE id = ?", (txn_id,))
-        conn.commit()
 
 def update_transaction(txn_id, amount, note, from_acc_id, to_acc_id):
     """Updates the amount, note, and accounts of an existing transaction."""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             UPDATE transactions 
             SET amount = ?, note = ?, from_acc_id = ?, to_acc_id = ?
             WHERE id = ?
-        """, (amount, note, from_acc_id, to_acc_id, txn_id))
-        conn.commit()
+        """, (to_paise(amount), note, from_acc_id, to_acc_id, txn_id))
+
+def apply_transaction_changes(deletes, updates):
+    """
+    Applies a whole edit set (e.g. from st.data_editor) atomically.
+        deletes -> transaction ids
+        updates -> dicts: id, amount, note, from_acc_id, to_acc_id
+    Every row is checked first; if any row fails nothing is written.
+    Otherwise all rows go through two executemany calls in one transaction.
+    Returns dict: ok, rows [{"id", "action", "error"}] (error None = fine)
+    """
+    deletes = [int(txn_id) for txn_id in deletes]
+    updates = list(updates)
+    errors = {}
+
+    delete_ids = set(deletes)
+    update_params = []
+
+    for upd in updates:
+        key = ("update", int(upd["id"]))
+
+        try:
+            paise = to_paise(upd["amount"])
+        except (ArithmeticError, ValueError, TypeError):
+            paise = None
+
+        if key[1] in delete_ids:
+            errors[key] = "Row is also marked for deletion"
+        elif paise is None or paise <= 0:
+            errors[key] = "Amount must be greater than zero"
+        elif upd["from_acc_id"] is None or upd["to_acc_id"] is None:
+            errors[key] = "From and To accounts are required"
+        elif upd["from_acc_id"] == upd["to_acc_id"]:
+            errors[key] = "From and To accounts must differ"
+        else:
+            update_params.append(
+                (paise, upd["note"], upd["from_acc_id"], upd["to_acc_id"], key[1])
+            )
+
+    failure = None
+
+    if not errors:
+        try:
+            with db_connection() as conn:
+                # Write lock up front: the id check below stays valid until commit
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+
+                wanted = delete_ids | {p[4] for p in update_params}
+                found = set()
+                ids = list(wanted)
+
+                # Chunked to stay under SQLite's bound-parameter limit
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    found.update(r[0] for r in conn.execute(
+                        f"SELECT id FROM transactions WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ))
+
+                for txn_id in deletes:
+                    if txn_id not in found:
+                        errors[("delete", txn_id)] = "Transaction no longer exists"
+
+                for p in update_params:
+                    if p[4] not in found:
+                        errors[("update", p[4])] = "Transaction no longer exists"
+
+                if not errors:
+                    conn.executemany(
+                        "DELETE FROM transactions WHERE id = ?",
+                        [(txn_id,) for txn_id in deletes]
+                    )
+                    conn.executemany("""
+                        UPDATE transactions
+                        SET amount = ?, note = ?, from_acc_id = ?, to_acc_id = ?
+                        WHERE id = ?
+                    """, update_params)
+
+        except sqlite3.Error as e:
+            failure = str(e)
+
+    # A database error rolls back everything: report it against every row
+    default = f"Not applied: {failure}" if failure else None
+    rows = [
+        {"id": txn_id, "action": action, "error": errors.get((action, txn_id), default)}
+        for action, txn_id in (
+            [("delete", txn_id) for txn_id in deletes]
+            + [("update", int(upd["id"])) for upd in updates]
+        )
+    ]
+
+    return {"ok": not errors and failure is None, "rows": rows}
   
 def get_account_dr_cr(account_id, financial_year_id):
     """Returns Debit and Credit total for a single account"""
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
-        # Debit
         cur.execute("""
-            SELECT SUM(amount)
-            FROM transactions
-            WHERE to_acc_id = ?
+            SELECT COALESCE(SUM(debit), 0), COALESCE(SUM(credit), 0)
+            FROM account_period_balances
+            WHERE account_id = ?
               AND financial_year_id = ?
         """, (account_id, financial_year_id))
-        debit = cur.fetchone()[0] or 0.0
+        debit, credit = cur.fetchone()
+
+        return from_paise(debit), from_paise(credit)
+
+# ---------------------------------
+# BULK TRANSACTION IMPORT
+# ---------------------------------
+# Accepted header names (case / spaces ignored) for each import field
+IMPORT_COLUMNS = {
+    "txn_date": ("date", "txn_date", "voucher_date"),
+    "from_account": ("from", "from_account", "from_acc"),
+    "to_account": ("to", "to_account", "to_acc"),
+    "amount": ("amount", "amt"),
+    "note": ("note", "narration", "remarks"),
+}
+
+IMPORT_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y")
+IMPORT_CHUNK_SIZE = 2000
+
+def _read_import_chunks(source, chunk_size):
+    """
+    Yields DataFrames of at most chunk_size rows (all values as text or
+    native Excel values) without loading the whole file.
+    source: path or uploaded file object (.csv / .xlsx)
+    """
+    name = str(getattr(source, "name", source)).lower()
+
+    if name.endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [str(h) if h is not None else "" for h in next(rows, ())]
+            batch = []
+
+            for row in rows:
+                if any(v is not None and str(v).strip() for v in row):
+                    batch.append(row[:len(header)])
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch, columns=header, dtype=object)
+                    batch = []
+
+            if batch:
+                yield pd.DataFrame(batch, columns=header, dtype=object)
+        finally:
+            wb.close()
+    else:
+        yield from pd.read_csv(
+            source,
+            chunksize=chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            skip_blank_lines=True
+        )
+
+def _import_column_map(columns):
+    """{field: file column} for IMPORT_COLUMNS; raises ValueError if a required one is missing."""
+    normalized = {str(c).strip().lower().replace(" ", "_"): c for c in columns}
+    mapping = {}
+
+    for field, aliases in IMPORT_COLUMNS.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized[alias]
+                break
+
+    missing = [f for f in ("txn_date", "from_account", "to_account", "amount") if f not in mapping]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    return mapping
+
+def _parse_import_dates(values):
+    """ISO date strings (None where unparseable); text dates are day-first."""
+    text = values.map(lambda v: v.strftime("%Y-%m-%d") if isinstance(v, (datetime, date)) else str(v or "").strip())
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+
+    for fmt in IMPORT_DATE_FORMATS:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+
+    return [d.strftime("%Y-%m-%d") if pd.notna(d) else None for d in parsed]
+
+def _parse_import_amount(value):
+    """Rupees text / number -> paise, None when not a valid amount."""
+    text = str(value if value is not None else "").replace(",", "").replace("₹", "").strip()
+    try:
+        return to_paise(text) if text else None
+    except ArithmeticError:
+        return None
+
+def import_transactions(
+    source,
+    financial_year_id,
+    created_by=1,
+    rejected_file=None,
+    chunk_size=IMPORT_CHUNK_SIZE,
+    progress=None
+):
+    """
+    Streams transactions from a CSV / XLSX file into the given year.
+
+    Rows are read chunk_size at a time. Account names (case-insensitive,
+    active accounts only) are resolved through one lookup built up front.
+    Dates must fall inside the year. Valid rows of a chunk are inserted
+    with one executemany and committed together.
+
+    Rows that fail go to rejected_file with their row number (1 = first
+    data row, blank rows not counted) and the reason. rejected_file is a path or writable text stream; when it
+    is None and source is a path, "<source>.rejected.csv" is used.
+    progress(inserted, rejected) is called after every chunk.
+
+    Returns dict: inserted, rejected, rejected_file
+    """
+    with db_connection() as conn:
+        fy = conn.execute(
+            "SELECT start_date, end_date FROM financial_years WHERE id = ?",
+            (financial_year_id,)
+        ).fetchone()
+        account_ids = {
+            name.strip().casefold(): acc_id
+            for acc_id, name in conn.execute("SELECT id, name FROM accounts WHERE is_active = 1")
+        }
+
+    if fy is None:
+        raise ValueError(f"Financial year {financial_year_id} not found")
+
+    if rejected_file is None and isinstance(source, str):
+        rejected_file = f"{source}.rejected.csv"
+
+    inserted = rejected = 0
+    row_no = 0
+    out = writer = None
+    owns_out = isinstance(rejected_file, str)
+
+    try:
+        for chunk in _read_import_chunks(source, chunk_size):
+            cols = _import_column_map(chunk.columns)
+
+            dates = _parse_import_dates(chunk[cols["txn_date"]])
+            from_ids = chunk[cols["from_account"]].map(lambda v: account_ids.get(str(v or "").strip().casefold()))
+            to_ids = chunk[cols["to_account"]].map(lambda v: account_ids.get(str(v or "").strip().casefold()))
+            amounts = chunk[cols["amount"]].map(_parse_import_amount)
+            notes = chunk[cols["note"]] if "note" in cols else pd.Series("", index=chunk.index)
+
+            params, bad = [], []
+
+            for i, txn_date, from_id, to_id, paise, note in zip(
+                range(len(chunk)), dates, from_ids, to_ids, amounts, notes
+            ):
+                if txn_date is None:
+                    error = "Invalid date"
+                elif not fy["start_date"] <= txn_date <= fy["end_date"]:
+                    error = "Date outside financial year"
+                elif pd.isna(from_id):
+                    error = "Unknown or inactive From account"
+                elif pd.isna(to_id):
+                    error = "Unknown or inactive To account"
+                elif from_id == to_id:
+                    error = "From and To accounts are the same"
+                elif paise is None or paise <= 0:
+                    error = "Amount must be greater than zero"
+                else:
+                    params.append((
+                        txn_date, int(from_id), int(to_id), paise,
+                        str(note or "").strip(), financial_year_id, created_by
+                    ))
+                    continue
+
+                bad.append((row_no + i + 1, error, i))
+
+            if params:
+                created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+                with db_connection() as conn:
+                    conn.executemany("""
+                        INSERT INTO transactions
+                        (txn_date, from_acc_id, to_acc_id, amount, note, financial_year_id, created_by, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [p + (created_at,) for p in params])
+
+            if bad and rejected_file is not None:
+                if writer is None:
+                    out = open(rejected_file, "w", newline="", encoding="utf-8") if owns_out else rejected_file
+                    writer = csv.writer(out)
+                    writer.writerow(["row", "error"] + [str(c) for c in chunk.columns])
+
+                for bad_row, error, i in bad:
+                    writer.writerow([bad_row, error] + ["" if v is None else v for v in chunk.iloc[i].tolist()])
+
+            inserted += len(params)
+            rejected += len(bad)
+            row_no += len(chunk)
+
+            if progress is not None:
+                progress(inserted, rejected)
+    finally:
+        if owns_out and out is not None:
+            out.close()
+
+    return {
+        "inserted": inserted,
+        "rejected": rejected,
+        "rejected_file": rejected_file if rejected else None
+    }
 
-        # Credit
-        cur.execute("""
-            SELECT SUM(amount)
-            FROM transactions
-            WHERE from_acc_id = ?
-              AND financial_year_id = ?
-        """, (account_id, financial_year_id))
-        credit = cur.fetchone()[0] or 0.0
 
-        return debit, credit
-  
-            
 # -------------------------------
 # Date Helpers
 # ------------------------------
@@ -574,18 +1315,18 @@ def indian_date(date_str):
 # ------------------------------
 
 def get_ledger(account_id, financial_year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
         cur.execute("""
             SELECT
                 txn_date,
                 note,
                 CASE 
-                    WHEN to_acc_id = ? THEN amount
+                    WHEN to_acc_id = ? THEN amount / 100.0
                     ELSE 0
                 END AS debit,
                 CASE 
-                    WHEN from_acc_id = ? THEN amount
+                    WHEN from_acc_id = ? THEN amount / 100.0
                     ELSE 0
                 END AS credit
             FROM transactions
@@ -595,203 +1336,638 @@ def get_ledger(account_id, financial_year_id):
         """, (account_id, account_id, financial_year_id, account_id, account_id))
         return cur.fetchall()
   
-def get_account_ledger(account_id, financial_year_id, start_date=None, end_date=None):
+def _ledger_lines_cte(account_id, financial_year_id, start_date=None, end_date=None):
     """
-    Returns ledger rows for a given account_id including Dr/Cr effect.
-    Output columns:
-        txn_date, particular, debit, credit, note
+    CTE body "Lines": one row per ledger line of the account (amounts in paise)
+        id, side (0 = debit line, 1 = credit line), txn_date, particular,
+        debit, credit, note
+    Ledger order / keyset key is (txn_date, id, side).
+    Returns (sql, params).
     """
+    date_filter = ""
+    date_params = []
 
-    with get_connection() as conn:
-        cur = conn.cursor()
+    # Date Filter if provided (applied inside each side so the indexes are used)
+    if start_date and end_date:
+        date_filter = "AND t.txn_date BETWEEN ? AND ?"
+        date_params = [start_date, end_date]
 
-        query = """
-            SELECT 
-                t.txn_date AS txn_date,
-                a2.name AS particular,
-                t.amount AS debit,
-                0 AS credit,
-                t.note AS note
-            FROM transactions t
-            JOIN accounts a2 ON t.from_acc_id = a2.id
-            WHERE t.to_acc_id = ?
-              AND t.financial_year_id = ?
+    sql = f"""
+    Lines AS (
+        SELECT 
+            t.id,
+            0 AS side,
+            t.txn_date AS txn_date,
+            a2.name AS particular,
+            t.amount AS debit,
+            0 AS credit,
+            t.note AS note
+        FROM transactions t
+        JOIN accounts a2 ON t.from_acc_id = a2.id
+        WHERE t.to_acc_id = ?
+          AND t.financial_year_id = ?
+          {date_filter}
 
-            UNION ALL
+        UNION ALL
 
-            SELECT 
-                t.txn_date AS txn_date,
-                a1.name AS particular,
-                0 AS debit,
-                t.amount AS credit,
-                t.note AS note
-            FROM transactions t
-            JOIN accounts a1 ON t.to_acc_id = a1.id
-            WHERE t.from_acc_id = ?
-              AND t.financial_year_id = ?
-        """
+        SELECT 
+            t.id,
+            1 AS side,
+            t.txn_date AS txn_date,
+            a1.name AS particular,
+            0 AS debit,
+            t.amount AS credit,
+            t.note AS note
+        FROM transactions t
+        JOIN accounts a1 ON t.to_acc_id = a1.id
+        WHERE t.from_acc_id = ?
+          AND t.financial_year_id = ?
+          {date_filter}
+    ),
+    Opening AS (
+        SELECT COALESCE(SUM(amount), 0) AS amount
+        FROM opening_balances
+        WHERE account_id = ? AND financial_year_id = ?
+    )
+    """
+
+    params = (
+        [account_id, financial_year_id] + date_params
+        + [account_id, financial_year_id] + date_params
+        + [account_id, financial_year_id]
+    )
 
-        params = [account_id, financial_year_id, account_id, financial_year_id]
+    return sql, params
 
-        # Date Filter if provided
-        if start_date and end_date:
-            query = f"""
-                SELECT * FROM ({query})
-                WHERE txn_date BETWEEN ? AND ?
-                ORDER BY txn_date ASC
-            """
-            params.extend([start_date, end_date])
-        else:
-            query = f"""
-                SELECT * FROM ({query})
-                ORDER BY txn_date ASC
-            """
+def get_account_ledger(account_id, financial_year_id, start_date=None, end_date=None):
+    """
+    Returns ledger rows for a given account_id including Dr/Cr effect,
+    ordered by txn_date, id. The running balance (year opening + debit -
+    credit so far, + Dr / - Cr) is computed in the query.
+    Output columns:
+        txn_date, particular, debit, credit, note, balance
+    """
+    cte_sql, params = _ledger_lines_cte(account_id, financial_year_id, start_date, end_date)
+
+    query = f"""
+        WITH {cte_sql}
+        SELECT
+            l.txn_date,
+            l.particular,
+            l.debit / 100.0 AS debit,
+            l.credit / 100.0 AS credit,
+            l.note,
+            (o.amount + SUM(l.debit - l.credit) OVER (
+                ORDER BY l.txn_date, l.id, l.side
+                ROWS UNBOUNDED PRECEDING
+            )) / 100.0 AS balance
+        FROM Lines l, Opening o
+        ORDER BY l.txn_date, l.id, l.side
+    """
 
+    with db_connection() as conn:
+        cur = conn.cursor()
         cur.execute(query, params)
         rows = cur.fetchall()
 
         return rows
 
-def calculate_running_ledger(ledger_rows, opening_balance):
+# (debit lines, credit lines): account column, counter-account column, side
+_LEDGER_SIDES = (
+    ("to_acc_id", "from_acc_id", 0),
+    ("from_acc_id", "to_acc_id", 1),
+)
+
+def _ledger_page_lines(conn, account_id, financial_year_id, start_date, end_date,
+                       key=None, forward=True, limit=100):
     """
-    ledger_rows = list of tuples (txn_date, particular, debit, credit, note)
-    returns list with running balance.
+    Up to `limit` ledger lines after (forward) / before `key` (txn_date, id, side),
+    nearest first, amounts in paise:
+        txn_date, particular, debit, credit, note, id, side
+    Each side is read in (txn_date, id) order from its own account index
+    and stopped at `limit`, then the two are merged.
     """
+    op, order = (">", "ASC") if forward else ("<", "DESC")
+    lines = []
 
-    running = opening_balance
-    output = []
+    # One date range only: with a second bound SQLite may seek on the wider one
+    if key is not None:
+        if forward:
+            start_date = max(start_date, key[0])
+        else:
+            end_date = min(end_date, key[0])
 
-    total_dr = 0
-    total_cr = 0
+    for acc_col, other_col, side in _LEDGER_SIDES:
+        where = ""
+        params = [financial_year_id, account_id, start_date, end_date]
 
-    for row in ledger_rows:
-        txn_date, particular, debit, credit, note = row
+        if key is not None:
+            # (txn_date, id, side) vs key: the side decides ties on (txn_date, id)
+            inclusive = side > key[2] if forward else side < key[2]
+            where = f"AND (t.txn_date {op} ? OR t.id {op}{'=' if inclusive else ''} ?)"
+            params += [key[0], key[1]]
 
-        debit = debit or 0
-        credit = credit or 0
+        lines += conn.execute(f"""
+            SELECT
+                t.txn_date,
+                a.name AS particular,
+                {"t.amount" if side == 0 else "0"} AS debit,
+                {"t.amount" if side == 1 else "0"} AS credit,
+                t.note,
+                t.id,
+                {side} AS side
+            FROM transactions t
+            JOIN accounts a ON t.{other_col} = a.id
+            WHERE t.financial_year_id = ?
+              AND t.{acc_col} = ?
+              AND t.txn_date BETWEEN ? AND ?
+              {where}
+            ORDER BY t.txn_date {order}, t.id {order}
+            LIMIT ?
+        """, params + [limit]).fetchall()
+
+    lines.sort(key=lambda r: (r["txn_date"], r["id"], r["side"]), reverse=not forward)
+    return lines[:limit]
+
+def _ledger_balance_before(conn, account_id, financial_year_id, start_date, key):
+    """
+    Opening + every ledger line from start_date up to `key` (txn_date, id, side),
+    in paise. Whole days come from the period balances; only the lines of
+    key's own day are read.
+    """
+    key_date, key_id, key_side = key
 
-        total_dr += debit
-        total_cr += credit
+    balance = conn.execute("""
+        SELECT COALESCE(SUM(amount), 0)
+        FROM opening_balances
+        WHERE account_id = ? AND financial_year_id = ?
+    """, (account_id, financial_year_id)).fetchone()[0]
 
-        running = running + debit - credit
+    day_before = (date.fromisoformat(key_date) - timedelta(days=1)).isoformat()
 
-        # Balance side
-        if running >= 0:
-            bal_side = "Dr"
-            bal_amt = running
-        else:
-            bal_side = "Cr"
-            bal_amt = abs(running)
-
-        output.append({
-            "Date": txn_date,
-            "Particular": particular,
-            "Debit": debit,
-            "Credit": credit,
-            "Note": note,
-            "Balance": f"{bal_amt:.2f} {bal_side}"
-        })
+    if day_before >= start_date:
+        movements_sql, movements_params = _period_movements(
+            financial_year_id, start_date, day_before, account_id=account_id
+        )
+        balance += conn.execute(f"""
+            SELECT COALESCE(SUM(debit - credit), 0)
+            FROM ({movements_sql})
+        """, movements_params).fetchone()[0]
 
-    closing_balance = running
+    # Same day, earlier in (id, side) order; a debit line ties before a credit line
+    balance += conn.execute("""
+        SELECT
+            (SELECT COALESCE(SUM(amount), 0) FROM transactions
+             WHERE financial_year_id = ? AND to_acc_id = ? AND txn_date = ?
+               AND (id < ? OR (id = ? AND ? > 0)))
+          - (SELECT COALESCE(SUM(amount), 0) FROM transactions
+             WHERE financial_year_id = ? AND from_acc_id = ? AND txn_date = ?
+               AND id < ?)
+    """, (
+        financial_year_id, account_id, key_date, key_id, key_id, key_side,
+        financial_year_id, account_id, key_date, key_id
+    )).fetchone()[0]
 
-    return output, total_dr, total_cr, closing_balance
+    return balance
 
-# -----------------------------------------
-# Helper: Get Account Closing Balance
-# -----------------------------------------
-def get_account_closing_balance(account_id, financial_year_id, start_date, end_date):
+def get_account_ledger_page(account_id, financial_year_id, start_date, end_date,
+                            page_size=100, after=None, before=None):
     """
-    Closing Balance = Opening + Debit(to_acc) - Credit(from_acc)
-    Opening is already signed (+ debit, - credit)
+    One page of the ledger, keyset-paginated on (txn_date, id, side):
+        after  -> key of the last row shown: next page
+        before -> key of the first row shown: previous page
+        neither -> first page; after=(date, 0, 0) jumps to a date
+    Only the page rows are read; the balance carried into the page comes
+    from the period balances plus the lines of the page's first day.
+    Returns dict:
+        rows (txn_date, particular, debit, credit, note, balance, id, side),
+        has_prev, has_next
     """
+    with db_connection() as conn:
+        # One extra row tells whether there is a page beyond this one
+        rows = _ledger_page_lines(
+            conn, account_id, financial_year_id, start_date, end_date,
+            key=before if before is not None else after,
+            forward=before is None,
+            limit=page_size + 1
+        )
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Opening Balance
-    cursor.execute("""
-        SELECT COALESCE(amount, 0)
-        FROM opening_balances
-        WHERE account_id = ? AND financial_year_id = ?
-    """, (account_id, financial_year_id))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before is not None:
+            rows.reverse()
 
-    opening = cursor.fetchone()
-    opening_amt = opening[0] if opening else 0.0
+        if not rows:
+            return {"rows": [], "has_prev": before is not None, "has_next": after is not None}
 
-    # Total Debit (Received)
-    cursor.execute("""
-        SELECT COALESCE(SUM(amount), 0)
-        FROM transactions
-        WHERE to_acc_id = ?
-          AND financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-    """, (account_id, financial_year_id, start_date, end_date))
+        first = rows[0]
+        first_key = (first["txn_date"], first["id"], first["side"])
 
-    total_dr = cursor.fetchone()[0]
+        if before is not None:
+            has_prev = has_more
+        else:
+            has_prev = bool(_ledger_page_lines(
+                conn, account_id, financial_year_id, start_date, end_date,
+                key=first_key, forward=False, limit=1
+            ))
 
-    # Total Credit (Paid)
-    cursor.execute("""
-        SELECT COALESCE(SUM(amount), 0)
-        FROM transactions
-        WHERE from_acc_id = ?
-          AND financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-    """, (account_id, financial_year_id, start_date, end_date))
+        running = _ledger_balance_before(conn, account_id, financial_year_id, start_date, first_key)
 
-    total_cr = cursor.fetchone()[0]
+    page_rows = []
 
-    conn.close()
+    for r in rows:
+        running += r["debit"] - r["credit"]
+        page_rows.append((
+            r["txn_date"], r["particular"],
+            from_paise(r["debit"]), from_paise(r["credit"]),
+            r["note"], from_paise(running), r["id"], r["side"]
+        ))
 
-    closing = opening_amt + total_dr - total_cr
-    return closing
+    return {
+        "rows": page_rows,
+        "has_prev": has_prev,
+        "has_next": has_more if before is None else True
+    }
 
-def get_all_balances_optimized(financial_year_id, start_date, end_date):
-    """
-    Optimized: Fetches all account balances in one query using CTEs.
-    Matches your logic: Opening + Debits (to_acc_id) - Credits (from_acc_id)
+def get_account_ledger_totals(account_id, financial_year_id, start_date=None, end_date=None):
     """
-    conn = get_connection()
-    
-    query = """
-    WITH Opening AS (
-        SELECT account_id, COALESCE(amount, 0) as op_amt 
-        FROM opening_balances 
-        WHERE financial_year_id = ?
-    ),
-    Debits AS (
-        SELECT to_acc_id as account_id, SUM(amount) as dr_amt 
-        FROM transactions 
-        WHERE financial_year_id = ? AND txn_date BETWEEN ? AND ?
-        GROUP BY to_acc_id
-    ),
-    Credits AS (
-        SELECT from_acc_id as account_id, SUM(amount) as cr_amt 
-        FROM transactions 
-        WHERE financial_year_id = ? AND txn_date BETWEEN ? AND ?
-        GROUP BY from_acc_id
-    )
-    SELECT 
-        a.id as acc_id, 
-        a.name as acc_name, 
-        a.group_id,
-        g.group_name,
-        (COALESCE(o.op_amt, 0) + COALESCE(d.dr_amt, 0) - COALESCE(c.cr_amt, 0)) as balance
-    FROM accounts a
-    JOIN groups g ON a.group_id = g.id
-    LEFT JOIN Opening o ON a.id = o.account_id
-    LEFT JOIN Debits d ON a.id = d.account_id
-    LEFT JOIN Credits c ON a.id = c.account_id
+    Aggregate figures of a ledger without reading its lines:
+        opening, total_dr, total_cr, closing, lines
+    Totals come from the period balances; lines is counted on the
+    account indexes.
     """
-    
-    params = (
-        financial_year_id, 
-        financial_year_id, start_date, end_date, 
-        financial_year_id, start_date, end_date
-    )
-    
-    df = pd.read_sql(query, conn, params=params)
-    conn.close()
-    return df
+    with db_connection() as conn:
+        opening = conn.execute("""
+            SELECT COALESCE(SUM(amount), 0)
+            FROM opening_balances
+            WHERE account_id = ? AND financial_year_id = ?
+        """, (account_id, financial_year_id)).fetchone()[0]
+
+        if start_date and end_date:
+            movements_sql, movements_params = _period_movements(
+                financial_year_id, start_date, end_date, account_id=account_id
+            )
+            date_filter, date_params = "AND txn_date BETWEEN ? AND ?", [start_date, end_date]
+        else:
+            movements_sql = """
+                SELECT account_id, period, debit, credit
+                FROM account_period_balances
+                WHERE financial_year_id = ? AND account_id = ?
+            """
+            movements_params = [financial_year_id, account_id]
+            date_filter, date_params = "", []
+
+        total_dr, total_cr = conn.execute(f"""
+            SELECT COALESCE(SUM(debit), 0), COALESCE(SUM(credit), 0)
+            FROM ({movements_sql})
+        """, movements_params).fetchone()
+
+        lines = conn.execute(f"""
+            SELECT
+                (SELECT COUNT(*) FROM transactions
+                 WHERE financial_year_id = ? AND to_acc_id = ? {date_filter})
+              + (SELECT COUNT(*) FROM transactions
+                 WHERE financial_year_id = ? AND from_acc_id = ? {date_filter})
+        """, [financial_year_id, account_id] + date_params
+             + [financial_year_id, account_id] + date_params).fetchone()[0]
+
+    return {
+        "opening": from_paise(opening),
+        "total_dr": from_paise(total_dr),
+        "total_cr": from_paise(total_cr),
+        "closing": from_paise(opening + total_dr - total_cr),
+        "lines": lines
+    }
+
+def calculate_running_ledger(ledger_rows, opening_balance):
+    """
+    ledger_rows = rows from get_account_ledger (running balance included)
+    returns (DataFrame, total_dr, total_cr, closing_balance).
+    Balance stays numeric (+ Dr / - Cr); format it with format_dr_cr when displaying.
+    """
+    df = pd.DataFrame(
+        [tuple(r) for r in ledger_rows],
+        columns=["Date", "Particular", "Debit", "Credit", "Note", "Balance"]
+    )
+
+    total_dr = float(df["Debit"].sum())
+    total_cr = float(df["Credit"].sum())
+
+    closing_balance = float(df["Balance"].iloc[-1]) if len(df) else opening_balance
+
+    return df, total_dr, total_cr, closing_balance
+
+# -----------------------------------------
+# Helper: Get Account Closing Balance
+# -----------------------------------------
+def get_account_closing_balance(account_id, financial_year_id, start_date, end_date):
+    """
+    Closing Balance = Opening + Debit(to_acc) - Credit(from_acc)
+    Opening is already signed (+ debit, - credit)
+    """
+    movements_sql, movements_params = _period_movements(
+        financial_year_id, start_date, end_date, account_id=account_id
+    )
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Opening Balance
+        cursor.execute("""
+            SELECT COALESCE(amount, 0)
+            FROM opening_balances
+            WHERE account_id = ? AND financial_year_id = ?
+        """, (account_id, financial_year_id))
+
+        opening = cursor.fetchone()
+        opening_amt = opening[0] if opening else 0
+
+        # Total Debit (Received) / Credit (Paid) from the period balances
+        cursor.execute(f"""
+            SELECT COALESCE(SUM(debit), 0), COALESCE(SUM(credit), 0)
+            FROM ({movements_sql})
+        """, movements_params)
+
+        total_dr, total_cr = cursor.fetchone()
+
+    closing = opening_amt + total_dr - total_cr
+    return from_paise(closing)
+
+# -----------------------------------------
+# Helper: Period Movements (account_period_balances)
+# -----------------------------------------
+def _split_period_range(start_date, end_date):
+    """
+    Splits a date range into whole months and partial-month edges.
+    Returns (first_period, last_period, edge_ranges):
+        first_period / last_period -> 'YYYY-MM' of whole months (None if none)
+        edge_ranges                -> [(from, to)] days outside whole months
+    """
+    start = date.fromisoformat(str(start_date)[:10])
+    end = date.fromisoformat(str(end_date)[:10])
+
+    if start > end:
+        return None, None, []
+
+    # First whole month starts on/after start
+    if start.day == 1:
+        first_month = start
+    else:
+        first_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    # Last whole month ends on/before end
+    next_day = end + timedelta(days=1)
+    if next_day.day == 1:
+        last_month = end.replace(day=1)
+    else:
+        last_month = (end.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    if first_month > last_month:
+        return None, None, [(start.isoformat(), end.isoformat())]
+
+    last_month_end = (last_month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+    edges = []
+    if start < first_month:
+        edges.append((start.isoformat(), (first_month - timedelta(days=1)).isoformat()))
+    if end > last_month_end:
+        edges.append(((last_month_end + timedelta(days=1)).isoformat(), end.isoformat()))
+
+    return first_month.strftime("%Y-%m"), last_month.strftime("%Y-%m"), edges
+
+def _period_movements(financial_year_id, start_date, end_date, account_id=None):
+    """
+    SELECT yielding (account_id, period, debit, credit) rows for the date range.
+    Whole months are read from account_period_balances; only the partial
+    months at either edge touch the transactions table.
+    Returns (sql, params).
+    """
+    first_period, last_period, edges = _split_period_range(start_date, end_date)
+
+    parts = []
+    params = []
+
+    if first_period:
+        parts.append(f"""
+            SELECT account_id, period, debit, credit
+            FROM account_period_balances
+            WHERE financial_year_id = ?
+              AND period BETWEEN ? AND ?
+              {"AND account_id = ?" if account_id is not None else ""}
+        """)
+        params += [financial_year_id, first_period, last_period]
+        if account_id is not None:
+            params.append(account_id)
+
+    for edge_from, edge_to in edges:
+        for acc_col, debit_col, credit_col in (
+            ("to_acc_id", "amount", "0"),
+            ("from_acc_id", "0", "amount"),
+        ):
+            parts.append(f"""
+                SELECT {acc_col} AS account_id, substr(txn_date, 1, 7) AS period,
+                       {debit_col} AS debit, {credit_col} AS credit
+                FROM transactions
+                WHERE financial_year_id = ?
+                  AND txn_date BETWEEN ? AND ?
+                  {f"AND {acc_col} = ?" if account_id is not None else ""}
+            """)
+            params += [financial_year_id, edge_from, edge_to]
+            if account_id is not None:
+                params.append(account_id)
+
+    if not parts:
+        # Empty range: keep the column shape, return no rows
+        return "SELECT NULL AS account_id, NULL AS period, 0 AS debit, 0 AS credit WHERE 0", []
+
+    return " UNION ALL ".join(parts), params
+
+# -----------------------------------------
+# Helper: Closing Balances (all accounts, one query)
+# -----------------------------------------
+def _closing_balances_cte(financial_year_id, start_date, end_date):
+    """
+    CTE body shared by every report which needs closing balances of all
+    accounts. Produces one "Closing" row per account, amounts in paise:
+        closing = opening + debit (to_acc_id) - credit (from_acc_id)
+    Returns (sql, params).
+    """
+    movements_sql, movements_params = _period_movements(financial_year_id, start_date, end_date)
+
+    sql = f"""
+    Opening AS (
+        SELECT account_id, COALESCE(amount, 0) AS op_amt
+        FROM opening_balances
+        WHERE financial_year_id = ?
+    ),
+    Movements AS (
+        {movements_sql}
+    ),
+    Totals AS (
+        SELECT account_id, SUM(debit) AS dr_amt, SUM(credit) AS cr_amt
+        FROM Movements
+        GROUP BY account_id
+    ),
+    Closing AS (
+        SELECT
+            a.id AS acc_id,
+            a.name AS acc_name,
+            a.group_id,
+            g.group_name,
+            COALESCE(o.op_amt, 0) AS opening,
+            COALESCE(t.dr_amt, 0) AS debit,
+            COALESCE(t.cr_amt, 0) AS credit,
+            (COALESCE(o.op_amt, 0) + COALESCE(t.dr_amt, 0) - COALESCE(t.cr_amt, 0)) AS closing
+        FROM accounts a
+        JOIN groups g ON a.group_id = g.id
+        LEFT JOIN Opening o ON a.id = o.account_id
+        LEFT JOIN Totals t ON a.id = t.account_id
+    )
+    """
+
+    return sql, [financial_year_id] + movements_params
+
+# -----------------------------------------
+# Helper: Monthly Rollup (month x nature)
+# -----------------------------------------
+# Natures whose balance normally sits on the credit side
+CREDIT_NATURES = ("LIABILITY", "INCOME", "EQUITY", "CREDITOR")
+
+def get_monthly_rollup(financial_year_id, start_date, end_date, account_id=None):
+    """
+    Debit / credit totals per month and group nature for a date range.
+    Whole months come from account_period_balances, so a year is a few
+    dozen rows; only partial months at the edges touch transactions.
+    Returns DataFrame: month ('YYYY-MM'), nature, debit, credit (rupees)
+    """
+    movements_sql, params = _period_movements(
+        financial_year_id, start_date, end_date, account_id=account_id
+    )
+
+    with db_connection() as conn:
+        return pd.read_sql(f"""
+            SELECT
+                m.period AS month,
+                g.nature,
+                SUM(m.debit) / 100.0 AS debit,
+                SUM(m.credit) / 100.0 AS credit
+            FROM ({movements_sql}) m
+            JOIN accounts a ON a.id = m.account_id
+            JOIN groups g ON a.group_id = g.id
+            GROUP BY m.period, g.nature
+            ORDER BY m.period
+        """, conn, params=params)
+
+def get_monthly_nature_matrix(financial_year_id, start_date, end_date):
+    """
+    Month x nature matrix of net movement for a date range.
+    Index 'YYYY-MM', one column per ACCOUNT_NATURES key. Values are in
+    each nature's own direction: credit - debit for CREDIT_NATURES,
+    debit - credit otherwise (so income and expense are both positive).
+    """
+    df = get_monthly_rollup(financial_year_id, start_date, end_date)
+    df = df[df["nature"].notna()]
+
+    df = df.assign(net=np.where(
+        df["nature"].isin(CREDIT_NATURES),
+        df["credit"] - df["debit"],
+        df["debit"] - df["credit"]
+    ))
+
+    matrix = df.pivot_table(index="month", columns="nature", values="net", aggfunc="sum", fill_value=0)
+
+    return matrix.reindex(columns=list(ACCOUNT_NATURES), fill_value=0).round(2)
+
+@_report_cached
+def get_all_balances_optimized(financial_year_id, start_date, end_date):
+    """
+    Optimized: all account balances from the prefix-sum index, no scan.
+    Matches your logic: Opening + Debits (to_acc_id) - Credits (from_acc_id)
+    """
+    with db_connection() as conn:
+        df = pd.read_sql("""
+            SELECT a.id AS acc_id, a.name AS acc_name, a.group_id, g.group_name, g.nature
+            FROM accounts a
+            JOIN groups g ON a.group_id = g.id
+            ORDER BY a.id
+        """, conn)
+
+    openings = _opening_paise(financial_year_id)
+    debit, credit = _prefix_totals(financial_year_id, df["acc_id"], start_date, end_date)
+
+    opening = df["acc_id"].map(openings).fillna(0).astype("int64").to_numpy()
+    df["balance"] = (opening + debit - credit) / 100
+
+    return df
+
+# -----------------------------------------
+# Trial Balance
+# -----------------------------------------
+@_report_cached
+def get_trial_balance(financial_year_id, start_date, end_date):
+    """
+    Dr / Cr closing of every account computed in one grouped query.
+    Returns dict:
+        rows         -> account rows (Account Name, Group, Debit (Dr), Credit (Cr))
+        groups       -> group subtotal rows
+        total_debit, total_credit, difference, is_balanced
+    """
+    cte_sql, params = _closing_balances_cte(financial_year_id, start_date, end_date)
+
+    query = f"""
+        WITH {cte_sql},
+        Sides AS (
+            SELECT
+                acc_name,
+                group_name,
+                CASE WHEN closing >= 0 THEN closing ELSE 0 END AS dr_amt,
+                CASE WHEN closing < 0 THEN -closing ELSE 0 END AS cr_amt
+            FROM Closing
+        )
+        SELECT
+            acc_name, group_name, dr_amt, cr_amt,
+            SUM(dr_amt) OVER grp AS group_dr,
+            SUM(cr_amt) OVER grp AS group_cr
+        FROM Sides
+        WINDOW grp AS (PARTITION BY group_name)
+        ORDER BY acc_name
+    """
+
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        rows = cur.fetchall()
+
+    trial_rows = []
+    group_totals = {}
+    total_debit = 0     # paise
+    total_credit = 0    # paise
+
+    for r in rows:
+        total_debit += r["dr_amt"]
+        total_credit += r["cr_amt"]
+
+        trial_rows.append({
+            "Account Name": r["acc_name"],
+            "Group": r["group_name"],
+            "Debit (Dr)": from_paise(r["dr_amt"]),
+            "Credit (Cr)": from_paise(r["cr_amt"])
+        })
+
+        group_totals[r["group_name"]] = {
+            "Group Name": r["group_name"],
+            "Debit (Dr)": from_paise(r["group_dr"]),
+            "Credit (Cr)": from_paise(r["group_cr"])
+        }
+
+    return {
+        "rows": trial_rows,
+        "groups": [group_totals[g] for g in sorted(group_totals)],
+        "total_debit": from_paise(total_debit),
+        "total_credit": from_paise(total_credit),
+        "difference": from_paise(abs(total_debit - total_credit)),
+        "is_balanced": total_debit == total_credit
+    }
 
 # -----------------------------------------
 # Helper: Format Amount
@@ -799,9 +1975,14 @@ def get_all_balances_optimized(financial_year_id, start_date, end_date):
 def format_amt(val):
     return f"₹ {val:,.2f}"
 
+def format_dr_cr(values):
+    """Signed balances (Series) -> "123.45 Dr" / "67.00 Cr" strings."""
+    text = values.abs().map("{:.2f}".format)
+    return text + np.where(values >= 0, " Dr", " Cr")
+
     
 def generate_voucher_no(voucher_type_id, financial_year_id):
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         cur.execute("""
@@ -818,345 +1999,811 @@ def generate_voucher_no(voucher_type_id, financial_year_id):
 
 
 # -----------------------------------------
-# CASH FLOW REPORT FUNCTIONS
+# In-memory Transaction Store (per financial year)
 # -----------------------------------------
+# One financial year's transactions held as NumPy columns sorted by
+# (txn_date, id), plus per-account position arrays. Built once per
+# process and kept current from change_log: only rows written since the
+# last seen seq are read again and merged into the sorted arrays.
 
-def get_cash_bank_accounts(financial_year_id):
+TXN_STORE_IN_CHUNK = 500     # ids per "id IN (...)" when refreshing
+
+_TXN_COLUMNS = ("id", "date", "from", "to", "amount", "note")
+_NO_POSITIONS = np.empty(0, dtype=np.int64)
+
+_txn_stores = {}             # (DB_NAME, financial_year_id) -> store
+_txn_store_lock = threading.Lock()
+
+def _to_ordinal(value):
+    """'YYYY-MM-DD' / date -> date ordinal."""
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+def _ordinals_to_iso(ordinals):
+    """Ordinal array -> array of 'YYYY-MM-DD' strings."""
+    days, inverse = np.unique(ordinals, return_inverse=True)
+    labels = np.array([date.fromordinal(d).isoformat() for d in days.tolist()], dtype=object)
+    return labels[inverse]
+
+def _fetch_txn_columns(conn, financial_year_id, ids=None):
+    """Reads a year's transactions (or only `ids`) into NumPy columns."""
+    query = """
+        SELECT id, txn_date, from_acc_id, to_acc_id, amount, note
+        FROM transactions
+        WHERE financial_year_id = ?
+    """
+
+    if ids is None:
+        rows = conn.execute(query, (financial_year_id,)).fetchall()
+    else:
+        rows = []
+        for i in range(0, len(ids), TXN_STORE_IN_CHUNK):
+            chunk = ids[i:i + TXN_STORE_IN_CHUNK]
+            rows += conn.execute(
+                f"{query} AND id IN ({','.join('?' * len(chunk))})",
+                [financial_year_id] + chunk
+            ).fetchall()
+
+    txn_ids, txn_dates, from_ids, to_ids, amounts, notes = zip(*rows) if rows else ((),) * 6
+
+    return {
+        "id": np.array(txn_ids, dtype=np.int64),
+        "date": np.array([_to_ordinal(d) for d in txn_dates], dtype=np.int32),
+        "from": np.array(from_ids, dtype=np.int64),
+        "to": np.array(to_ids, dtype=np.int64),
+        "amount": np.array(amounts, dtype=np.int64),     # paise
+        "note": np.array(notes, dtype=object)
+    }
+
+def _build_txn_store(columns, seq):
+    """Sorts the columns by (date, id) and indexes the rows of every account."""
+    order = np.lexsort((columns["id"], columns["date"]))
+    store = {name: columns[name][order] for name in _TXN_COLUMNS}
+    store["seq"] = seq
+
+    # Each row is listed under its to and its from account
+    rows = np.arange(len(order), dtype=np.int64)
+    accounts = np.concatenate([store["to"], store["from"]])
+    positions = np.concatenate([rows, rows])
+
+    by_account = np.lexsort((positions, accounts))
+    accounts, positions = accounts[by_account], positions[by_account]
+
+    # A self transfer (from == to) is listed once
+    keep = np.ones(len(accounts), dtype=bool)
+    keep[1:] = (accounts[1:] != accounts[:-1]) | (positions[1:] != positions[:-1])
+    accounts, positions = accounts[keep], positions[keep]
+
+    account_ids, starts = np.unique(accounts, return_index=True)
+    store["acc_pos"] = dict(zip(account_ids.tolist(), np.split(positions, starts[1:])))
+
+    return store
+
+def _row_keys(dates, ids):
+    """Store order (txn_date, id) as one sortable int64 per row."""
+    return (dates.astype(np.int64) << 40) | ids
+
+def _merge_txn_rows(store, changed, fresh, seq):
     """
-    Returns list of accounts which belong to CASH/BANK group ids.
-    NOTE: You must define your CASH/BANK group ids properly.
+    New store = store without the rows in `changed` plus `fresh` (their
+    current versions), merged into the sorted arrays instead of sorting
+    again. Account positions and the prefix index are patched only from
+    the first changed row on.
     """
+    keep = ~np.isin(store["id"], changed)
+    removed = np.flatnonzero(~keep)
+
+    kept_keys = _row_keys(store["date"][keep], store["id"][keep])
+    fresh_keys = _row_keys(fresh["date"], fresh["id"])
+    order = np.argsort(fresh_keys)
+    fresh = {name: fresh[name][order] for name in _TXN_COLUMNS}
+
+    # np.insert puts fresh row j before kept row ins[j]
+    ins = np.searchsorted(kept_keys, fresh_keys[order])
+    merged = {name: np.insert(store[name][keep], ins, fresh[name]) for name in _TXN_COLUMNS}
+    merged["seq"] = seq
+
+    # Rows before the first removed / inserted one keep their positions
+    first = min(
+        removed[0] if len(removed) else len(keep),
+        ins[0] if len(ins) else len(keep)
+    )
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    # Old position -> new position of every kept row
+    kept_index = np.cumsum(keep) - 1
+    old_to_new = kept_index + np.searchsorted(ins, kept_index, side="right")
+    fresh_pos = ins + np.arange(len(ins))
 
-    # 👇 यहां group_id numbers वही डालो जो आपकी DB में CASH/BANK group के हैं
-    CASH_BANK_GROUP_IDS = (1, 2)   # <-- Change this as per your group ids
+    acc_pos = {}
+    touched = set(fresh["to"].tolist()) | set(fresh["from"].tolist())
 
-    cursor.execute(f"""
-        SELECT id, name
-        FROM accounts
-        WHERE group_id IN ({",".join(["?"]*len(CASH_BANK_GROUP_IDS))})
-        ORDER BY name
-    """, CASH_BANK_GROUP_IDS)
+    for account_id, positions in store["acc_pos"].items():
+        if account_id not in touched and (len(positions) == 0 or positions[-1] < first):
+            acc_pos[account_id] = positions
+        else:
+            acc_pos[account_id] = old_to_new[positions[keep[positions]]]
 
-    rows = cursor.fetchall()
-    conn.close()
+    for account_id in touched:
+        new_rows = fresh_pos[(fresh["to"] == account_id) | (fresh["from"] == account_id)]
+        positions = acc_pos.get(account_id, _NO_POSITIONS)
+        acc_pos[account_id] = np.insert(positions, np.searchsorted(positions, new_rows), new_rows)
 
-    return rows
+    merged["acc_pos"] = {acc: pos for acc, pos in acc_pos.items() if len(pos)}
 
+    if "prefix" in store:
+        merged["prefix"] = _patch_prefix_index(store["prefix"], changed, fresh)
 
-def get_opening_balance(account_id, financial_year_id):
-    conn = get_connection()
-    cursor = conn.cursor()
+    return merged
 
-    cursor.execute("""
-        SELECT COALESCE(amount, 0)
-        FROM opening_balances
-        WHERE account_id = ?
+def _refresh_txn_store(conn, store, financial_year_id, seq):
+    """Re-reads only the transactions logged in change_log after store["seq"]."""
+    oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+
+    # Counter went back (database restored) or the rows after our seq were
+    # trimmed (change_log keeps only the newest rows): reload everything
+    if seq < store["seq"] or (oldest is not None and oldest > store["seq"] + 1):
+        return _build_txn_store(_fetch_txn_columns(conn, financial_year_id), seq)
+
+    changed = [r[0] for r in conn.execute("""
+        SELECT DISTINCT row_id
+        FROM change_log
+        WHERE seq > ?
+          AND table_name = 'transactions'
           AND financial_year_id = ?
-    """, (account_id, financial_year_id))
+    """, (store["seq"], financial_year_id))]
 
-    row = cursor.fetchone()
-    conn.close()
+    if not changed:
+        return dict(store, seq=seq)
 
-    return row[0] if row else 0
+    # Drop old versions of the changed rows, merge in what exists now
+    fresh = _fetch_txn_columns(conn, financial_year_id, changed)
+    return _merge_txn_rows(store, changed, fresh, seq)
 
+def get_txn_store(financial_year_id):
+    """
+    Column store of one financial year, refreshed to the latest change.
+    Keys:
+        id, date (ordinal), from, to, amount (paise), note -> arrays sorted by (date, id)
+        acc_pos -> {account_id: positions of the account's rows}
+        seq     -> change_log seq the store reflects
+    The arrays are shared, never modify them.
+    """
+    key = (DB_NAME, financial_year_id)
 
-def get_cash_flow_summary(account_id, financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
+    with _txn_store_lock, db_connection() as conn:
+        # Read the counter first: a write racing the load is applied again next time
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        store = _txn_stores.get(key)
 
-    # Cash In
-    cursor.execute("""
-        SELECT COALESCE(SUM(amount), 0)
-        FROM transactions
-        WHERE financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-          AND to_acc_id = ?
-    """, (financial_year_id, start_date, end_date, account_id))
-    cash_in = cursor.fetchone()[0]
+        if store is None:
+            store = _build_txn_store(_fetch_txn_columns(conn, financial_year_id), seq)
+        elif seq != store["seq"]:
+            store = _refresh_txn_store(conn, store, financial_year_id, seq)
 
-    # Cash Out
-    cursor.execute("""
-        SELECT COALESCE(SUM(amount), 0)
-        FROM transactions
-        WHERE financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-          AND from_acc_id = ?
-    """, (financial_year_id, start_date, end_date, account_id))
-    cash_out = cursor.fetchone()[0]
+        _txn_stores[key] = store
 
-    conn.close()
+    return store
 
-    return {
-        "cash_in": cash_in,
-        "cash_out": cash_out,
-        "net_cash_flow": cash_in - cash_out
-    }
+def clear_txn_stores():
+    """Drops every loaded store (e.g. after the database file is replaced)."""
+    with _txn_store_lock:
+        _txn_stores.clear()
 
-def get_cash_flow_transactions(account_id, financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
+def _store_range(store, start_date, end_date):
+    """(lo, hi) row positions dated start_date..end_date (both inclusive)."""
+    lo = np.searchsorted(store["date"], _to_ordinal(start_date), side="left")
+    hi = np.searchsorted(store["date"], _to_ordinal(end_date), side="right")
+    return lo, hi
 
-    cursor.execute("""
-        SELECT 
-            t.id,
-            t.txn_date,
-            t.note,
-            a1.name AS from_account,
-            a2.name AS to_account,
-            t.from_acc_id,
-            t.to_acc_id,
-            t.amount
-        FROM transactions t
-        LEFT JOIN accounts a1 ON a1.id = t.from_acc_id
-        LEFT JOIN accounts a2 ON a2.id = t.to_acc_id
-        WHERE t.financial_year_id = ?
-          AND t.txn_date BETWEEN ? AND ?
-          AND (t.from_acc_id = ? OR t.to_acc_id = ?)
-        ORDER BY t.txn_date ASC, t.id ASC
-    """, (financial_year_id, start_date, end_date, account_id, account_id))
+def _store_account_positions(store, account_id, start_date, end_date):
+    """Positions of an account's rows dated start_date..end_date, in date order."""
+    positions = store["acc_pos"].get(account_id, _NO_POSITIONS)
+    lo, hi = _store_range(store, start_date, end_date)
+    return positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)]
 
-    rows = cursor.fetchall()
-    conn.close()
+def _prefix_index(store):
+    """
+    Prefix-sum index of a store, built on first use and kept on the store
+    (a refreshed store gets it patched from the first changed key on).
+        keys   -> (account_id << 32) | date ordinal of every posting, sorted
+        ids    -> transaction id of every posting
+        debit  -> running debit total (paise) over keys, leading 0
+        credit -> running credit total (paise) over keys, leading 0
+    Totals of an account between two dates are two binary searches and a
+    subtraction.
+    """
+    index = store.get("prefix")
 
-    return rows
+    if index is None:
+        keys, ids, debit, credit = _index_postings(store)
+        order = np.argsort(keys, kind="stable")
 
-def get_cash_closing_balance(account_id, financial_year_id, start_date, end_date):
-    opening = get_opening_balance(account_id, financial_year_id)
-    summary = get_cash_flow_summary(account_id, financial_year_id, start_date, end_date)
-    return opening + summary["net_cash_flow"]
+        index = {
+            "keys": keys[order],
+            "ids": ids[order],
+            "debit": np.concatenate([[0], np.cumsum(debit[order])]),
+            "credit": np.concatenate([[0], np.cumsum(credit[order])])
+        }
+        store["prefix"] = index
+
+    return index
+
+def _posting_keys(accounts, dates):
+    """Prefix index order (account_id, txn_date) as one sortable int64."""
+    return (accounts << 32) | dates.astype(np.int64)
+
+def _index_postings(columns):
+    """(keys, ids, debit, credit) postings of rows: a debit to `to`, a credit to `from`."""
+    zeros = np.zeros(len(columns["id"]), dtype=np.int64)
+    return (
+        _posting_keys(np.concatenate([columns["to"], columns["from"]]),
+                      np.concatenate([columns["date"], columns["date"]])),
+        np.concatenate([columns["id"], columns["id"]]),
+        np.concatenate([columns["amount"], zeros]),
+        np.concatenate([zeros, columns["amount"]])
+    )
 
-def get_day_book_transactions(financial_year_id, start_date, end_date):
+def _patch_prefix_index(index, changed, fresh):
     """
-    Returns all transactions in date range for Day Book.
+    Prefix index without the postings of `changed` rows, plus those of
+    `fresh`. Entries before the first changed key are kept as they are;
+    the running totals are summed again from there on only.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    keep = ~np.isin(index["ids"], changed)
+    removed = np.flatnonzero(~keep)
 
-    cursor.execute("""
-        SELECT
-            t.id,
-            t.txn_date,
-            COALESCE(t.note, ''),
-            t.amount,
-            t.from_acc_id,
-            fa.name AS from_account,
-            t.to_acc_id,
-            ta.name AS to_account
-        FROM transactions t
-        LEFT JOIN accounts fa ON fa.id = t.from_acc_id
-        LEFT JOIN accounts ta ON ta.id = t.to_acc_id
-        WHERE t.financial_year_id = ?
-          AND t.txn_date BETWEEN ? AND ?
-        ORDER BY t.txn_date ASC, t.id ASC
-    """, (financial_year_id, start_date, end_date))
-
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    keys, ids, debit, credit = _index_postings(fresh)
+    order = np.argsort(keys, kind="stable")
+    keys, ids, debit, credit = keys[order], ids[order], debit[order], credit[order]
 
-def get_day_book_summary(financial_year_id, start_date, end_date):
+    ins = np.searchsorted(index["keys"][keep], keys, side="right")
+
+    if not len(removed) and not len(ins):
+        return index
+
+    first = min(
+        removed[0] if len(removed) else len(keep),
+        ins[0] if len(ins) else len(keep)
+    )
+
+    # Tail from `first` on: old postings still there, fresh ones inserted
+    tail_keep = keep[first:]
+    tail_ins = ins - first
+
+    def tail(old_tail, new):
+        return np.insert(old_tail[tail_keep], tail_ins, new)
+
+    def running(prefix, new):
+        # Per-posting amounts of the old tail are differences of its running totals
+        amounts = tail(np.diff(prefix[first:]), new)
+        return np.concatenate([prefix[:first + 1], prefix[first] + np.cumsum(amounts)])
+
+    return {
+        "keys": np.concatenate([index["keys"][:first], tail(index["keys"][first:], keys)]),
+        "ids": np.concatenate([index["ids"][:first], tail(index["ids"][first:], ids)]),
+        "debit": running(index["debit"], debit),
+        "credit": running(index["credit"], credit)
+    }
+
+def _prefix_totals(financial_year_id, account_ids, start_date, end_date):
     """
-    Returns total debit/credit counts and total amount summary.
+    Debit / credit totals (paise arrays) of account_ids for rows dated
+    start_date..end_date; start_date=None means from the first row.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    index = _prefix_index(get_txn_store(financial_year_id))
 
-    cursor.execute("""
-        SELECT COALESCE(SUM(amount), 0)
-        FROM transactions
-        WHERE financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-    """, (financial_year_id, start_date, end_date))
+    accounts = np.asarray(account_ids, dtype=np.int64) << 32
+    start = 0 if start_date is None else _to_ordinal(start_date)
 
-    total_amount = cursor.fetchone()[0] or 0
+    lo = np.searchsorted(index["keys"], accounts | start, side="left")
+    hi = np.searchsorted(index["keys"], accounts | _to_ordinal(end_date), side="right")
 
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM transactions
-        WHERE financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-    """, (financial_year_id, start_date, end_date))
+    return (
+        index["debit"][hi] - index["debit"][lo],
+        index["credit"][hi] - index["credit"][lo]
+    )
 
-    total_entries = cursor.fetchone()[0] or 0
+def _opening_paise(financial_year_id):
+    """{account_id: opening amount (paise)} of a year."""
+    with db_connection() as conn:
+        return dict(conn.execute("""
+            SELECT account_id, amount
+            FROM opening_balances
+            WHERE financial_year_id = ?
+        """, (financial_year_id,)).fetchall())
 
-    conn.close()
+def get_balances_as_of(financial_year_id, as_of_date):
+    """
+    Balance of every account at the end of as_of_date:
+        opening + debit - credit of all rows dated up to as_of_date
+    One vectorized lookup in the prefix-sum index for all accounts.
+    Returns {account_id: balance}.
+    """
+    account_ids = list(get_account_names())
+    openings = _opening_paise(financial_year_id)
+
+    debit, credit = _prefix_totals(financial_year_id, account_ids, None, as_of_date)
 
     return {
-        "total_amount": float(total_amount),
-        "total_entries": int(total_entries)
+        acc_id: from_paise(openings.get(acc_id, 0) + dr - cr)
+        for acc_id, dr, cr in zip(account_ids, debit.tolist(), credit.tolist())
     }
 
-def get_account_closing_balance(account_id, financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
+@_master_cached
+def get_account_names():
+    """{account_id: name} of every account."""
+    with db_connection() as conn:
+        return dict(conn.execute("SELECT id, name FROM accounts").fetchall())
 
-    # Opening Balance
-    cursor.execute("""
-        SELECT COALESCE(amount, 0)
-        FROM opening_balances
-        WHERE account_id = ? AND financial_year_id = ?
-    """, (account_id, financial_year_id))
+def get_transactions_frame(financial_year_id):
+    """
+    Transactions of a year as a DataFrame, newest first, built from the
+    column store. Columns: id, txn_date, from_account, to_account, amount, note
+    """
+    store = get_txn_store(financial_year_id)
 
-    opening = cursor.fetchone()
-    opening_balance = float(opening[0]) if opening else 0.0
+    if len(store["id"]) == 0:
+        return pd.DataFrame()
 
-    # Transactions Impact
-    cursor.execute("""
-        SELECT 
-            COALESCE(SUM(
-                CASE 
-                    WHEN to_acc_id = ? THEN amount
-                    WHEN from_acc_id = ? THEN -amount
-                    ELSE 0
-                END
-            ), 0)
-        FROM transactions
-        WHERE financial_year_id = ?
-          AND txn_date BETWEEN ? AND ?
-    """, (account_id, account_id, financial_year_id, start_date, end_date))
+    names = get_account_names()
+    newest_first = slice(None, None, -1)
 
-    txn_sum = cursor.fetchone()[0] or 0.0
+    return pd.DataFrame({
+        "id": store["id"][newest_first],
+        "txn_date": _ordinals_to_iso(store["date"][newest_first]),
+        "from_account": pd.Series(store["from"][newest_first]).map(names).to_numpy(),
+        "to_account": pd.Series(store["to"][newest_first]).map(names).to_numpy(),
+        "amount": store["amount"][newest_first] / 100,
+        "note": store["note"][newest_first]
+    })
 
-    conn.close()
+# -----------------------------------------
+# CASH FLOW REPORT FUNCTIONS
+# -----------------------------------------
 
-    return opening_balance + float(txn_sum)
+def get_cash_bank_accounts(financial_year_id):
+    """Returns accounts whose group nature is CASH_BANK."""
 
-def get_outstanding_report(financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT id, name, group_id
-        FROM accounts
-        ORDER BY name
-    """)
-    accounts = cursor.fetchall()
+        cursor.execute("""
+            SELECT a.id, a.name
+            FROM groups g
+            JOIN accounts a ON a.group_id = g.id
+            WHERE g.nature = 'CASH_BANK'
+            ORDER BY a.name
+        """)
 
-    result = []
+        rows = cursor.fetchall()
 
-    for acc in accounts:
-        acc_id = acc[0]
-        acc_name = acc[1]
+    return rows
 
-        closing = get_account_closing_balance(acc_id, financial_year_id, start_date, end_date)
 
-        dr_amt = 0.0
-        cr_amt = 0.0
+def get_opening_balance(account_id, financial_year_id):
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-        if closing > 0:
-            dr_amt = closing
-        elif closing < 0:
-            cr_amt = abs(closing)
+        cursor.execute("""
+            SELECT COALESCE(amount, 0)
+            FROM opening_balances
+            WHERE account_id = ?
+              AND financial_year_id = ?
+        """, (account_id, financial_year_id))
 
-        result.append({
-            "Account ID": acc_id,
-            "Account Name": acc_name,
-            "Receivable (Dr)": round(dr_amt, 2),
-            "Payable (Cr)": round(cr_amt, 2),
-            "Net Balance": round(closing, 2)
-        })
+        row = cursor.fetchone()
 
-    conn.close()
-    return result
+    return from_paise(row[0]) if row else 0
 
-def get_groupwise_outstanding(financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    # Fetch all groups
-    cursor.execute("""
-        SELECT id, group_name
-        FROM groups
-        ORDER BY group_name
-    """)
-    groups = cursor.fetchall()
+CashFlow = namedtuple("CashFlow", [
+    "opening",   # balance at the start of start_date
+    "inflow",    # debits of the account in the range
+    "outflow",   # credits of the account in the range
+    "net",       # inflow - outflow
+    "closing",   # opening + net
+    "rows",      # DataFrame: Date, Narration, From, To, Inflow, Outflow, Balance
+    "monthly",   # DataFrame: Month, Inflow, Outflow, Net Flow
+])
+
+@_report_cached
+def get_cash_flow(account_id, financial_year_id, start_date, end_date):
+    """
+    Cash flow of one cash / bank account between two dates from a single
+    range read of the transaction store: totals, a running-balance frame
+    and the month-wise summary. Returns CashFlow (amounts in rupees).
+    """
+    store = get_txn_store(financial_year_id)
+    pos = _store_account_positions(store, account_id, start_date, end_date)
+    names = get_account_names()
+
+    # Opening of the range = year opening + movements dated before start_date
+    day_before = (date.fromisoformat(str(start_date)[:10]) - timedelta(days=1)).isoformat()
+    debit, credit = _prefix_totals(financial_year_id, [account_id], None, day_before)
+    opening = _opening_paise(financial_year_id).get(account_id, 0) + int(debit[0] - credit[0])
+
+    # Money comes in on the to side, goes out on the from side (paise)
+    amount = store["amount"][pos]
+    inflow = np.where(store["to"][pos] == account_id, amount, 0)
+    outflow = np.where(store["from"][pos] == account_id, amount, 0)
+    balance = opening + np.cumsum(inflow - outflow)
+
+    dates = _ordinals_to_iso(store["date"][pos])
+
+    rows = pd.DataFrame({
+        "Date": dates,
+        "Narration": store["note"][pos],
+        "From": pd.Series(store["from"][pos]).map(names).to_numpy(),
+        "To": pd.Series(store["to"][pos]).map(names).to_numpy(),
+        "Inflow": inflow / 100,
+        "Outflow": outflow / 100,
+        "Balance": balance / 100
+    })
+
+    monthly = (
+        pd.DataFrame({"Month": dates.astype("U7"), "Inflow": inflow, "Outflow": outflow})
+        .groupby("Month", sort=True, as_index=False)
+        .sum()
+    )
+    monthly["Month"] = pd.to_datetime(monthly["Month"], format="%Y-%m").dt.strftime("%b-%Y")
+    monthly["Net Flow"] = (monthly["Inflow"] - monthly["Outflow"]) / 100
+    monthly["Inflow"] = monthly["Inflow"] / 100
+    monthly["Outflow"] = monthly["Outflow"] / 100
+
+    total_in = int(inflow.sum())
+    total_out = int(outflow.sum())
+
+    return CashFlow(
+        opening=from_paise(opening),
+        inflow=from_paise(total_in),
+        outflow=from_paise(total_out),
+        net=from_paise(total_in - total_out),
+        closing=from_paise(opening + total_in - total_out),
+        rows=rows,
+        monthly=monthly
+    )
 
-    result = []
+ConsolidatedCash = namedtuple("ConsolidatedCash", [
+    "opening",    # combined balance of all cash / bank accounts at start_date
+    "inflow",     # receipts from outside the cash / bank accounts
+    "outflow",    # payments to outside the cash / bank accounts
+    "net",        # inflow - outflow
+    "transfers",  # amount moved between cash / bank accounts (netted out)
+    "closing",    # opening + net
+    "accounts",   # DataFrame: Account, Opening, Inflow, Outflow, Transfers, Closing
+    "daily",      # DataFrame: Date, <one column per account>, Inflow, Outflow, Net Flow, Balance
+    "monthly",    # DataFrame: Month, <one column per account>, Inflow, Outflow, Net Flow, Balance
+])
+
+def _cash_position_pivot(moves, external, key, account_names, opening):
+    """
+    Pivot of cash / bank movements on `key` (Date or Month): each
+    account's net movement (transfers included), then the consolidated
+    Inflow / Outflow / Net Flow (transfers excluded) and running Balance.
+    """
+    per_account = moves.pivot_table(
+        index=key, columns="account", values="net", aggfunc="sum", fill_value=0
+    ).reindex(columns=account_names, fill_value=0)
 
-    for g in groups:
-        group_id = g[0]
-        group_name = g[1]
+    totals = external.groupby(key)[["Inflow", "Outflow"]].sum()
 
-        # Accounts under this group
-        cursor.execute("""
-            SELECT id, name
-            FROM accounts
-            WHERE group_id = ?
-        """, (group_id,))
-        accounts = cursor.fetchall()
+    pivot = per_account.join(totals, how="outer").fillna(0)
+    pivot["Net Flow"] = pivot["Inflow"] - pivot["Outflow"]
+    pivot["Balance"] = opening + pivot["Net Flow"].cumsum()
 
-        total_receivable = 0.0
-        total_payable = 0.0
-        net_balance = 0.0
+    return (pivot / 100).reset_index()
 
-        for acc in accounts:
-            acc_id = acc[0]
+@_report_cached
+def get_consolidated_cash_position(financial_year_id, start_date, end_date):
+    """
+    Combined position of every CASH_BANK account between two dates from
+    one grouped query (per day, account and transfer flag). Transfers
+    between two cash / bank accounts move money inside the position, so
+    they show in the per-account columns but not in the combined
+    inflow / outflow. Returns ConsolidatedCash (amounts in rupees).
+    """
+    with db_connection() as conn:
+        accounts = conn.execute("""
+            SELECT a.id, a.name
+            FROM accounts a
+            JOIN groups g ON a.group_id = g.id
+            WHERE g.nature = 'CASH_BANK'
+            ORDER BY a.name
+        """).fetchall()
 
-            closing = get_account_closing_balance(acc_id, financial_year_id, start_date, end_date)
+        moves = pd.read_sql("""
+            WITH cash AS (
+                SELECT a.id
+                FROM accounts a
+                JOIN groups g ON a.group_id = g.id
+                WHERE g.nature = 'CASH_BANK'
+            ),
+            legs AS (
+                SELECT txn_date, to_acc_id AS account_id, amount AS inflow, 0 AS outflow,
+                       from_acc_id IN cash AS transfer
+                FROM transactions
+                WHERE financial_year_id = ?
+                  AND txn_date BETWEEN ? AND ?
+                  AND to_acc_id IN cash
+                UNION ALL
+                SELECT txn_date, from_acc_id, 0, amount,
+                       to_acc_id IN cash
+                FROM transactions
+                WHERE financial_year_id = ?
+                  AND txn_date BETWEEN ? AND ?
+                  AND from_acc_id IN cash
+            )
+            SELECT txn_date, account_id, transfer,
+                   SUM(inflow) AS inflow,
+                   SUM(outflow) AS outflow
+            FROM legs
+            GROUP BY txn_date, account_id, transfer
+            ORDER BY txn_date
+        """, conn, params=[financial_year_id, start_date, end_date] * 2)
+
+    account_ids = [acc_id for acc_id, _ in accounts]
+    names = dict(accounts)
+
+    # Opening of the range = year opening + movements dated before start_date (paise)
+    day_before = (date.fromisoformat(str(start_date)[:10]) - timedelta(days=1)).isoformat()
+    debit, credit = _prefix_totals(financial_year_id, account_ids, None, day_before)
+    openings = _opening_paise(financial_year_id)
+    account_opening = np.array([openings.get(acc_id, 0) for acc_id in account_ids], dtype=np.int64) + debit - credit
+    opening = int(account_opening.sum())
+
+    moves["account"] = moves["account_id"].map(names)
+    moves["net"] = moves["inflow"] - moves["outflow"]
+    moves["Date"] = moves["txn_date"]
+    moves["Month"] = pd.to_datetime(moves["txn_date"]).dt.strftime("%Y-%m")
+
+    external = moves[moves["transfer"] == 0].rename(columns={"inflow": "Inflow", "outflow": "Outflow"})
+    transfers = moves[moves["transfer"] == 1]
+
+    # Per-account totals, in account name order
+    by_account = moves.groupby("account_id")
+    ext_by_account = external.groupby("account_id")
+
+    summary = pd.DataFrame({"Account": [names[acc_id] for acc_id in account_ids]})
+    summary["Opening"] = account_opening
+    summary["Inflow"] = ext_by_account["Inflow"].sum().reindex(account_ids, fill_value=0).to_numpy()
+    summary["Outflow"] = ext_by_account["Outflow"].sum().reindex(account_ids, fill_value=0).to_numpy()
+    summary["Transfers"] = transfers.groupby("account_id")["net"].sum().reindex(account_ids, fill_value=0).to_numpy()
+    summary["Closing"] = summary["Opening"] + by_account["net"].sum().reindex(account_ids, fill_value=0).to_numpy()
+    summary[["Opening", "Inflow", "Outflow", "Transfers", "Closing"]] /= 100
+
+    account_names = summary["Account"].tolist()
+
+    daily = _cash_position_pivot(moves, external, "Date", account_names, opening)
+
+    monthly = _cash_position_pivot(moves, external, "Month", account_names, opening)
+    monthly["Month"] = pd.to_datetime(monthly["Month"], format="%Y-%m").dt.strftime("%b-%Y")
+
+    total_in = int(external["Inflow"].sum())
+    total_out = int(external["Outflow"].sum())
+
+    return ConsolidatedCash(
+        opening=from_paise(opening),
+        inflow=from_paise(total_in),
+        outflow=from_paise(total_out),
+        net=from_paise(total_in - total_out),
+        transfers=from_paise(int(transfers["inflow"].sum())),
+        closing=from_paise(opening + total_in - total_out),
+        accounts=summary,
+        daily=daily,
+        monthly=monthly
+    )
 
-            net_balance += closing
+# -----------------------------------------
+# Helper: Query Plan Check (covering indexes)
+# -----------------------------------------
+# Account-side lookups (to_acc_id / from_acc_id + year + date range)
+# should be answered from these indexes, see setup_db.py
+ACCOUNT_SIDE_INDEXES = ("idx_txn_fy_to_date", "idx_txn_fy_from_date")
 
-            if closing > 0:
-                total_receivable += closing
-            elif closing < 0:
-                total_payable += abs(closing)
+# Statements reading transactions by account (to_acc_id / from_acc_id = or IN)
+_ACCOUNT_SIDE_SQL = re.compile(r"\b(?:to|from)_acc_id\s*(?:=|IN\b)", re.IGNORECASE)
 
-        # Only show groups which have outstanding
-        if total_receivable > 0 or total_payable > 0:
-            result.append({
-                "Group ID": group_id,
-                "Group Name": group_name,
-                "Receivable (Dr)": round(total_receivable, 2),
-                "Payable (Cr)": round(total_payable, 2),
-                "Net Balance": round(net_balance, 2)
-            })
+def explain_report_queries(account_id, financial_year_id, start_date, end_date):
+    """
+    Runs the hot report helpers, captures every transactions query they
+    send to SQLite by account and returns its EXPLAIN QUERY PLAN with a
+    flag telling whether one of ACCOUNT_SIDE_INDEXES is used. A helper
+    answered from the transaction store sends none; it is listed as such.
+    """
+    # Cached helpers run their queries only on a miss: call them directly
+    checks = [
+        ("get_account_ledger",
+         lambda: get_account_ledger(account_id, financial_year_id, start_date, end_date)),
+        ("get_account_ledger_page",
+         lambda: get_account_ledger_page(account_id, financial_year_id, start_date, end_date)),
+        ("get_account_ledger_totals",
+         lambda: get_account_ledger_totals(account_id, financial_year_id, start_date, end_date)),
+        ("get_account_closing_balance",
+         lambda: get_account_closing_balance(account_id, financial_year_id, start_date, end_date)),
+        ("get_cash_flow",
+         lambda: get_cash_flow.__wrapped__(account_id, financial_year_id, start_date, end_date)),
+        ("get_consolidated_cash_position",
+         lambda: get_consolidated_cash_position.__wrapped__(financial_year_id, start_date, end_date)),
+    ]
+
+    # Load the year's store first, so only the helpers' own SQL is traced
+    get_txn_store(financial_year_id)
+
+    results = []
+
+    with db_connection() as conn:
+        for name, run in checks:
+            statements = []
+
+            # Helpers reuse this connection, so the trace sees their SQL
+            # with the parameters already bound
+            conn.set_trace_callback(statements.append)
+            try:
+                run()
+            finally:
+                conn.set_trace_callback(None)
+
+            statements = [
+                sql for sql in statements
+                if "transactions" in sql and _ACCOUNT_SIDE_SQL.search(sql)
+            ]
+
+            if not statements:
+                results.append({
+                    "Query": name,
+                    "Plan": "no account-side SQL (served from the transaction store)",
+                    "Uses Index": True
+                })
+
+            for sql in statements:
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+                results.append({
+                    "Query": name,
+                    "Plan": " | ".join(plan),
+                    "Uses Index": any(
+                        index in step
+                        for step in plan
+                        for index in ACCOUNT_SIDE_INDEXES
+                    )
+                })
+
+    return results
+
+@_report_cached
+def get_day_book_transactions(financial_year_id, start_date, end_date):
+    """
+    Returns all transactions in date range for Day Book:
+        (id, txn_date, note, amount, from_acc_id, from_account, to_acc_id, to_account)
+    """
+    store = get_txn_store(financial_year_id)
+    lo, hi = _store_range(store, start_date, end_date)
+    names = get_account_names()
+
+    return [
+        (txn_id, txn_date, note or "", amount, from_id, names.get(from_id), to_id, names.get(to_id))
+        for txn_id, txn_date, note, amount, from_id, to_id in zip(
+            store["id"][lo:hi].tolist(),
+            _ordinals_to_iso(store["date"][lo:hi]).tolist(),
+            store["note"][lo:hi].tolist(),
+            (store["amount"][lo:hi] / 100).tolist(),
+            store["from"][lo:hi].tolist(),
+            store["to"][lo:hi].tolist()
+        )
+    ]
 
-    conn.close()
-    return result
+def get_day_book_summary(financial_year_id, start_date, end_date):
+    """
+    Returns total debit/credit counts and total amount summary.
+    """
+    store = get_txn_store(financial_year_id)
+    lo, hi = _store_range(store, start_date, end_date)
 
-def get_group_outstanding_accounts(group_id, financial_year_id, start_date, end_date):
-    conn = get_connection()
-    cursor = conn.cursor()
+    return {
+        "total_amount": from_paise(int(store["amount"][lo:hi].sum())),
+        "total_entries": int(hi - lo)
+    }
 
-    cursor.execute("""
-        SELECT id, name
-        FROM accounts
-        WHERE group_id = ?
-        ORDER BY name
-    """, (group_id,))
+@_report_cached
+def get_outstanding_report(financial_year_id, start_date, end_date, include_zero=True):
+    """
+    Receivable / Payable position of every account in one grouped query.
+    include_zero=False drops accounts whose closing balance is nil.
+    """
+    cte_sql, params = _closing_balances_cte(financial_year_id, start_date, end_date)
 
-    accounts = cursor.fetchall()
+    query = f"""
+        WITH {cte_sql}
+        SELECT
+            acc_id AS "Account ID",
+            acc_name AS "Account Name",
+            CASE WHEN closing > 0 THEN closing ELSE 0 END / 100.0 AS "Receivable (Dr)",
+            CASE WHEN closing < 0 THEN -closing ELSE 0 END / 100.0 AS "Payable (Cr)",
+            closing / 100.0 AS "Net Balance"
+        FROM Closing
+        {"" if include_zero else "WHERE closing != 0"}
+        ORDER BY acc_name
+    """
 
-    result = []
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        return [dict(row) for row in cur.fetchall()]
 
-    for acc in accounts:
-        acc_id = acc[0]
-        acc_name = acc[1]
+@_report_cached
+def get_groupwise_outstanding_rollup(financial_year_id, start_date, end_date):
+    """
+    Single aggregate pass for the group-wise outstanding report.
+    Returns (group_rows, accounts_by_group):
+        group_rows        -> one subtotal row per group having outstanding
+        accounts_by_group -> {group_id: [account rows with outstanding]}
+    The drill-down is served from accounts_by_group, no second query needed.
+    """
+    cte_sql, params = _closing_balances_cte(financial_year_id, start_date, end_date)
 
-        closing = get_account_closing_balance(acc_id, financial_year_id, start_date, end_date)
+    query = f"""
+        WITH {cte_sql},
+        Parties AS (
+            SELECT
+                acc_id,
+                acc_name,
+                group_id,
+                group_name,
+                closing,
+                CASE WHEN closing > 0 THEN closing ELSE 0 END AS dr_amt,
+                CASE WHEN closing < 0 THEN -closing ELSE 0 END AS cr_amt
+            FROM Closing
+        )
+        SELECT
+            acc_id, acc_name, group_id, group_name, closing, dr_amt, cr_amt,
+            SUM(dr_amt) OVER grp AS group_dr,
+            SUM(cr_amt) OVER grp AS group_cr,
+            SUM(closing) OVER grp AS group_net
+        FROM Parties
+        WINDOW grp AS (PARTITION BY group_id)
+        ORDER BY group_name, acc_name
+    """
 
-        dr_amt = 0.0
-        cr_amt = 0.0
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        rows = cur.fetchall()
+
+    group_rows = []
+    accounts_by_group = {}
 
-        if closing > 0:
-            dr_amt = closing
-        elif closing < 0:
-            cr_amt = abs(closing)
+    for r in rows:
+        group_id = r["group_id"]
 
-        if dr_amt > 0 or cr_amt > 0:
-            result.append({
-                "Account ID": acc_id,
-                "Account Name": acc_name,
-                "Receivable (Dr)": round(dr_amt, 2),
-                "Payable (Cr)": round(cr_amt, 2),
-                "Net Balance": round(closing, 2)
+        # Only show groups which have outstanding
+        if group_id not in accounts_by_group and (r["group_dr"] > 0 or r["group_cr"] > 0):
+            group_rows.append({
+                "Group ID": group_id,
+                "Group Name": r["group_name"],
+                "Receivable (Dr)": from_paise(r["group_dr"]),
+                "Payable (Cr)": from_paise(r["group_cr"]),
+                "Net Balance": from_paise(r["group_net"])
             })
 
-    conn.close()
-    return result
+        accounts = accounts_by_group.setdefault(group_id, [])
+
+        if r["dr_amt"] > 0 or r["cr_amt"] > 0:
+            accounts.append({
+                "Account ID": r["acc_id"],
+                "Account Name": r["acc_name"],
+                "Receivable (Dr)": from_paise(r["dr_amt"]),
+                "Payable (Cr)": from_paise(r["cr_amt"]),
+                "Net Balance": from_paise(r["closing"])
+            })
+
+    return group_rows, accounts_by_group
+
+def get_groupwise_outstanding(financial_year_id, start_date, end_date):
+    group_rows, _ = get_groupwise_outstanding_rollup(financial_year_id, start_date, end_date)
+    return group_rows
+
+def get_group_outstanding_accounts(group_id, financial_year_id, start_date, end_date):
+    _, accounts_by_group = get_groupwise_outstanding_rollup(financial_year_id, start_date, end_date)
+    return accounts_by_group.get(group_id, [])
 
 def get_accounts_list(financial_year_id, mode="ALL"):
     """
@@ -1164,7 +2811,7 @@ def get_accounts_list(financial_year_id, mode="ALL"):
     mode = "GROUP" => Group-wise alphabetical + account alphabetical
     """
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         if mode == "ALL":
@@ -1173,7 +2820,7 @@ def get_accounts_list(financial_year_id, mode="ALL"):
                     a.id,
                     a.name,
                     g.group_name,
-                    COALESCE(ob.amount, 0) AS opening_amount
+                    COALESCE(ob.amount, 0) / 100.0 AS opening_amount
                 FROM accounts a
                 LEFT JOIN groups g ON a.group_id = g.id
                 LEFT JOIN opening_balances ob 
@@ -1187,7 +2834,7 @@ def get_accounts_list(financial_year_id, mode="ALL"):
                     a.id,
                     a.name,
                     g.group_name,
-                    COALESCE(ob.amount, 0) AS opening_amount
+                    COALESCE(ob.amount, 0) / 100.0 AS opening_amount
                 FROM accounts a
                 LEFT JOIN groups g ON a.group_id = g.id
                 LEFT JOIN opening_balances ob 
@@ -1203,13 +2850,13 @@ def get_group_summary_opening(financial_year_id):
     Shows total opening amount per group.
     """
 
-    with get_connection() as conn:
+    with db_connection() as conn:
         cur = conn.cursor()
 
         cur.execute("""
             SELECT
                 g.group_name,
-                SUM(COALESCE(ob.amount, 0)) AS total_opening
+                SUM(COALESCE(ob.amount, 0)) / 100.0 AS total_opening
             FROM accounts a
             LEFT JOIN groups g ON a.group_id = g.id
             LEFT JOIN opening_balances ob
@@ -1221,162 +2868,73 @@ def get_group_summary_opening(financial_year_id):
         return cur.fetchall()
 
 
-# ------------------ TOTAL INCOME ------------------
-
-def get_total_income():
-    conn = get_connection()
-    fy = get_active_financial_year()
-
-    if not fy:
-        return 0
+# ------------------ DASHBOARD KPIs ------------------
 
-    fy_id = fy["id"]
+DashboardKPIs = namedtuple("DashboardKPIs", [
+    "income",        # net credit of INCOME groups
+    "expense",       # net debit of EXPENSE groups
+    "net_profit",    # income - expense
+    "cash_balance",  # opening + debit - credit of Cash & Bank accounts
+    "receivable",    # net Dr balance of DEBTOR groups (opening included)
+    "payable",       # net Cr balance of CREDITOR groups (opening included)
+    "monthly",       # DataFrame: month ('YYYY-MM'), income, expense
+])
 
-    query = """
-    SELECT SUM(t.amount)
-    FROM transactions t
-    JOIN accounts a ON t.to_acc_id = a.id
-    JOIN groups g ON a.group_id = g.id
-    WHERE g.group_name LIKE '%Income%'
-    AND t.financial_year_id = ?
+def get_dashboard_kpis(financial_year_id):
     """
-
-    result = conn.execute(query, (fy_id,)).fetchone()
-    conn.close()
-    return result[0] if result and result[0] else 0 
-
-# ------------------ TOTAL EXPENSE ------------------
-
-def get_total_expense():
-    conn = get_connection()
-    fy = get_active_financial_year()
-    if not fy:
-        return 0
-
-    fy_id = fy["id"]
-    
-    query = """
-    SELECT SUM(t.amount)
-    FROM transactions t
-    JOIN accounts a ON t.from_acc_id = a.id
-    JOIN groups g ON a.group_id = g.id
-    WHERE g.group_name LIKE '%Expense%'
-    AND t.financial_year_id = ?
-    """
-
-    row = conn.execute(query, (fy_id,)).fetchone()
-    conn.close()
-    return row[0] if row and row[0] else 0
-
-
-# ------------------ CASH BALANCE ------------------
-
-def get_cash_balance():
-    conn = get_connection()
-    fy = get_active_financial_year()
-    if not fy:
-        return 0
-
-    fy_id = fy["id"]
-    
-    query = """
-    SELECT 
-        SUM(CASE WHEN a.name = 'Cash' THEN t.amount ELSE 0 END) -
-        SUM(CASE WHEN b.name = 'Cash' THEN -t.amount ELSE 0 END)
-    FROM transactions t
-    JOIN accounts a ON t.to_acc_id = a.id
-    JOIN accounts b ON t.from_acc_id = b.id
-    WHERE t.financial_year_id = ?
-    """
-
-    result = conn.execute(query, (fy_id,)).fetchone()[0]
-    conn.close()
-    return result or 0
-
-
-# ------------------ RECEIVABLE ------------------
-
-def get_receivable():
-    conn = get_connection()
-    fy = get_active_financial_year()
-    if not fy:
-        return 0
-
-    fy_id = fy["id"]
-    
-    query = """
-    SELECT SUM(t.amount)
-    FROM transactions t
-    JOIN accounts a ON t.to_acc_id = a.id
-    JOIN groups g ON a.group_id = g.id
-    WHERE g.group_name LIKE '%Debtor%'
-    AND t.financial_year_id = ?
-    """
-
-    result = conn.execute(query, (fy_id,)).fetchone()[0]
-    conn.close()
-    return result or 0
-
-
-# ------------------ PAYABLE ------------------
-
-def get_payable():
-    conn = get_connection()
-    fy = get_active_financial_year()
-    if not fy:
-        return 0
-
-    fy_id = fy["id"]
-    
-    query = """
-    SELECT SUM(t.amount)
-    FROM transactions t
-    JOIN accounts a ON t.from_acc_id = a.id
-    JOIN groups g ON a.group_id = g.id
-    WHERE g.group_name LIKE '%Creditor%'
-    AND t.financial_year_id = ?
-    """
-
-    result = conn.execute(query, (fy_id,)).fetchone()[0]
-    conn.close()
-    return result or 0
-
-
-# ------------------ MONTHLY DATA ------------------
-
-def get_monthly_income_expense():
-    conn = get_connection()
-    fy = get_active_financial_year()
-    if not fy:
-        return pd.DataFrame()
-
-    fy_id = fy["id"]
-
-    query = """
-    SELECT 
-        strftime('%m', t.txn_date) as month,
-
-        SUM(CASE 
-            WHEN g1.group_name LIKE '%Income%' 
-            THEN t.amount ELSE 0 END) as income,
-
-        SUM(CASE 
-            WHEN g2.group_name LIKE '%Expense%' 
-            THEN t.amount ELSE 0 END) as expense
-
-    FROM transactions t
-
-    LEFT JOIN accounts a1 ON t.to_acc_id = a1.id
-    LEFT JOIN groups g1 ON a1.group_id = g1.id
-
-    LEFT JOIN accounts a2 ON t.from_acc_id = a2.id
-    LEFT JOIN groups g2 ON a2.group_id = g2.id
-
-    WHERE t.financial_year_id = ?
-    GROUP BY month
-    ORDER BY month
+    Every dashboard figure of a year from one aggregate over
+    account_period_balances (+ opening balances), grouped by month and
+    group nature. Returns DashboardKPIs (amounts in rupees).
     """
+    with db_connection() as conn:
+        rows = conn.execute("""
+            WITH kinds AS (
+                SELECT a.id, g.nature
+                FROM groups g
+                JOIN accounts a ON a.group_id = g.id
+                WHERE g.nature IN ('INCOME', 'EXPENSE', 'DEBTOR', 'CREDITOR', 'CASH_BANK')
+            ),
+            moves AS (
+                SELECT account_id, period, debit - credit AS net
+                FROM account_period_balances
+                WHERE financial_year_id = ?
+
+                UNION ALL
+
+                -- period NULL = opening balance (+ Dr / - Cr)
+                SELECT account_id, NULL, amount
+                FROM opening_balances
+                WHERE financial_year_id = ?
+            )
+            SELECT m.period, k.nature, SUM(m.net) AS net
+            FROM moves m
+            JOIN kinds k ON k.id = m.account_id
+            GROUP BY m.period, k.nature
+        """, (financial_year_id, financial_year_id)).fetchall()
+
+    totals = {"INCOME": 0, "EXPENSE": 0, "DEBTOR": 0, "CREDITOR": 0, "CASH_BANK": 0}
+    monthly = {}
+
+    for period, nature, net in rows:
+        if nature in ("DEBTOR", "CREDITOR", "CASH_BANK"):
+            totals[nature] += net
+        elif period is not None:
+            # Income is earned on the credit side, expense on the debit side
+            amount = -net if nature == "INCOME" else net
+            totals[nature] += amount
+            monthly.setdefault(period, {"INCOME": 0, "EXPENSE": 0})[nature] += amount
+
+    monthly_df = pd.DataFrame(
+        [(month, from_paise(v["INCOME"]), from_paise(v["EXPENSE"])) for month, v in sorted(monthly.items())],
+        columns=["month", "income", "expense"]
+    )
 
-    df = pd.read_sql(query, conn, params=(fy_id,))
-    conn.close()
-    return df
+    return DashboardKPIs(
+        income=from_paise(totals["INCOME"]),
+        expense=from_paise(totals["EXPENSE"]),
+        net_profit=from_paise(totals["INCOME"] - totals["EXPENSE"]),
+        cash_balance=from_paise(totals["CASH_BANK"]),
+        receivable=from_paise(totals["DEBTOR"]),
+        payable=from_paise(-totals["CREDITOR"]),
+        monthly=monthly_df
+    )
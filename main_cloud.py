@@ -1,16 +1,26 @@
 import os
 import streamlit as st
 from db_helpers import (
-    get_connection,
+    DB_NAME,
+    db_connection,
     verify_password,
     get_active_financial_year
 )
+from page_registry import PAGES, run_page, get_page_stats
+from setup_db import migrate
 
 # -------------------------------------------------
 # PAGE CONFIG
 # -------------------------------------------------
 st.set_page_config(page_title="Business Ledger", layout="wide")
 
+# -------------------------------------------------
+# SCHEMA MIGRATIONS (once per server process)
+# -------------------------------------------------
+@st.cache_resource
+def run_migrations():
+    return migrate(DB_NAME)
+
 # -------------------------------------------------
 # LOGIN SCREEN
 # -------------------------------------------------
@@ -27,13 +37,13 @@ def login_screen():
             st.warning("Please enter username and password")
             return
 
-        conn = get_connection()
-        user = conn.execute("""
-            SELECT u.*, r.role_name
-            FROM users u
-            JOIN roles r ON u.role_id = r.id
-            WHERE u.username = ? AND u.is_active = 1
-        """, (username,)).fetchone()
+        with db_connection() as conn:
+            user = conn.execute("""
+                SELECT u.*, r.role_name
+                FROM users u
+                JOIN roles r ON u.role_id = r.id
+                WHERE u.username = ? AND u.is_active = 1
+            """, (username,)).fetchone()
 
         if user and verify_password(password, user["password_hash"]):
 
@@ -99,7 +109,8 @@ def load_sidebar():
                 "🏷 Account Groups",
                 "👤 Accounts",
                 "💰 Opening Balance",
-                "💳 Transactions"
+                "💳 Transactions",
+                "📥 Import Transactions"
             ]
 
             module = st.radio(
@@ -148,6 +159,15 @@ def load_sidebar():
                 key="admin_module_radio"
             )
 
+        if st.session_state.role_name == "Admin":
+            with st.expander("⏱ Page Timings", expanded=False):
+                page_stats = get_page_stats()
+
+                if page_stats:
+                    st.dataframe(page_stats, use_container_width=True, hide_index=True)
+                else:
+                    st.caption("No pages loaded yet.")
+
         st.markdown("---")
         st.caption("⚡ Developed by:")
         st.caption("Ayuquant Software Pvt. Ltd. Ghaziabad, India.")
@@ -160,35 +180,11 @@ def load_sidebar():
 # -------------------------------------------------
 def load_module(module):
 
-    routing = {
-
-        "🔐 Users Management": "working_pages/06_users_management.py",
-        "💾 Backup Management": "working_pages/07_backup_management.py",
-        
-        "🏠 Dashboard": "working_pages/00_dashboard.py",
-        "📅 Financial Year": "working_pages/01_fnancial_year.py",
-        "🏷 Account Groups": "working_pages/02_groups.py",
-        "👤 Accounts": "working_pages/03_accounts.py",
-        "💰 Opening Balance": "working_pages/04_opening_balance.py",
-        "💳 Transactions": "working_pages/05_transactions.py",
-
-        "📑 Ledger": "reports/ledger_report.py",
-        "📊 Trial Balance": "reports/trial_balance_report.py",
-        "📊 Account Balances": "reports/account_balances_report.py",
-        "📈 Profit & Loss": "reports/profit_loss_report.py",
-        "🏦 Balance Sheet": "reports/balance_sheet_report2.py",
-        "💵 Cash Flow": "reports/cash_flow_report.py",
-        "📒 Day Book": "reports/day_book_report.py",
-        "📌 Party Outstandings": "reports/outstanding_report.py",
-        "📌 Group Outstandings": "reports/groupwise_outstanding_report.py",
-        "📋 Accounts List": "reports/accounts_list_report.py",
-    }
-
-    file_path = routing.get(module)
+    file_path = PAGES.get(module)
 
     if file_path and os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            exec(f.read())
+        # Compiled once per server process, recompiled when the file changes
+        run_page(file_path)
     else:
         st.error(f"❌ File not found: {file_path}")
 
@@ -209,4 +205,11 @@ def main_cloud():
 # RUN APP
 # -------------------------------------------------
 if __name__ == "__main__":
+    try:
+        run_migrations()
+    except ValueError as e:
+        # Data the upgrade cannot carry over: say which rows, do not start
+        st.error(f"❌ Database upgrade stopped: {e}")
+        st.stop()
+
     main_cloud()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+
+# -------------------------------
+# Page Routing
+# -------------------------------
+PAGES = {
+
+    "🔐 Users Management": "working_pages/06_users_management.py",
+    "💾 Backup Management": "working_pages/07_backup_management.py",
+
+    "🏠 Dashboard": "working_pages/00_dashboard.py",
+    "📅 Financial Year": "working_pages/01_fnancial_year.py",
+    "🏷 Account Groups": "working_pages/02_groups.py",
+    "👤 Accounts": "working_pages/03_accounts.py",
+    "💰 Opening Balance": "working_pages/04_opening_balance.py",
+    "💳 Transactions": "working_pages/05_transactions.py",
+    "📥 Import Transactions": "working_pages/08_import_transactions.py",
+
+    "📑 Ledger": "reports/ledger_report.py",
+    "📊 Trial Balance": "reports/trial_balance_report.py",
+    "📊 Account Balances": "reports/account_balances_report.py",
+    "📈 Profit & Loss": "reports/profit_loss_report.py",
+    "🏦 Balance Sheet": "reports/balance_sheet_report2.py",
+    "💵 Cash Flow": "reports/cash_flow_report.py",
+    "📒 Day Book": "reports/day_book_report.py",
+    "📌 Party Outstandings": "reports/outstanding_report.py",
+    "📌 Group Outstandings": "reports/groupwise_outstanding_report.py",
+    "📋 Accounts List": "reports/accounts_list_report.py",
+}
+
+# -------------------------------
+# Compiled Page Cache (process-wide)
+# -------------------------------
+# A page is read and compiled once; later reruns exec the cached code
+# object. Editing the file changes its mtime, which recompiles it on
+# the next run.
+_compiled = {}     # file path -> (mtime_ns, code object)
+_page_stats = {}   # file path -> timing counters
+_page_lock = threading.Lock()
+
+def _stats_for(file_path):
+    return _page_stats.setdefault(file_path, {
+        "compiles": 0, "compile_ms": 0.0,
+        "runs": 0, "last_ms": 0.0, "total_ms": 0.0
+    })
+
+def get_page_code(file_path):
+    """Code object of a page file, recompiled only when its mtime changes."""
+    mtime = os.stat(file_path).st_mtime_ns
+
+    with _page_lock:
+        entry = _compiled.get(file_path)
+
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    start = time.perf_counter()
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        code = compile(f.read(), file_path, "exec")
+
+    elapsed = (time.perf_counter() - start) * 1000
+
+    with _page_lock:
+        _compiled[file_path] = (mtime, code)
+        stats = _stats_for(file_path)
+        stats["compiles"] += 1
+        stats["compile_ms"] = elapsed
+
+    return code
+
+def run_page(file_path):
+    """
+    Runs a page in its own globals, like a module: functions and
+    st.fragment bodies defined in a page see the page's imports and names.
+    """
+    code = get_page_code(file_path)
+
+    page_globals = {
+        "__name__": file_path[:-3].replace("/", "."),
+        "__file__": file_path,
+        "__builtins__": __builtins__
+    }
+
+    start = time.perf_counter()
+    try:
+        exec(code, page_globals)
+    finally:
+        # st.stop() / st.rerun() end a page with an exception: still a run
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with _page_lock:
+            stats = _stats_for(file_path)
+            stats["runs"] += 1
+            stats["last_ms"] = elapsed
+            stats["total_ms"] += elapsed
+
+def clear_page_cache():
+    """Drops every compiled page (timings are kept)."""
+    with _page_lock:
+        _compiled.clear()
+
+def get_page_stats():
+    """Per-page compile / run timings, slowest average run first."""
+    pages = {path: label for label, path in PAGES.items()}
+
+    with _page_lock:
+        rows = [
+            {
+                "Page": pages.get(path, path),
+                "Runs": stats["runs"],
+                "Last (ms)": round(stats["last_ms"], 1),
+                "Avg (ms)": round(stats["total_ms"] / stats["runs"], 1) if stats["runs"] else 0.0,
+                "Compiles": stats["compiles"],
+                "Compile (ms)": round(stats["compile_ms"], 1)
+            }
+            for path, stats in _page_stats.items()
+        ]
+
+    return sorted(rows, key=lambda row: row["Avg (ms)"], reverse=True)
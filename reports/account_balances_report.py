@@ -11,7 +11,7 @@ from io import BytesIO
 from db_helpers import (
     get_active_financial_year,
     get_all_accounts,
-    get_transactions_by_year,
+    get_transactions_frame,
 )
 
 st.set_page_config(page_title="Account Balances Report", layout="wide")
@@ -36,8 +36,7 @@ st.caption(f"Financial Year: {active_year['label']} ({fy_start} to {fy_end})")
 # -----------------------------
 # Load Transactions
 # -----------------------------
-rows = get_transactions_by_year(fy_id)
-df_all = pd.DataFrame([dict(r) for r in rows]) if rows else pd.DataFrame()
+df_all = get_transactions_frame(fy_id)
 
 accounts = get_all_accounts()
 active_accounts = [a for a in accounts if a["is_active"] == 1]
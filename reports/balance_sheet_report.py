@@ -4,10 +4,13 @@ from datetime import datetime
 from io import BytesIO
 
 from db_helpers import (
-    get_connection,
+    db_connection,
     get_active_financial_year,
     format_amt,
-    get_account_closing_balance
+    to_paise,
+    get_account_closing_balance,
+    ASSET_NATURES,
+    LIABILITY_NATURES
 )
 
 st.title("📒 Balance Sheet Report")
@@ -34,18 +37,17 @@ end_date = fy_end
 # -----------------------------------------
 # Load Accounts + Groups
 # -----------------------------------------
-conn = get_connection()
-cursor = conn.cursor()
+with db_connection() as conn:
+    cursor = conn.cursor()
 
-cursor.execute("SELECT id, group_name FROM groups")
-groups_data = cursor.fetchall()
+    cursor.execute("SELECT id, group_name, nature FROM groups")
+    groups_data = cursor.fetchall()
 
-group_dict = {g[0]: g[1] for g in groups_data}
+    group_dict = {g[0]: g[1] for g in groups_data}
+    group_nature = {g[0]: g[2] for g in groups_data}
 
-cursor.execute("SELECT id, name, group_id FROM accounts")
-accounts_data = cursor.fetchall()
-
-conn.close()
+    cursor.execute("SELECT id, name, group_id FROM accounts")
+    accounts_data = cursor.fetchall()
 
 
 if not accounts_data:
@@ -53,15 +55,6 @@ if not accounts_data:
     st.stop()
 
 
-# -----------------------------------------
-# Group Category Logic (By Group ID)
-# -----------------------------------------
-# ⚠️ IMPORTANT: You must set correct IDs according to your DB.
-# Replace these IDs with your real group IDs.
-
-ASSET_GROUP_IDS = [1, 2, 3, 4, 5]         # Example: Cash, Bank, Stock, Fixed Assets
-LIABILITY_GROUP_IDS = [6, 7, 8, 9, 10]    # Example: Capital, Loans, Sundry Creditors
-
 # -----------------------------------------
 # Build Balance Sheet Data
 # -----------------------------------------
@@ -80,8 +73,8 @@ for i, (acc_id, acc_name, group_id) in enumerate(accounts_data):
 
     closing = get_account_closing_balance(acc_id, financial_year_id, start_date, end_date)
 
-    # Assets Side
-    if group_id in ASSET_GROUP_IDS:
+    # Assets Side (by group nature, see Account Groups)
+    if group_nature.get(group_id) in ASSET_NATURES:
         assets_rows.append({
             "Account Name": acc_name,
             "Group": group_dict.get(group_id, "Unknown"),
@@ -89,14 +82,14 @@ for i, (acc_id, acc_name, group_id) in enumerate(accounts_data):
         })
         total_assets += closing
 
-    # Liability Side
-    elif group_id in LIABILITY_GROUP_IDS:
+    # Liability Side (credit balances, shown positive)
+    elif group_nature.get(group_id) in LIABILITY_NATURES:
         liability_rows.append({
             "Account Name": acc_name,
             "Group": group_dict.get(group_id, "Unknown"),
-            "Amount": round(closing, 2)
+            "Amount": round(-closing, 2)
         })
-        total_liabilities += closing
+        total_liabilities -= closing
 
     progress.progress((i + 1) / len(accounts_data))
 
@@ -144,7 +137,8 @@ with col2:
 st.divider()
 diff = abs(total_assets - total_liabilities)
 
-if diff < 0.01:
+# Closings are whole paise, so compare exactly
+if to_paise(total_assets) == to_paise(total_liabilities):
     st.success("✅ Balance Sheet Matched (Assets = Liabilities)")
 else:
     st.error(f"❌ Not Balanced! Difference = {format_amt(diff)}")
@@ -1,387 +1,366 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import matplotlib.pyplot as plt
-from io import BytesIO
 
 from db_helpers import (
     get_active_financial_year,
     get_day_book_transactions,
     get_day_book_summary
 )
+from ui_helpers import (
+    lazy_section,
+    section_params,
+    memoized,
+    top_n,
+    top_n_with_others,
+    line_chart_png,
+    bar_chart_png,
+    pie_chart_png,
+    excel_bytes
+)
 
 st.title("📒 Day Book")
-with st.expander("### Change the date", expanded=False):
-    active_year = get_active_financial_year()
+active_year = get_active_financial_year()
+
+if not active_year:
+    st.warning("⚠️ No Active Financial Year Found.")
+    st.stop()
+
+financial_year_id = active_year["id"]
+
+# Date range changes rerun only this fragment, not the whole app
+@st.fragment
+def day_book_body():
+    with st.expander("### Change the date", expanded=False):
+        # ----------------------------------------
+        # Filters
+        # ----------------------------------------
+        col1, col2 = st.columns(2)
+
+        with col1:
+            start_date = st.date_input(
+                "📅 Start Date",
+                value=datetime.strptime(active_year["start_date"], "%Y-%m-%d")
+            )
 
-    if not active_year:
-        st.warning("⚠️ No Active Financial Year Found.")
-        st.stop()
+        with col2:
+            end_date = st.date_input(
+                "📅 End Date",
+                value=datetime.strptime(active_year["end_date"], "%Y-%m-%d")
+            )
 
-    financial_year_id = active_year["id"]
+        start_date = start_date.strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
 
     # ----------------------------------------
-    # Filters
+    # Summary
     # ----------------------------------------
-    col1, col2 = st.columns(2)
-
-    with col1:
-        start_date = st.date_input(
-            "📅 Start Date",
-            value=datetime.strptime(active_year["start_date"], "%Y-%m-%d")
-        )
-
-    with col2:
-        end_date = st.date_input(
-            "📅 End Date",
-            value=datetime.strptime(active_year["end_date"], "%Y-%m-%d")
-        )
-
-    start_date = start_date.strftime("%Y-%m-%d")
-    end_date = end_date.strftime("%Y-%m-%d")
-    
-# ----------------------------------------
-# Summary
-# ----------------------------------------
-summary = get_day_book_summary(financial_year_id, start_date, end_date)
-
-st.markdown("---")
-st.caption(f"From {start_date} to {end_date} (Financial Year: {active_year['label']} )")
-
-# Combine both into one info box to save vertical space on mobile
-amt = summary['total_amount']
-color_code = "#28a745" if amt >= 0 else "#dc3545"  # Professional Green/Red
-
-st.markdown(
-    f"""
-    <div style="
-        background-color: rgba(33, 37, 41, 0.05); 
-        padding: 15px; 
-        border-radius: 10px; 
-        border-left: 5px solid {color_code};
-        display: flex; 
-        justify-content: space-between; 
-        align-items: center;">
-        <div>
-            <div style="font-size: 0.8rem; color: gray;">Day Book</div>
-            <div style="font-size: 1.1rem; font-weight: bold;">{summary['total_entries']} Entries</div>
-        </div>
-        <div style="text-align: right;">
-            <div style="font-size: 0.8rem; color: gray;">Total Balance</div>
-            <div style="font-size: 1.2rem; font-weight: bold; color: {color_code};">
-                ₹ {amt:,.2f}
+    summary = get_day_book_summary(financial_year_id, start_date, end_date)
+
+    st.markdown("---")
+    st.caption(f"From {start_date} to {end_date} (Financial Year: {active_year['label']} )")
+
+    # Combine both into one info box to save vertical space on mobile
+    amt = summary['total_amount']
+    color_code = "#28a745" if amt >= 0 else "#dc3545"  # Professional Green/Red
+
+    st.markdown(
+        f"""
+        <div style="
+            background-color: rgba(33, 37, 41, 0.05); 
+            padding: 15px; 
+            border-radius: 10px; 
+            border-left: 5px solid {color_code};
+            display: flex; 
+            justify-content: space-between; 
+            align-items: center;">
+            <div>
+                <div style="font-size: 0.8rem; color: gray;">Day Book</div>
+                <div style="font-size: 1.1rem; font-weight: bold;">{summary['total_entries']} Entries</div>
+            </div>
+            <div style="text-align: right;">
+                <div style="font-size: 0.8rem; color: gray;">Total Balance</div>
+                <div style="font-size: 1.2rem; font-weight: bold; color: {color_code};">
+                    ₹ {amt:,.2f}
+                </div>
             </div>
         </div>
-    </div>
-    """, 
-    unsafe_allow_html=True
-)
+        """, 
+        unsafe_allow_html=True
+    )
 
-st.markdown("---")
-
-# ----------------------------------------
-# Fetch Transactions
-# ----------------------------------------
-rows = get_day_book_transactions(financial_year_id, start_date, end_date)
-
-data = []
-for r in rows:
-    txn_id = r[0]
-    txn_date = r[1]
-    narration = r[2]
-    amount = float(r[3])
-    from_id = r[4]
-    from_acc = r[5]
-    to_id = r[6]
-    to_acc = r[7]
-
-    data.append({
-        "Txn ID": txn_id,
-        "Date": txn_date,
-        "Narration": narration,
-        "From Account": from_acc,
-        "To Account": to_acc,
-        "Debit (₹)": amount,   # Debit = From Account
-        "Credit (₹)": amount,  # Credit = To Account
-        "Amount (₹)": amount
-    })
-
-df = pd.DataFrame(data)
-
-with st.expander("### 📌 Day Book Transactions",expanded=False):
-
-    if df.empty:
+    st.markdown("---")
+
+    if not summary["total_entries"]:
         st.warning("⚠️ No transactions found in selected date range.")
-        st.stop()
+        return
 
-    st.dataframe(df[["Txn ID", "Date", "Narration", "From Account", "To Account", "Amount (₹)"]], use_container_width=True)
+    report_params = section_params(financial_year_id, start_date, end_date)
 
-# ✅ Method 1 (Best): Date Heading + Sub Table (Perfect Day Book Look)
-with st.expander("### 📌 Day Book Transactions (Date Wise)", expanded=False):
+    # ----------------------------------------
+    # Fetch Transactions (first open section builds the frame)
+    # ----------------------------------------
+    def build_frame():
+        rows = get_day_book_transactions(financial_year_id, start_date, end_date)
 
-    df = pd.DataFrame(data)
+        df = pd.DataFrame(rows, columns=[
+            "Txn ID", "Date", "Narration", "Amount (₹)",
+            "From ID", "From Account", "To ID", "To Account"
+        ])
 
-    if df.empty:
-        st.warning("⚠️ No transactions found in selected date range.")
-        st.stop()
+        df["Debit (₹)"] = df["Amount (₹)"]   # Debit = From Account
+        df["Credit (₹)"] = df["Amount (₹)"]  # Credit = To Account
+
+        return df[["Txn ID", "Date", "Narration", "From Account", "To Account", "Debit (₹)", "Credit (₹)", "Amount (₹)"]]
+
+    day_book_frame = lambda: memoized("day_book_frame", report_params, build_frame)
 
-    # Ensure proper date type
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    with lazy_section("📌 Day Book Transactions", "day_book_rows") as opened:
+        if opened:
+            df = day_book_frame()
 
-    # Sort properly
-    df = df.sort_values(["Date", "Txn ID"])
+            st.dataframe(df[["Txn ID", "Date", "Narration", "From Account", "To Account", "Amount (₹)"]], use_container_width=True)
 
-    # Group Date Wise
-    for date_val, grp in df.groupby(df["Date"].dt.date):
+    # ✅ Method 1 (Best): Date Heading + Sub Table (Perfect Day Book Look)
+    with lazy_section("📌 Day Book Transactions (Date Wise)", "day_book_date_wise") as opened:
+        if opened:
+            df = day_book_frame()
 
-        total_debit = grp["Debit (₹)"].sum()
-        total_credit = grp["Credit (₹)"].sum()
-        total_amount = grp["Amount (₹)"].sum()
+            # Rows arrive ordered by date, id
+            for date_val, grp in df.groupby("Date", sort=True):
 
-        # Date Header
-        st.markdown(f"""
-        ## 📅 {date_val}
+                total_debit = grp["Debit (₹)"].sum()
+                total_credit = grp["Credit (₹)"].sum()
+                total_amount = grp["Amount (₹)"].sum()
 
-        ✅ **Total Debit:** ₹ {total_debit:,.2f} &nbsp;&nbsp;&nbsp;
-        ✅ **Total Credit:** ₹ {total_credit:,.2f} &nbsp;&nbsp;&nbsp;
-        💰 **Total Amount:** ₹ {total_amount:,.2f}
-        """)
+                # Date Header
+                st.markdown(f"""
+                ## 📅 {date_val}
 
-        # Transactions Table for that date
-        st.dataframe(
-            grp[["Txn ID", "Narration", "From Account", "To Account", "Amount (₹)"]],
-            use_container_width=True
-        )
+                ✅ **Total Debit:** ₹ {total_debit:,.2f} &nbsp;&nbsp;&nbsp;
+                ✅ **Total Credit:** ₹ {total_credit:,.2f} &nbsp;&nbsp;&nbsp;
+                💰 **Total Amount:** ₹ {total_amount:,.2f}
+                """)
 
-        st.markdown("---")
+                # Transactions Table for that date
+                st.dataframe(
+                    grp[["Txn ID", "Narration", "From Account", "To Account", "Amount (₹)"]],
+                    use_container_width=True
+                )
 
-# ✅ Method 2: Single Table but Date only on First Row (No Repeat)
-with st.expander("### 📌 Day Book Transactions (Date Wise)", expanded=False):
-    df = pd.DataFrame(data)
+                st.markdown("---")
 
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.sort_values(["Date", "Txn ID"])
+    # ✅ Method 2: Single Table but Date only on First Row (No Repeat)
+    with lazy_section("📌 Day Book Transactions (Date Wise, Single Table)", "day_book_date_table") as opened:
+        if opened:
+            df = day_book_frame()
 
-    df["Date_Display"] = df["Date"].dt.strftime("%Y-%m-%d")
+            df_dated = df.assign(Date_Display=df["Date"].where(~df["Date"].duplicated(), ""))
 
-    # remove repeated date
-    df.loc[df["Date_Display"].duplicated(), "Date_Display"] = ""
+            st.dataframe(
+                df_dated[["Txn ID", "Date_Display", "Narration", "From Account", "To Account", "Amount (₹)"]],
+                use_container_width=True
+            )
 
-    st.dataframe(
-        df[["Txn ID", "Date_Display", "Narration", "From Account", "To Account", "Amount (₹)"]],
-        use_container_width=True
+    # ----------------------------------------
+    # Date wise Daily Summary
+    # ----------------------------------------
+    daily_totals = lambda df: (
+        df.groupby("Date")
+        .agg(Total_Transactions=("Txn ID", "count"), Total_Amount=("Amount (₹)", "sum"))
+        .reset_index()
+        .rename(columns={"Date": "Txn Date"})
     )
 
+    st.markdown("---")
+    with lazy_section("📅 Daily Summary (Date Wise Totals)", "day_book_daily") as opened:
+        if opened:
+            df = day_book_frame()
 
-# ----------------------------------------
-# Date wise Daily Summary
-# ----------------------------------------
-st.markdown("---")
-with st.expander("## 📅 Daily Summary (Date Wise Totals)", expanded=False):
+            daily_summary = memoized("day_book_daily", report_params, daily_totals, df)
 
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+            st.dataframe(daily_summary, use_container_width=True)
 
-    daily_summary = df.groupby(df["Date"].dt.date).agg(
-        Total_Transactions=("Txn ID", "count"),
-        Total_Amount=("Amount (₹)", "sum")
-    ).reset_index()
+    # ----------------------------------------
+    # Daily Chart
+    # ----------------------------------------
+    with lazy_section("📊 Daily Total Amount Trend", "day_book_daily_chart") as opened:
+        if opened:
+            df = day_book_frame()
 
-    daily_summary.rename(columns={"Date": "Txn Date"}, inplace=True)
+            daily_summary = memoized("day_book_daily", report_params, daily_totals, df)
 
-    st.dataframe(daily_summary, use_container_width=True)
+            st.image(memoized(
+                "day_book_daily_chart", report_params,
+                lambda summary: line_chart_png(
+                    summary.assign(**{"Txn Date": summary["Txn Date"].astype("datetime64[ns]")}),
+                    "Txn Date", ["Total_Amount"], "Day Book - Daily Total Amount", "Date"
+                ),
+                daily_summary
+            ))
 
-# ----------------------------------------
-# Daily Chart
-# ----------------------------------------
-with st.expander("### 📊 Daily Total Amount Trend", expanded=False):
+    # ----------------------------------------
+    # Top 10 Debit Accounts (Payment Gone)
+    # ----------------------------------------
+    st.markdown("---")
 
-    fig1, ax1 = plt.subplots(figsize=(10, 5))
-    ax1.plot(daily_summary["Txn Date"], daily_summary["Total_Amount"], marker="o")
+    with lazy_section("🔻 Top 10 Debit Accounts (Most Payments Gone)", "day_book_top_debit") as opened:
+        if opened:
+            df = day_book_frame()
 
-    ax1.set_xlabel("Date")
-    ax1.set_ylabel("Amount (₹)")
-    ax1.set_title("Day Book - Daily Total Amount")
-    ax1.grid(True)
-
-    plt.xticks(rotation=45)
-    st.pyplot(fig1)
+            top_debit = memoized("day_book_top_debit", report_params, top_n, df, "From Account", "Amount (₹)")
 
-# ----------------------------------------
-# Top 10 Debit Accounts (Payment Gone)
-# ----------------------------------------
-st.markdown("---")
+            st.dataframe(top_debit, use_container_width=True)
 
-with st.expander("## 🔻 Top 10 Debit Accounts (Most Payments Gone)", expanded=False):
+            st.image(memoized(
+                "day_book_top_debit_chart", report_params,
+                bar_chart_png, top_debit, "From Account", "Amount (₹)", "Top 10 Debit Accounts (Payments)"
+            ))
 
-    top_debit = df.groupby("From Account")["Amount (₹)"].sum().reset_index()
-    top_debit = top_debit.sort_values("Amount (₹)", ascending=False).head(10)
-
-    st.dataframe(top_debit, use_container_width=True)
-
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    ax2.bar(top_debit["From Account"], top_debit["Amount (₹)"])
-    ax2.set_title("Top 10 Debit Accounts (Payments)")
-    ax2.set_xlabel("Account")
-    ax2.set_ylabel("Amount (₹)")
-    plt.xticks(rotation=45)
-    st.pyplot(fig2)
-
-# ----------------------------------------
-# Top 10 Credit Accounts (Receipt Came)
-# ----------------------------------------
-st.markdown("---")
-with st.expander("## 🔺 Top 10 Credit Accounts (Most Receipts Came)", expanded=False):
-
-    top_credit = df.groupby("To Account")["Amount (₹)"].sum().reset_index()
-    top_credit = top_credit.sort_values("Amount (₹)", ascending=False).head(10)
-
-    st.dataframe(top_credit, use_container_width=True)
-
-    fig3, ax3 = plt.subplots(figsize=(10, 5))
-    ax3.bar(top_credit["To Account"], top_credit["Amount (₹)"])
-    ax3.set_title("Top 10 Credit Accounts (Receipts)")
-    ax3.set_xlabel("Account")
-    ax3.set_ylabel("Amount (₹)")
-    plt.xticks(rotation=45)
-    st.pyplot(fig3)
-
-# ----------------------------------------
-# Professional Pie Chart (Top 5 + Others Combine)
-# ----------------------------------------
-st.markdown("---")
-with st.expander("## 🥧 Top 5 Accounts Pie Chart (Others Combined)",expanded=False):
-
-    all_accounts_flow = df.groupby("From Account")["Amount (₹)"].sum().reset_index()
-    all_accounts_flow = all_accounts_flow.sort_values("Amount (₹)", ascending=False)
-
-    top5 = all_accounts_flow.head(5)
-    others_sum = all_accounts_flow.iloc[5:]["Amount (₹)"].sum()
-
-    pie_labels = list(top5["From Account"])
-    pie_values = list(top5["Amount (₹)"])
-
-    if others_sum > 0:
-        pie_labels.append("Others")
-        pie_values.append(others_sum)
-
-    fig4, ax4 = plt.subplots(figsize=(7, 7))
-    ax4.pie(pie_values, labels=pie_labels, autopct="%1.1f%%", startangle=90)
-    ax4.set_title("Top 5 Debit Accounts (Others Combined)")
-    st.pyplot(fig4)
-
-# ----------------------------------------
-# Export Options
-# ----------------------------------------
-st.markdown("---")
-with st.expander("### 💾 Export Options", expanded=False):
-    colA, colB, colC = st.columns(3)
-
-    # ---------- CSV ----------
-    with colA:
-        st.markdown("### 📄 CSV Export")
-
-        csv_data = df.to_csv(index=False).encode("utf-8")
-
-        st.download_button(
-            "⬇️ Download CSV",
-            data=csv_data,
-            file_name=f"day_book_{active_year['label']}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-
-    # ---------- Excel ----------
-    with colB:
-        st.markdown("### 📗 Excel Export")
-
-        try:
-            def to_excel_v2(df_main, df_daily, df_debit, df_credit):
-                import io
-                import pandas as pd
-
-                output_buffer = io.BytesIO()
-                with pd.ExcelWriter(output_buffer, engine="openpyxl") as writer:
-                    df_main.to_excel(writer, sheet_name="Day Book", index=False)
-                    df_daily.to_excel(writer, sheet_name="Daily Summary", index=False)
-                    df_debit.to_excel(writer, sheet_name="Top Debit", index=False)
-                    df_credit.to_excel(writer, sheet_name="Top Credit", index=False)
-
-                return output_buffer.getvalue()
-
-            excel_data = to_excel_v2(df, daily_summary, top_debit, top_credit)
-
-            st.download_button(
-                "⬇️ Download Excel",
-                data=excel_data,
-                file_name=f"day_book_{active_year['label']}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+    # ----------------------------------------
+    # Top 10 Credit Accounts (Receipt Came)
+    # ----------------------------------------
+    st.markdown("---")
+    with lazy_section("🔺 Top 10 Credit Accounts (Most Receipts Came)", "day_book_top_credit") as opened:
+        if opened:
+            df = day_book_frame()
 
-        except Exception as e:
-            st.error(f"❌ Excel export failed: {e}")
-
-    # ---------- Print HTML ----------
-    with colC:
-        st.markdown("### 🖨 Print / PDF")
-
-        print_html = f"""
-        <html>
-        <head>
-            <title>Day Book Report</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    padding: 20px;
-                }}
-                h2 {{
-                    text-align: center;
-                }}
-                .summary {{
-                    margin-bottom: 15px;
-                    padding: 10px;
-                    border: 1px solid #ccc;
-                    border-radius: 6px;
-                    font-size: 14px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-top: 10px;
-                    font-size: 13px;
-                }}
-                th, td {{
-                    border: 1px solid #ccc;
-                    padding: 6px;
-                    text-align: left;
-                }}
-                th {{
-                    background: #f2f2f2;
-                }}
-            </style>
-        </head>
-        <body>
-            <h2>Day Book Report</h2>
-
-            <div class="summary">
-                <b>Financial Year:</b> {active_year['label']}<br>
-                <b>From:</b> {start_date} &nbsp;&nbsp; <b>To:</b> {end_date}<br><br>
-
-                <b>Total Entries:</b> {summary['total_entries']}<br>
-                <b>Total Amount:</b> ₹ {summary['total_amount']:,.2f}<br>
-            </div>
+            top_credit = memoized("day_book_top_credit", report_params, top_n, df, "To Account", "Amount (₹)")
+
+            st.dataframe(top_credit, use_container_width=True)
 
-            {df[["Txn ID","Date","Narration","From Account","To Account","Amount (₹)"]].to_html(index=False)}
-        </body>
-        </html>
-        """
+            st.image(memoized(
+                "day_book_top_credit_chart", report_params,
+                bar_chart_png, top_credit, "To Account", "Amount (₹)", "Top 10 Credit Accounts (Receipts)"
+            ))
+
+    # ----------------------------------------
+    # Professional Pie Chart (Top 5 + Others Combine)
+    # ----------------------------------------
+    st.markdown("---")
+    with lazy_section("🥧 Top 5 Accounts Pie Chart (Others Combined)", "day_book_pie") as opened:
+        if opened:
+            df = day_book_frame()
+
+            pie_labels, pie_values = memoized(
+                "day_book_pie_slices", report_params,
+                top_n_with_others, df, "From Account", "Amount (₹)"
+            )
 
-        st.download_button(
-            "🖨 Download Print Report (HTML)",
-            data=print_html.encode("utf-8"),
-            file_name=f"day_book_{start_date}_{end_date}.html",
-            mime="text/html",
-            use_container_width=True
-        )
+            st.image(memoized(
+                "day_book_pie_chart", report_params,
+                pie_chart_png, pie_labels, pie_values, "Top 5 Debit Accounts (Others Combined)"
+            ))
 
-        st.info("✅ Download HTML → Open in browser → CTRL+P → Save as PDF / Print")
+    # ----------------------------------------
+    # Export Options
+    # ----------------------------------------
+    st.markdown("---")
+    with lazy_section("💾 Export Options", "day_book_export") as opened:
+        if opened:
+            df = day_book_frame()
+
+            colA, colB, colC = st.columns(3)
+
+            # ---------- CSV ----------
+            with colA:
+                st.markdown("### 📄 CSV Export")
+
+                st.download_button(
+                    "⬇️ Download CSV",
+                    data=memoized("day_book_csv", report_params, lambda df: df.to_csv(index=False).encode("utf-8"), df),
+                    file_name=f"day_book_{active_year['label']}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+
+            # ---------- Excel ----------
+            with colB:
+                st.markdown("### 📗 Excel Export")
+
+                try:
+                    excel_data = memoized("day_book_excel", report_params, lambda: excel_bytes({
+                        "Day Book": df,
+                        "Daily Summary": memoized("day_book_daily", report_params, daily_totals, df),
+                        "Top Debit": memoized("day_book_top_debit", report_params, top_n, df, "From Account", "Amount (₹)"),
+                        "Top Credit": memoized("day_book_top_credit", report_params, top_n, df, "To Account", "Amount (₹)")
+                    }))
+
+                    st.download_button(
+                        "⬇️ Download Excel",
+                        data=excel_data,
+                        file_name=f"day_book_{active_year['label']}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+
+                except Exception as e:
+                    st.error(f"❌ Excel export failed: {e}")
+
+            # ---------- Print HTML ----------
+            with colC:
+                st.markdown("### 🖨 Print / PDF")
+
+                print_html = f"""
+                <html>
+                <head>
+                    <title>Day Book Report</title>
+                    <style>
+                        body {{
+                            font-family: Arial, sans-serif;
+                            padding: 20px;
+                        }}
+                        h2 {{
+                            text-align: center;
+                        }}
+                        .summary {{
+                            margin-bottom: 15px;
+                            padding: 10px;
+                            border: 1px solid #ccc;
+                            border-radius: 6px;
+                            font-size: 14px;
+                        }}
+                        table {{
+                            width: 100%;
+                            border-collapse: collapse;
+                            margin-top: 10px;
+                            font-size: 13px;
+                        }}
+                        th, td {{
+                            border: 1px solid #ccc;
+                            padding: 6px;
+                            text-align: left;
+                        }}
+                        th {{
+                            background: #f2f2f2;
+                        }}
+                    </style>
+                </head>
+                <body>
+                    <h2>Day Book Report</h2>
+
+                    <div class="summary">
+                        <b>Financial Year:</b> {active_year['label']}<br>
+                        <b>From:</b> {start_date} &nbsp;&nbsp; <b>To:</b> {end_date}<br><br>
+
+                        <b>Total Entries:</b> {summary['total_entries']}<br>
+                        <b>Total Amount:</b> ₹ {summary['total_amount']:,.2f}<br>
+                    </div>
+
+                    {df[["Txn ID","Date","Narration","From Account","To Account","Amount (₹)"]].to_html(index=False)}
+                </body>
+                </html>
+                """
+
+                st.download_button(
+                    "🖨 Download Print Report (HTML)",
+                    data=print_html.encode("utf-8"),
+                    file_name=f"day_book_{start_date}_{end_date}.html",
+                    mime="text/html",
+                    use_container_width=True
+                )
+
+                st.info("✅ Download HTML → Open in browser → CTRL+P → Save as PDF / Print")
+
+
+day_book_body()
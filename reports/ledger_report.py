@@ -9,7 +9,10 @@ from db_helpers import (
     get_all_accounts,
     get_opening_balance,
     get_account_ledger,
-    calculate_running_ledger
+    get_account_ledger_page,
+    get_account_ledger_totals,
+    calculate_running_ledger,
+    format_dr_cr
 )
 
 st.title("📒 Ledger Report")
@@ -28,218 +31,290 @@ fy_end = datetime.strptime(active_year["end_date"], "%Y-%m-%d").date()
 
 st.success(f"🟢 Active FY: {active_year['label']}")
 
-with st.expander("ℹ️ Input Details"):
-    st.write(f"**From {fy_start.strftime('%d-%m-%Y')} to {fy_end.strftime('%d-%m-%Y')}** is the active financial year period.")
-    
-    # -----------------------------
-    # 2. Load Accounts
-    # -----------------------------
-    accounts = get_all_accounts()
-
-    acc_dict = {f"{a['name']} (ID:{a['id']})": a["id"] for a in accounts}
-
-    selected_acc = st.selectbox("Select Account", list(acc_dict.keys()))
-    account_id = acc_dict[selected_acc]
-
-    # Extract Account Name (for report titles)
-    selected_acc_name = selected_acc.split(" (ID:")[0].strip()
-
-    # -----------------------------
-    # 3. Date Filter (Inside FY)
-    # -----------------------------
-    col1, col2 = st.columns(2)
-
-    with col1:
-        start_date = st.date_input("From Date", value=fy_start, min_value=fy_start, max_value=fy_end)
+# Account / date changes rerun only this fragment, not the whole app
+@st.fragment
+def ledger_body():
+    with st.expander("ℹ️ Input Details"):
+        st.write(f"**From {fy_start.strftime('%d-%m-%Y')} to {fy_end.strftime('%d-%m-%Y')}** is the active financial year period.")
 
-    with col2:
-        end_date = st.date_input("To Date", value=fy_end, min_value=fy_start, max_value=fy_end)
+        # -----------------------------
+        # 2. Load Accounts
+        # -----------------------------
+        accounts = get_all_accounts()
 
-    if start_date > end_date:
-        st.warning("⚠️ Start date cannot be after end date.")
-        st.stop()
+        acc_dict = {f"{a['name']} (ID:{a['id']})": a["id"] for a in accounts}
 
-    # -----------------------------
-    # 4. Opening Balance
-    # -----------------------------
-    opening = get_opening_balance(account_id, financial_year_id)
-
-    if opening >= 0:
-        opening_text = f"{opening:.2f} Dr"
-    else:
-        opening_text = f"{abs(opening):.2f} Cr"
-
-    st.info(f"Opening Balance: **{opening_text}**")
-
-# -----------------------------
-# 5. Fetch Ledger
-# -----------------------------
-ledger_rows = get_account_ledger(
-    account_id,
-    financial_year_id,
-    start_date.strftime("%Y-%m-%d"),
-    end_date.strftime("%Y-%m-%d")
-)
+        selected_acc = st.selectbox("Select Account", list(acc_dict.keys()))
+        account_id = acc_dict[selected_acc]
 
-ledger_data, total_dr, total_cr, closing = calculate_running_ledger(ledger_rows, opening)
+        # Extract Account Name (for report titles)
+        selected_acc_name = selected_acc.split(" (ID:")[0].strip()
 
-df = pd.DataFrame(ledger_data)
+        # -----------------------------
+        # 3. Date Filter (Inside FY)
+        # -----------------------------
+        col1, col2 = st.columns(2)
 
-st.subheader(f"📌 Ledger Entries: {selected_acc_name}")
+        with col1:
+            start_date = st.date_input("From Date", value=fy_start, min_value=fy_start, max_value=fy_end)
 
-if df.empty:
-    st.warning("No transactions found.")
-else:
-    st.dataframe(df, use_container_width=True)
+        with col2:
+            end_date = st.date_input("To Date", value=fy_end, min_value=fy_start, max_value=fy_end)
 
-# -----------------------------
-# 6. Summary
-# -----------------------------
-st.subheader("📊 Summary")
+        if start_date > end_date:
+            st.warning("⚠️ Start date cannot be after end date.")
+            return
 
-if closing >= 0:
-    closing_text = f"{closing:.2f} Dr"
-else:
-    closing_text = f"{abs(closing):.2f} Cr"
+        # -----------------------------
+        # 4. Opening Balance
+        # -----------------------------
+        opening = get_opening_balance(account_id, financial_year_id)
 
-c1, c2, c3 = st.columns(3)
-c1.metric("Total Debit", f"{total_dr:.2f}")
-c2.metric("Total Credit", f"{total_cr:.2f}")
-c3.metric("Closing Balance", closing_text)
+        if opening >= 0:
+            opening_text = f"{opening:.2f} Dr"
+        else:
+            opening_text = f"{abs(opening):.2f} Cr"
 
-# -----------------------------
-# 7. REPORT ACTIONS (PRINT / EXCEL / WHATSAPP)
-# -----------------------------
-st.divider()
-st.subheader("🧾 Report Actions")
-
-with st.expander("ℹ️ Printing & Sharing Options"):
-    # Prepare report text summary
-    ledger_summary = f"""
-    📒 Ledger Report
-    Account: {selected_acc_name}
-    Financial Year: {active_year['label']}
-    From: {start_date.strftime('%d-%m-%Y')}
-    To: {end_date.strftime('%d-%m-%Y')}
-
-    Opening Balance: {opening_text}
-    Total Debit: {total_dr:.2f}
-    Total Credit: {total_cr:.2f}
-    Closing Balance: {closing_text}
-    """.strip()
-
-    colA, colB, colC = st.columns([1, 1, 2])
+        st.info(f"Opening Balance: **{opening_text}**")
 
     # -----------------------------
-    # EXCEL DOWNLOAD
+    # 5. Fetch Ledger (one page at a time)
     # -----------------------------
-    with colA:
-        if not df.empty:
-            excel_df = df.copy()
-            excel_bytes = excel_df.to_csv(index=False).encode("utf-8")
-
-            st.download_button(
-                "⬇️ Download Excel (CSV)",
-                data=excel_bytes,
-                file_name=f"Ledger_{selected_acc_name}_{start_date}_{end_date}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-        else:
-            st.download_button(
-                "⬇️ Download Excel (CSV)",
-                data="",
-                file_name="ledger.csv",
-                mime="text/csv",
-                disabled=True,
-                use_container_width=True
-            )
+    # Keyset cursor: None (first page) or ("after" / "before", (txn_date, id, side)).
+    # Reset whenever the account or the date range changes.
+    ledger_filter = (account_id, str(start_date), str(end_date))
+
+    if st.session_state.get("ledger_filter") != ledger_filter:
+        st.session_state.ledger_filter = ledger_filter
+        st.session_state.ledger_cursor = None
+
+    def go_to(cursor):
+        st.session_state.ledger_cursor = cursor
+
+    st.subheader(f"📌 Ledger Entries: {selected_acc_name}")
+
+    p1, p2, p3 = st.columns([1, 2, 1])
+    page_size = p1.selectbox("Rows / page", [50, 100, 250, 500], index=1, on_change=go_to, args=(None,))
+    jump_date = p2.date_input("Jump to date", value=start_date, min_value=start_date, max_value=end_date)
+
+    p3.write("")
+    p3.button(
+        "📅 Go", use_container_width=True,
+        on_click=go_to, args=(("after", (str(jump_date), 0, 0)),)
+    )
+
+    cursor = st.session_state.ledger_cursor
+    page = get_account_ledger_page(
+        account_id,
+        financial_year_id,
+        start_date.strftime("%Y-%m-%d"),
+        end_date.strftime("%Y-%m-%d"),
+        page_size,
+        after=cursor[1] if cursor and cursor[0] == "after" else None,
+        before=cursor[1] if cursor and cursor[0] == "before" else None
+    )
+
+    df = pd.DataFrame(
+        [r[:6] for r in page["rows"]],
+        columns=["Date", "Particular", "Debit", "Credit", "Note", "Balance"]
+    )
+
+    if df.empty:
+        st.warning("No transactions found.")
+    else:
+        # Balance is numeric (+ Dr / - Cr); formatted only for display
+        df["Balance"] = format_dr_cr(df["Balance"])
+        st.dataframe(df, use_container_width=True)
+
+        first_key = page["rows"][0][0], page["rows"][0][6], page["rows"][0][7]
+        last_key = page["rows"][-1][0], page["rows"][-1][6], page["rows"][-1][7]
+
+        n1, n2, n3 = st.columns([1, 2, 1])
+        n1.button(
+            "⬅️ Previous", use_container_width=True, disabled=not page["has_prev"],
+            on_click=go_to, args=(("before", first_key),)
+        )
+        n2.caption(f"Showing {len(df)} entries: {first_key[0]} → {last_key[0]}")
+        n3.button(
+            "Next ➡️", use_container_width=True, disabled=not page["has_next"],
+            on_click=go_to, args=(("after", last_key),)
+        )
 
     # -----------------------------
-    # PRINT BUTTON
+    # 6. Summary (aggregate query, not the page on screen)
     # -----------------------------
-    # -----------------------------
-    # PRINT BUTTON (FIXED - WORKING)
-    # -----------------------------
-    with colB:
-        if not df.empty:
-            print_html = f"""
-            <html>
-            <head>
-                <title>Ledger Report</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        padding: 20px;
-                    }}
-                    h2 {{
-                        text-align: center;
-                    }}
-                    .summary {{
-                        margin-bottom: 15px;
-                        padding: 10px;
-                        border: 1px solid #ccc;
-                        border-radius: 6px;
-                    }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-top: 10px;
-                    }}
-                    th, td {{
-                        border: 1px solid #ccc;
-                        padding: 8px;
-                        text-align: left;
-                    }}
-                    th {{
-                        background: #f2f2f2;
-                    }}
-                </style>
-            </head>
-            <body>
-                <h2>Ledger Report: {selected_acc_name}</h2>
-                <div class="summary">
-                    <b>Account:</b> {selected_acc_name}<br>
-                    <b>Financial Year:</b> {active_year['label']}<br>
-                    <b>From:</b> {start_date.strftime('%d-%m-%Y')} &nbsp;&nbsp;
-                    <b>To:</b> {end_date.strftime('%d-%m-%Y')}<br><br>
-
-                    <b>Opening Balance:</b> {opening_text}<br>
-                    <b>Total Debit:</b> {total_dr:.2f}<br>
-                    <b>Total Credit:</b> {total_cr:.2f}<br>
-                    <b>Closing Balance:</b> {closing_text}<br>
-                </div>
-
-                {df.to_html(index=False)}
-            </body>
-            </html>
-            """
-
-            st.download_button(
-                "🖨 Download Print Ledger (HTML)",
-                data=print_html.encode("utf-8"),
-                file_name=f"Ledger_{selected_acc_name}_{start_date}_{end_date}.html",
-                mime="text/html",
-                use_container_width=True
-            )
+    st.subheader("📊 Summary")
+
+    totals = get_account_ledger_totals(
+        account_id,
+        financial_year_id,
+        start_date.strftime("%Y-%m-%d"),
+        end_date.strftime("%Y-%m-%d")
+    )
+    total_dr = totals["total_dr"]
+    total_cr = totals["total_cr"]
+    closing = totals["closing"]
+
+    if closing >= 0:
+        closing_text = f"{closing:.2f} Dr"
+    else:
+        closing_text = f"{abs(closing):.2f} Cr"
 
-            st.info("✅ Download HTML file → Open it in browser → Press CTRL+P to Print")
-        else:
-            st.button("🖨 Download Print Ledger (HTML)", use_container_width=True, disabled=True)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Total Debit", f"{total_dr:.2f}")
+    c2.metric("Total Credit", f"{total_cr:.2f}")
+    c3.metric("Closing Balance", closing_text)
 
     # -----------------------------
-    # WHATSAPP MESSAGE
+    # 7. REPORT ACTIONS (PRINT / EXCEL / WHATSAPP)
     # -----------------------------
-    with colC:
-        whatsapp_no = st.text_input("📲 WhatsApp Number (with country code)", placeholder="91XXXXXXXXXX")
-
-        if st.button("🟢 Send Summary to WhatsApp", use_container_width=True):
-            if not whatsapp_no.strip():
-                st.error("❌ Please enter WhatsApp number.")
-                st.stop()
-
-            msg = urllib.parse.quote(ledger_summary)
-            wa_url = f"https://wa.me/{whatsapp_no.strip()}?text={msg}"
-
-            st.success("✅ WhatsApp ready. Click below:")
-            st.markdown(f"### 👉 [Open WhatsApp Chat]({wa_url})", unsafe_allow_html=True)
+    st.divider()
+    st.subheader("🧾 Report Actions")
+
+    with st.expander("ℹ️ Printing & Sharing Options"):
+        # Prepare report text summary
+        ledger_summary = f"""
+        📒 Ledger Report
+        Account: {selected_acc_name}
+        Financial Year: {active_year['label']}
+        From: {start_date.strftime('%d-%m-%Y')}
+        To: {end_date.strftime('%d-%m-%Y')}
+
+        Opening Balance: {opening_text}
+        Total Debit: {total_dr:.2f}
+        Total Credit: {total_cr:.2f}
+        Closing Balance: {closing_text}
+        """.strip()
+
+        colA, colB, colC = st.columns([1, 1, 2])
+
+        # The full ledger is only read when an export is asked for
+        df = pd.DataFrame()
+
+        if totals["lines"] and st.toggle("📦 Prepare Excel / Print files", key="ledger_prepare_export"):
+            df, _, _, _ = calculate_running_ledger(
+                get_account_ledger(
+                    account_id,
+                    financial_year_id,
+                    start_date.strftime("%Y-%m-%d"),
+                    end_date.strftime("%Y-%m-%d")
+                ),
+                opening
+            )
+            df["Balance"] = format_dr_cr(df["Balance"])
+
+        # -----------------------------
+        # EXCEL DOWNLOAD
+        # -----------------------------
+        with colA:
+            if not df.empty:
+                excel_df = df.copy()
+                excel_bytes = excel_df.to_csv(index=False).encode("utf-8")
+
+                st.download_button(
+                    "⬇️ Download Excel (CSV)",
+                    data=excel_bytes,
+                    file_name=f"Ledger_{selected_acc_name}_{start_date}_{end_date}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            else:
+                st.download_button(
+                    "⬇️ Download Excel (CSV)",
+                    data="",
+                    file_name="ledger.csv",
+                    mime="text/csv",
+                    disabled=True,
+                    use_container_width=True
+                )
+
+        # -----------------------------
+        # PRINT BUTTON
+        # -----------------------------
+        # -----------------------------
+        # PRINT BUTTON (FIXED - WORKING)
+        # -----------------------------
+        with colB:
+            if not df.empty:
+                print_html = f"""
+                <html>
+                <head>
+                    <title>Ledger Report</title>
+                    <style>
+                        body {{
+                            font-family: Arial, sans-serif;
+                            padding: 20px;
+                        }}
+                        h2 {{
+                            text-align: center;
+                        }}
+                        .summary {{
+                            margin-bottom: 15px;
+                            padding: 10px;
+                            border: 1px solid #ccc;
+                            border-radius: 6px;
+                        }}
+                        table {{
+                            width: 100%;
+                            border-collapse: collapse;
+                            margin-top: 10px;
+                        }}
+                        th, td {{
+                            border: 1px solid #ccc;
+                            padding: 8px;
+                            text-align: left;
+                        }}
+                        th {{
+                            background: #f2f2f2;
+                        }}
+                    </style>
+                </head>
+                <body>
+                    <h2>Ledger Report: {selected_acc_name}</h2>
+                    <div class="summary">
+                        <b>Account:</b> {selected_acc_name}<br>
+                        <b>Financial Year:</b> {active_year['label']}<br>
+                        <b>From:</b> {start_date.strftime('%d-%m-%Y')} &nbsp;&nbsp;
+                        <b>To:</b> {end_date.strftime('%d-%m-%Y')}<br><br>
+
+                        <b>Opening Balance:</b> {opening_text}<br>
+                        <b>Total Debit:</b> {total_dr:.2f}<br>
+                        <b>Total Credit:</b> {total_cr:.2f}<br>
+                        <b>Closing Balance:</b> {closing_text}<br>
+                    </div>
+
+                    {df.to_html(index=False)}
+                </body>
+                </html>
+                """
+
+                st.download_button(
+                    "🖨 Download Print Ledger (HTML)",
+                    data=print_html.encode("utf-8"),
+                    file_name=f"Ledger_{selected_acc_name}_{start_date}_{end_date}.html",
+                    mime="text/html",
+                    use_container_width=True
+                )
+
+                st.info("✅ Download HTML file → Open it in browser → Press CTRL+P to Print")
+            else:
+                st.button("🖨 Download Print Ledger (HTML)", use_container_width=True, disabled=True)
+
+        # -----------------------------
+        # WHATSAPP MESSAGE
+        # -----------------------------
+        with colC:
+            whatsapp_no = st.text_input("📲 WhatsApp Number (with country code)", placeholder="91XXXXXXXXXX")
+
+            if st.button("🟢 Send Summary to WhatsApp", use_container_width=True):
+                if not whatsapp_no.strip():
+                    st.error("❌ Please enter WhatsApp number.")
+                else:
+                    msg = urllib.parse.quote(ledger_summary)
+                    wa_url = f"https://wa.me/{whatsapp_no.strip()}?text={msg}"
+
+                    st.success("✅ WhatsApp ready. Click below:")
+                    st.markdown(f"### 👉 [Open WhatsApp Chat]({wa_url})", unsafe_allow_html=True)
+
+
+ledger_body()
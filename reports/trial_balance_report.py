@@ -6,10 +6,7 @@ import urllib.parse
 
 from db_helpers import (
     get_active_financial_year,
-    get_all_accounts,
-    get_opening_balance,
-    get_account_ledger,
-    calculate_running_ledger
+    get_trial_balance
 )
 
 st.set_page_config(page_title="Trial Balance Report", layout="wide")
@@ -31,69 +28,36 @@ fy_end = datetime.strptime(active_year["end_date"], "%Y-%m-%d").date()
 st.success(f"🟢 Active FY: {active_year['label']}")
 
 # -----------------------------
-# 2. Load Accounts
+# 2. Trial Balance (one grouped query)
 # -----------------------------
-accounts = get_all_accounts()
-if not accounts:
+trial = get_trial_balance(
+    financial_year_id,
+    fy_start.strftime("%Y-%m-%d"),
+    fy_end.strftime("%Y-%m-%d")
+)
+
+if not trial["rows"]:
     st.warning("⚠️ No accounts found.")
     st.stop()
 
-# -----------------------------
-# 3. Trial Balance Calculation
-# -----------------------------
-trial_rows = []
-total_debit = 0.0
-total_credit = 0.0
-
-progress = st.progress(0)
-status_text = st.empty()
-
-for i, acc in enumerate(accounts):
-    status_text.info(f"⏳ Calculating: {acc['name']}")
-
-    opening = get_opening_balance(acc["id"], financial_year_id)
-
-    ledger_rows = get_account_ledger(
-        acc["id"],
-        financial_year_id,
-        fy_start.strftime("%Y-%m-%d"),
-        fy_end.strftime("%Y-%m-%d")
-    )
+total_debit = trial["total_debit"]
+total_credit = trial["total_credit"]
 
-    ledger_data, total_dr, total_cr, closing = calculate_running_ledger(ledger_rows, opening)
-
-    dr_amt = 0.0
-    cr_amt = 0.0
-
-    if closing >= 0:
-        dr_amt = abs(closing)
-    else:
-        cr_amt = abs(closing)
-
-    total_debit += dr_amt
-    total_credit += cr_amt
-
-    trial_rows.append({
-        "Account Name": acc["name"],
-        "Debit (Dr)": round(dr_amt, 2),
-        "Credit (Cr)": round(cr_amt, 2)
-    })
-
-    progress.progress((i + 1) / len(accounts))
-
-status_text.success("✅ Trial Balance Generated Successfully")
-
-df = pd.DataFrame(trial_rows)
+df = pd.DataFrame(trial["rows"])
+df_groups = pd.DataFrame(trial["groups"])
 
 # -----------------------------
-# 4. Display Table
+# 3. Display Table
 # -----------------------------
 st.subheader("📌 Trial Balance Table")
 
 st.dataframe(df, use_container_width=True)
 
+with st.expander("🏷 Group Subtotals", expanded=False):
+    st.dataframe(df_groups, use_container_width=True, hide_index=True)
+
 # -----------------------------
-# 5. Totals Section
+# 4. Totals Section
 # -----------------------------
 st.divider()
 st.subheader("📊 Totals Summary")
@@ -103,15 +67,15 @@ col1, col2, col3 = st.columns(3)
 col1.metric("Total Debit (Dr)", f"₹ {total_debit:,.2f}")
 col2.metric("Total Credit (Cr)", f"₹ {total_credit:,.2f}")
 
-diff = abs(total_debit - total_credit)
+diff = trial["difference"]
 
-if diff < 0.01:
+if trial["is_balanced"]:
     col3.success("✅ Balanced (Dr = Cr)")
 else:
     col3.error(f"❌ Not Balanced (Diff: ₹ {diff:,.2f})")
 
 # -----------------------------
-# 6. Export Options
+# 5. Export Options
 # -----------------------------
 st.divider()
 st.subheader("📥 Export Options")
@@ -170,7 +134,7 @@ with st.expander("Printing & Sharing Options"):
     )  
 
     # -----------------------------
-    # 7. Print Option (A4 HTML)
+    # 6. Print Option (A4 HTML)
     # -----------------------------
     with colC:
         st.markdown("### 🖨 Print Trial Balance")
@@ -1,145 +1,678 @@
+import sys
+import time
 import sqlite3
 import hashlib
+from decimal import Decimal, ROUND_HALF_UP
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-def init_db():
+# -------------------------------
+# Account Period Balances (materialized)
+# -------------------------------
+# Debit / Credit totals (paise) per account, financial year and month ('YYYY-MM').
+# Kept current by triggers on transactions, so balance reports read a few
+# hundred rows instead of summing the whole transactions table.
+
+PERIOD_BALANCES_TABLE = """
+    CREATE TABLE IF NOT EXISTS account_period_balances (
+        account_id INTEGER NOT NULL,
+        financial_year_id INTEGER NOT NULL,
+        period TEXT NOT NULL,            -- 'YYYY-MM'
+        debit INTEGER NOT NULL DEFAULT 0,   -- total of to_acc_id side
+        credit INTEGER NOT NULL DEFAULT 0,  -- total of from_acc_id side
+        PRIMARY KEY (account_id, financial_year_id, period)
+    ) WITHOUT ROWID
+"""
+
+PERIOD_BALANCES_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_apb_fy_period
+    ON account_period_balances(financial_year_id, period)
+"""
+
+# Statements to post (NEW) or reverse (OLD) one transaction
+_POST_NEW = """
+        INSERT INTO account_period_balances (account_id, financial_year_id, period, debit, credit)
+        VALUES (NEW.to_acc_id, NEW.financial_year_id, substr(NEW.txn_date, 1, 7), NEW.amount, 0)
+        ON CONFLICT (account_id, financial_year_id, period)
+        DO UPDATE SET debit = debit + excluded.debit;
+
+        INSERT INTO account_period_balances (account_id, financial_year_id, period, debit, credit)
+        VALUES (NEW.from_acc_id, NEW.financial_year_id, substr(NEW.txn_date, 1, 7), 0, NEW.amount)
+        ON CONFLICT (account_id, financial_year_id, period)
+        DO UPDATE SET credit = credit + excluded.credit;
+"""
+
+_REVERSE_OLD = """
+        UPDATE account_period_balances
+        SET debit = debit - OLD.amount
+        WHERE account_id = OLD.to_acc_id
+          AND financial_year_id = OLD.financial_year_id
+          AND period = substr(OLD.txn_date, 1, 7);
+
+        UPDATE account_period_balances
+        SET credit = credit - OLD.amount
+        WHERE account_id = OLD.from_acc_id
+          AND financial_year_id = OLD.financial_year_id
+          AND period = substr(OLD.txn_date, 1, 7);
+
+        DELETE FROM account_period_balances
+        WHERE account_id IN (OLD.to_acc_id, OLD.from_acc_id)
+          AND financial_year_id = OLD.financial_year_id
+          AND period = substr(OLD.txn_date, 1, 7)
+          AND debit = 0 AND credit = 0;
+"""
+
+PERIOD_BALANCES_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_txn_apb_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        {_POST_NEW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_txn_apb_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        {_REVERSE_OLD}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_txn_apb_update
+    AFTER UPDATE OF txn_date, from_acc_id, to_acc_id, amount, financial_year_id ON transactions
+    BEGIN
+        {_REVERSE_OLD}
+        {_POST_NEW}
+    END
+    """
+]
+
+# -------------------------------
+# Account-side covering indexes
+# -------------------------------
+TRANSACTION_ACCOUNT_INDEXES = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_txn_fy_to_date
+    ON transactions(financial_year_id, to_acc_id, txn_date, amount)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_txn_fy_from_date
+    ON transactions(financial_year_id, from_acc_id, txn_date, amount)
+    """,
+]
+
+def create_period_balances(cursor):
+    cursor.execute(PERIOD_BALANCES_TABLE)
+    cursor.execute(PERIOD_BALANCES_INDEX)
+    for trigger_sql in PERIOD_BALANCES_TRIGGERS:
+        cursor.execute(trigger_sql)
+
+def rebuild_period_balances(cursor):
+    """Recomputes account_period_balances from the transactions table."""
+    cursor.execute("DELETE FROM account_period_balances")
+    cursor.execute("""
+        INSERT INTO account_period_balances (account_id, financial_year_id, period, debit, credit)
+        SELECT account_id, financial_year_id, period, SUM(debit), SUM(credit)
+        FROM (
+            SELECT to_acc_id AS account_id, financial_year_id,
+                   substr(txn_date, 1, 7) AS period, amount AS debit, 0 AS credit
+            FROM transactions
+
+            UNION ALL
+
+            SELECT from_acc_id, financial_year_id,
+                   substr(txn_date, 1, 7), 0, amount
+            FROM transactions
+        )
+        GROUP BY account_id, financial_year_id, period
+    """)
+
+# -------------------------------
+# Schema Migrations (PRAGMA user_version)
+# -------------------------------
+# Each step moves the schema from version N-1 to N. Steps are applied in
+# order, once, each inside its own transaction together with the
+# user_version bump, so a failed step leaves the database untouched.
+# Steps must be safe on databases created by older init_db() runs.
+
+def _migration_001_baseline(cursor):
+    # 1. Account Groups
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_name TEXT UNIQUE NOT NULL
+        )
+    """)
+
+    # 2. Financial Years
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS financial_years (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            label TEXT UNIQUE NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            is_active INTEGER DEFAULT 0
+        )
+    """)
     
-    with sqlite3.connect("business_ledger.db") as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # 1. Account Groups
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS groups (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                group_name TEXT UNIQUE NOT NULL
-            )
-        """)
+    # 3. Users Roles
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS roles (
+            id INTEGER PRIMARY KEY,
+            role_name TEXT UNIQUE NOT NULL,
+            description TEXT
+        )
+    """)
+    
+    # 3. Users
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            full_name TEXT,
+            role_id INTEGER NOT NULL,
+            password_hash TEXT, -- For future authentication implementation
+            is_active INTEGER DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
 
-        # 2. Financial Years
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS financial_years (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                label TEXT UNIQUE NOT NULL,
-                start_date DATE NOT NULL,
-                end_date DATE NOT NULL,
-                is_active INTEGER DEFAULT 0
-            )
-        """)
-        
-        # 3. Users Roles
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS roles (
-                id INTEGER PRIMARY KEY,
-                role_name TEXT UNIQUE NOT NULL,
-                description TEXT
-            )
-        """)
+            FOREIGN KEY (role_id) REFERENCES roles(id)
+        )
+    """)
+
+    # 3. Accounts Master
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            phone TEXT,
+            address TEXT,
+            group_id INTEGER NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (group_id) REFERENCES groups(id)
+        )
+    """)
+
+    # 4. Opening Balances
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS opening_balances (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_id INTEGER NOT NULL,
+            financial_year_id INTEGER NOT NULL,
+            amount REAL NOT NULL, -- (+ Debit / - Credit)
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (account_id) REFERENCES accounts(id),
+            FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
+            UNIQUE (account_id, financial_year_id)
+        )
+    """)
+    
+    # 5. Voucher Types
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS voucher_types (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        is_active INTEGER DEFAULT 1
+    )
+    """)
+
+    # 5. Transactions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+            txn_date DATE NOT NULL,
+
+            from_acc_id INTEGER NOT NULL,
+            to_acc_id INTEGER NOT NULL,
+
+            amount REAL NOT NULL CHECK(amount > 0),
+            note TEXT,
+
+            --voucher_no TEXT NOT NULL,
+            --voucher_type_id INTEGER NOT NULL,
+
+            financial_year_id INTEGER NOT NULL,
+
+            created_by INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (from_acc_id) REFERENCES accounts(id),
+            FOREIGN KEY (to_acc_id) REFERENCES accounts(id),
+            --FOREIGN KEY (voucher_type_id) REFERENCES voucher_types(id),
+            FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
+            FOREIGN KEY (created_by) REFERENCES users(id)
         
-        # Seed Roles
-        roles = [
-            (1, 'SUPERADMIN', 'Full system access'),
-            (2, 'ADMIN', 'Manage accounts and entries'),
-            (3, 'USER', 'View-only or limited entry')
-        ]
+        )
+    """)
 
-        cursor.executemany("""
-            INSERT OR IGNORE INTO roles (id, role_name, description)
-            VALUES (?, ?, ?)
-        """, roles)
+    # 6. Performance Indexes
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_date ON transactions(txn_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_fy ON transactions(financial_year_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_opening_fy ON opening_balances(financial_year_id)")
+
+def _migration_002_period_balances(cursor):
+    create_period_balances(cursor)
+    rebuild_period_balances(cursor)
+
+def _migration_003_account_indexes(cursor):
+    # WHERE financial_year_id = ? AND to_acc_id / from_acc_id = ? AND txn_date BETWEEN ? AND ?
+    for index_sql in TRANSACTION_ACCOUNT_INDEXES:
+        cursor.execute(index_sql)
+
+def _rebuild_table(cursor, table, create_sql, copy_sql):
+    """
+    Replaces `table` by a new definition (SQLite cannot change a column type).
+    create_sql must create `{table}_new`, copy_sql fills it from `table`.
+    The AUTOINCREMENT counter is carried over so deleted ids are not reused.
+    """
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    seq = cursor.fetchone()
+
+    cursor.execute(create_sql)
+    cursor.execute(copy_sql)
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+    if seq:
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, seq[0]))
+
+def _migration_004_integer_paise(cursor):
+    # Amounts move from REAL rupees to INTEGER paise (exact sums).
+    # The rounding rule is kept here: this step must not change with the app.
+    def to_paise(amount):
+        # Rupees -> paise, half rounded up
+        if amount is None:
+            return None
+        return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+    cursor.connection.create_function("to_paise", 1, to_paise, deterministic=True)
+
+    # Under half a paisa rounds to 0 and would fail CHECK(amount > 0)
+    too_small = cursor.execute("""
+        SELECT id, txn_date, amount
+        FROM transactions
+        WHERE to_paise(amount) <= 0
+        ORDER BY id
+    """).fetchall()
+
+    if too_small:
+        listed = ", ".join(f"id {txn_id} ({txn_date}, ₹ {amount})" for txn_id, txn_date, amount in too_small[:20])
+        more = f" and {len(too_small) - 20} more" if len(too_small) > 20 else ""
+        raise ValueError(
+            f"{len(too_small)} transaction(s) are below ₹ 0.005 and cannot be stored in paise: "
+            f"{listed}{more}. Correct or delete them in the database, then restart."
+        )
+
+    # Recreated below with INTEGER columns; the triggers go with the old table
+    cursor.execute("DROP TABLE IF EXISTS account_period_balances")
 
-        # 3. Users
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                full_name TEXT,
-                role_id INTEGER NOT NULL,
-                password_hash TEXT, -- For future authentication implementation
-                is_active INTEGER DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY (role_id) REFERENCES roles(id)
-            )
+    _rebuild_table(cursor, "transactions", """
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+            txn_date DATE NOT NULL,
+
+            from_acc_id INTEGER NOT NULL,
+            to_acc_id INTEGER NOT NULL,
+
+            amount INTEGER NOT NULL CHECK(amount > 0), -- paise
+            note TEXT,
+
+            financial_year_id INTEGER NOT NULL,
+
+            created_by INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (from_acc_id) REFERENCES accounts(id),
+            FOREIGN KEY (to_acc_id) REFERENCES accounts(id),
+            FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
+            FOREIGN KEY (created_by) REFERENCES users(id)
+        )
+    """, """
+        INSERT INTO transactions_new
+            (id, txn_date, from_acc_id, to_acc_id, amount, note,
+             financial_year_id, created_by, created_at)
+        SELECT
+            id, txn_date, from_acc_id, to_acc_id, to_paise(amount), note,
+            financial_year_id, created_by, created_at
+        FROM transactions
+    """)
+
+    _rebuild_table(cursor, "opening_balances", """
+        CREATE TABLE opening_balances_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_id INTEGER NOT NULL,
+            financial_year_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL, -- paise (+ Debit / - Credit)
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (account_id) REFERENCES accounts(id),
+            FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
+            UNIQUE (account_id, financial_year_id)
+        )
+    """, """
+        INSERT INTO opening_balances_new
+            (id, account_id, financial_year_id, amount, created_at)
+        SELECT id, account_id, financial_year_id, to_paise(amount), created_at
+        FROM opening_balances
+    """)
+
+    # Indexes were dropped with the old tables
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_date ON transactions(txn_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_fy ON transactions(financial_year_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_opening_fy ON opening_balances(financial_year_id)")
+    for index_sql in TRANSACTION_ACCOUNT_INDEXES:
+        cursor.execute(index_sql)
+
+    create_period_balances(cursor)
+    rebuild_period_balances(cursor)
+
+def _migration_005_change_log(cursor):
+    # Monotonic change counter: one row per written transaction /
+    # opening balance. In-memory stores and caches compare MAX(seq)
+    # with what they have seen and reload only the listed rows.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            financial_year_id INTEGER
+        )
+    """)
+
+    for table in ("transactions", "opening_balances"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, financial_year_id)
+                VALUES ('{table}', NEW.id, NEW.financial_year_id);
+            END
         """)
 
-        # 3. Accounts Master
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                phone TEXT,
-                address TEXT,
-                group_id INTEGER NOT NULL,
-                is_active INTEGER DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (group_id) REFERENCES groups(id)
-            )
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_update
+            AFTER UPDATE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, financial_year_id)
+                VALUES ('{table}', NEW.id, NEW.financial_year_id);
+
+                -- Row moved to another year: that year changed as well
+                INSERT INTO change_log (table_name, row_id, financial_year_id)
+                SELECT '{table}', OLD.id, OLD.financial_year_id
+                WHERE OLD.financial_year_id IS NOT NEW.financial_year_id;
+            END
         """)
 
-        # 4. Opening Balances
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS opening_balances (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account_id INTEGER NOT NULL,
-                financial_year_id INTEGER NOT NULL,
-                amount REAL NOT NULL, -- (+ Debit / - Credit)
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (account_id) REFERENCES accounts(id),
-                FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
-                UNIQUE (account_id, financial_year_id)
-            )
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, financial_year_id)
+                VALUES ('{table}', OLD.id, OLD.financial_year_id);
+            END
         """)
-        
-        # 5. Voucher Types
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS voucher_types (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            is_active INTEGER DEFAULT 1
+
+def _migration_006_keyset_index(cursor):
+    # Keyset paging of a year's transactions on (txn_date, id)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_txn_fy_date
+        ON transactions(financial_year_id, txn_date)
+    """)
+
+def _migration_007_transaction_search(cursor):
+    # Full-text index over account names and notes, rowid = transactions.id.
+    # fy holds one "fy<id>" token so a search is narrowed to one year
+    # inside the index instead of after ranking every year's matches.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            from_account,
+            to_account,
+            note,
+            fy,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
         )
-        """)
+    """)
 
-        # 5. Transactions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cursor.execute("""
+        INSERT INTO transactions_fts (rowid, from_account, to_account, note, fy)
+        SELECT t.id, a1.name, a2.name, COALESCE(t.note, ''), 'fy' || t.financial_year_id
+        FROM transactions t
+        JOIN accounts a1 ON t.from_acc_id = a1.id
+        JOIN accounts a2 ON t.to_acc_id = a2.id
+    """)
 
-                txn_date DATE NOT NULL,
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (rowid, from_account, to_account, note, fy)
+            VALUES (
+                NEW.id,
+                (SELECT name FROM accounts WHERE id = NEW.from_acc_id),
+                (SELECT name FROM accounts WHERE id = NEW.to_acc_id),
+                COALESCE(NEW.note, ''),
+                'fy' || NEW.financial_year_id
+            );
+        END
+    """)
 
-                from_acc_id INTEGER NOT NULL,
-                to_acc_id INTEGER NOT NULL,
+    # Amount / date edits do not touch the indexed text
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF from_acc_id, to_acc_id, note, financial_year_id ON transactions
+        BEGIN
+            DELETE FROM transactions_fts WHERE rowid = OLD.id;
 
-                amount REAL NOT NULL CHECK(amount > 0),
-                note TEXT,
+            INSERT INTO transactions_fts (rowid, from_account, to_account, note, fy)
+            VALUES (
+                NEW.id,
+                (SELECT name FROM accounts WHERE id = NEW.from_acc_id),
+                (SELECT name FROM accounts WHERE id = NEW.to_acc_id),
+                COALESCE(NEW.note, ''),
+                'fy' || NEW.financial_year_id
+            );
+        END
+    """)
 
-                --voucher_no TEXT NOT NULL,
-                --voucher_type_id INTEGER NOT NULL,
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            DELETE FROM transactions_fts WHERE rowid = OLD.id;
+        END
+    """)
 
-                financial_year_id INTEGER NOT NULL,
+    # Renaming an account re-labels every transaction it appears in
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_fts_rename
+        AFTER UPDATE OF name ON accounts
+        WHEN OLD.name IS NOT NEW.name
+        BEGIN
+            UPDATE transactions_fts SET from_account = NEW.name
+            WHERE rowid IN (SELECT id FROM transactions WHERE from_acc_id = NEW.id);
 
-                created_by INTEGER NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UPDATE transactions_fts SET to_account = NEW.name
+            WHERE rowid IN (SELECT id FROM transactions WHERE to_acc_id = NEW.id);
+        END
+    """)
 
-                FOREIGN KEY (from_acc_id) REFERENCES accounts(id),
-                FOREIGN KEY (to_acc_id) REFERENCES accounts(id),
-                --FOREIGN KEY (voucher_type_id) REFERENCES voucher_types(id),
-                FOREIGN KEY (financial_year_id) REFERENCES financial_years(id),
-                FOREIGN KEY (created_by) REFERENCES users(id)
-            
-            )
-        """)
+def _migration_008_group_nature(cursor):
+    # Account nature on groups: reports filter on this indexed column
+    # instead of LIKE matching group names or hardcoding group ids.
+    cursor.execute("""
+        ALTER TABLE groups ADD COLUMN nature TEXT CHECK (nature IN (
+            'ASSET', 'LIABILITY', 'INCOME', 'EXPENSE', 'EQUITY',
+            'CASH_BANK', 'DEBTOR', 'CREDITOR'
+        ))
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_groups_nature ON groups(nature)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_group ON accounts(group_id)")
+
+    # Best guess from existing names; anything unrecognised stays NULL
+    # and can be set on the Account Groups page.
+    cursor.execute("""
+        -- Order matters: "Bank Loans" is a liability, "Bank Charges" an expense
+        UPDATE groups SET nature = CASE
+            WHEN group_name LIKE '%loan%' THEN 'LIABILITY'
+            WHEN group_name LIKE '%expense%' OR group_name LIKE '%expanse%' THEN 'EXPENSE'
+            WHEN group_name LIKE '%income%' OR group_name LIKE '%revenue%'
+              OR group_name LIKE '%sales%' THEN 'INCOME'
+            WHEN group_name LIKE '%cash%' OR group_name LIKE '%bank%' THEN 'CASH_BANK'
+            WHEN group_name LIKE '%debtor%' OR group_name LIKE '%receivable%' THEN 'DEBTOR'
+            WHEN group_name LIKE '%creditor%' OR group_name LIKE '%payable%' THEN 'CREDITOR'
+            WHEN group_name LIKE '%asset%' THEN 'ASSET'
+            WHEN group_name LIKE '%liabilit%' THEN 'LIABILITY'
+            WHEN group_name LIKE '%equity%' OR group_name LIKE '%capital%' THEN 'EQUITY'
+        END
+    """)
+
+    # Cash / bank accounts lived under "Assets": give them their own group
+    # so cash detection does not depend on account names afterwards.
+    # (A fresh database gets this group from init_db's seed data.)
+    cursor.execute("""
+        INSERT OR IGNORE INTO groups (group_name, nature)
+        SELECT 'Cash & Bank', 'CASH_BANK'
+        WHERE EXISTS (SELECT 1 FROM groups)
+    """)
+    cursor.execute("""
+        UPDATE accounts
+        SET group_id = (SELECT id FROM groups WHERE group_name = 'Cash & Bank')
+        WHERE (name LIKE '%cash%' OR name LIKE '%bank%')
+          AND name NOT LIKE '%loan%'
+          AND name NOT LIKE '%charge%'
+          AND group_id IN (SELECT id FROM groups WHERE nature = 'ASSET')
+    """)
+
+    # The Cash Flow page used to list every account of group ids 1 and 2;
+    # it now lists Cash & Bank accounts only. Name what no longer shows.
+    left_out = cursor.execute("""
+        SELECT a.name, COALESCE(g.group_name, '?')
+        FROM accounts a
+        LEFT JOIN groups g ON a.group_id = g.id
+        WHERE a.group_id IN (1, 2)
+          AND g.nature IS NOT 'CASH_BANK'
+        ORDER BY a.name
+    """).fetchall()
+
+    if left_out:
+        print(
+            "⚠️ Not in a Cash & Bank group, so no longer on the Cash Flow page "
+            "(move them in 👤 Accounts Master if they are cash / bank): "
+            + ", ".join(f"{name} ({group})" for name, group in left_out)
+        )
+
+def _migration_009_change_log_retention(cursor):
+    # Keep the newest 50 000 change_log rows, trimmed every 1 000th write.
+    # A store / cache that fell further behind finds MIN(seq) past its own
+    # seq and reloads in full; MAX(seq) is never trimmed.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_trim
+        AFTER INSERT ON change_log
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM change_log WHERE seq <= NEW.seq - 50000;
+        END
+    """)
+
+    cursor.execute("""
+        DELETE FROM change_log
+        WHERE seq <= (SELECT MAX(seq) FROM change_log) - 50000
+    """)
+
+# (version, description, step) -- append only, never renumber
+MIGRATIONS = [
+    (1, "Baseline schema", _migration_001_baseline),
+    (2, "Account period balances", _migration_002_period_balances),
+    (3, "Account-side covering indexes", _migration_003_account_indexes),
+    (4, "Integer paise amounts", _migration_004_integer_paise),
+    (5, "Change log", _migration_005_change_log),
+    (6, "Transactions keyset index", _migration_006_keyset_index),
+    (7, "Transaction full-text search", _migration_007_transaction_search),
+    (8, "Group account nature", _migration_008_group_nature),
+    (9, "Change log retention", _migration_009_change_log_retention),
+]
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(db_name="business_ledger.db"):
+    """
+    Brings the database up to the latest schema version.
+    Returns the list of versions applied (empty when already current).
+    """
+    # Autocommit mode: transactions are opened explicitly per step
+    conn = sqlite3.connect(db_name, isolation_level=None, timeout=30)
+    applied = []
+
+    try:
+        current = get_schema_version(conn)
+
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
 
-        # 6. Performance Indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_date ON transactions(txn_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_fy ON transactions(financial_year_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_opening_fy ON opening_balances(financial_year_id)")
+            try:
+                # Another process may have migrated while we waited for the lock
+                if get_schema_version(conn) >= version:
+                    conn.execute("ROLLBACK")
+                    continue
+
+                step(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                print(f"❌ Migration {version:03d} ({description}) failed, rolled back.")
+                raise
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"✅ Migration {version:03d} ({description}) applied in {elapsed_ms:.1f} ms")
+            applied.append(version)
+    finally:
+        conn.close()
+
+    return applied
+
+def init_db():
+
+    # Schema (tables, indexes, triggers) comes from the migrations
+    migrate("business_ledger.db")
+
+    with sqlite3.connect("business_ledger.db") as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+
+        # Seed Roles
+        roles = [
+            (1, 'SUPERADMIN', 'Full system access'),
+            (2, 'ADMIN', 'Manage accounts and entries'),
+            (3, 'USER', 'View-only or limited entry')
+        ]
+
+        cursor.executemany("""
+            INSERT OR IGNORE INTO roles (id, role_name, description)
+            VALUES (?, ?, ?)
+        """, roles)
 
         # 7. Seed Data: Groups
-        groups = ['Assets', 'Liabilities', 'Income', 'Expenses', 'Equity']
-        cursor.executemany("INSERT OR IGNORE INTO groups (group_name) VALUES (?)", [(g,) for g in groups])
+        groups = [
+            ('Assets', 'ASSET'),
+            ('Liabilities', 'LIABILITY'),
+            ('Income', 'INCOME'),
+            ('Expenses', 'EXPENSE'),
+            ('Equity', 'EQUITY'),
+            ('Cash & Bank', 'CASH_BANK'),
+            ('Sundry Debtors', 'DEBTOR'),
+            ('Sundry Creditors', 'CREDITOR')
+        ]
+        cursor.executemany("INSERT OR IGNORE INTO groups (group_name, nature) VALUES (?, ?)", groups)
 
         # 8. Seed Data: Financial Years
         # (Updated to ensure 2025-26 is marked active during initial creation)
@@ -174,8 +707,8 @@ def init_db():
 
         # 9. Seed Data: Default Accounts
         default_accounts = [
-            ('Cash', 'Assets'),
-            ('Bank', 'Assets'),
+            ('Cash', 'Cash & Bank'),
+            ('Bank', 'Cash & Bank'),
             ('Sales Income', 'Income'),
             ('Office Expenses', 'Expenses'),
             ('Salary Expense', 'Expenses'),
@@ -196,5 +729,51 @@ def init_db():
         conn.commit()
         print("✅ Professional Accounting Database Initialized Successfully.")
                
+def rebuild_balances():
+    """Command: python setup_db.py --rebuild-balances"""
+    with sqlite3.connect("business_ledger.db") as conn:
+        cursor = conn.cursor()
+        create_period_balances(cursor)
+        rebuild_period_balances(cursor)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM account_period_balances")
+        print(f"✅ Account period balances rebuilt ({cursor.fetchone()[0]} rows).")
+
+def check_indexes():
+    """Command: python setup_db.py --check-indexes"""
+    from datetime import date, timedelta
+    import db_helpers
+
+    fy = db_helpers.get_active_financial_year()
+    if not fy:
+        print("❌ No active financial year.")
+        sys.exit(1)
+
+    with db_helpers.db_connection() as conn:
+        row = conn.execute("""
+            SELECT to_acc_id FROM transactions
+            WHERE financial_year_id = ?
+            LIMIT 1
+        """, (fy["id"],)).fetchone()
+        account_id = row[0] if row else conn.execute("SELECT MIN(id) FROM accounts").fetchone()[0]
+
+    # Start mid-month so the closing balance also reads transactions for the edge days
+    start_date = (date.fromisoformat(fy["start_date"]) + timedelta(days=9)).isoformat()
+
+    results = db_helpers.explain_report_queries(account_id, fy["id"], start_date, fy["end_date"])
+
+    for r in results:
+        mark = "✅" if r["Uses Index"] else "❌"
+        print(f"{mark} {r['Query']}: {r['Plan']}")
+
+    if not all(r["Uses Index"] for r in results):
+        sys.exit(1)
+
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    if "--rebuild-balances" in sys.argv:
+        rebuild_balances()
+    elif "--check-indexes" in sys.argv:
+        check_indexes()
+    else:
+        init_db()
\ No newline at end of file
@@ -0,0 +1,155 @@
+import io
+import pandas as pd
+import streamlit as st
+import matplotlib.pyplot as plt
+from contextlib import contextmanager
+
+from db_helpers import get_data_version
+
+# -------------------------------
+# Lazy Report Sections
+# -------------------------------
+# Report pages declare their heavy parts (tables, charts, exports) as
+# lazy sections: a closed section only draws its toggle, its body runs
+# while it is open. Values built inside a section go through memoized(),
+# so reruns caused by other widgets reuse them until the report inputs
+# or the data change. The data version is read once per run, in
+# section_params(), not once per section.
+
+@contextmanager
+def lazy_section(title, key, expanded=False):
+    """
+    Collapsible report section, yields True while it is open. Drawn as a
+    toggle, not an expander: st.expander does not tell the server whether
+    it is open, so its body would always run.
+        with lazy_section("📊 Monthly Summary", "cash_flow_monthly") as opened:
+            if opened:
+                ...
+    """
+    opened = st.toggle(title, value=expanded, key=f"section_open_{key}")
+
+    if not opened:
+        yield False
+        return
+
+    with st.container(border=True):
+        yield True
+
+def section_params(*inputs):
+    """Report inputs (hashable) plus the current data version, for memoized()."""
+    return inputs + (get_data_version(),)
+
+def memoized(key, params, compute, *args):
+    """
+    compute(*args), kept in the session under key and rebuilt only when
+    params (from section_params()) change. Filtering / grouping belongs
+    in compute, so a cache hit skips it. The value is shared between
+    reruns: treat it as read-only.
+    """
+    cache = st.session_state.setdefault("section_cache", {})
+
+    entry = cache.get(key)
+
+    if entry is None or entry[0] != params:
+        entry = (params, compute(*args))
+        cache[key] = entry
+
+    return entry[1]
+
+# -------------------------------
+# Section Builders (memoizable)
+# -------------------------------
+def top_n(df, by, value, n=10):
+    """Sum of value per `by`, largest first, first n rows."""
+    totals = df.groupby(by)[value].sum().reset_index()
+    return totals.sort_values(value, ascending=False).head(n)
+
+def top_n_with_others(df, by, value, n=5):
+    """(labels, values) of the n largest `by` totals plus an 'Others' slice."""
+    totals = df.groupby(by)[value].sum().sort_values(ascending=False)
+
+    labels = totals.index[:n].tolist()
+    values = totals.iloc[:n].tolist()
+
+    others = totals.iloc[n:].sum()
+    if others > 0:
+        labels.append("Others")
+        values.append(others)
+
+    return labels, values
+
+def figure_png(fig):
+    """Renders a matplotlib figure to PNG bytes and frees it."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+def line_chart_png(df, x, columns, title, xlabel, ylabel="Amount (₹)"):
+    """Line chart of df[columns] against df[x] (one line per column)."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    for column in columns:
+        ax.plot(df[x], df[column], marker="o", label=column)
+
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    if len(columns) > 1:
+        ax.legend()
+    ax.grid(True)
+    ax.tick_params(axis="x", labelrotation=45)
+
+    return figure_png(fig)
+
+def bar_chart_png(df, x, y, title, xlabel="Account", ylabel="Amount (₹)"):
+    """Bar chart of df[y] per df[x]."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    ax.bar(df[x], df[y])
+
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+
+    return figure_png(fig)
+
+def pie_chart_png(labels, values, title, donut=False, show_amounts=False):
+    """Pie (or donut, with the total in the hole) chart of values."""
+    total = sum(values)
+
+    if show_amounts:
+        autopct = lambda pct: f"{pct:.1f}%\n₹{pct * total / 100.0:,.0f}"
+    else:
+        autopct = "%1.1f%%"
+
+    fig, ax = plt.subplots(figsize=(8, 8) if donut else (6, 6))
+
+    ax.pie(
+        values,
+        labels=labels,
+        autopct=autopct,
+        startangle=90,
+        pctdistance=0.82 if donut else 0.6
+    )
+
+    if donut:
+        # Donut hole
+        ax.add_artist(plt.Circle((0, 0), 0.60, fc="white"))
+        ax.text(0, 0, f"Total\n₹ {total:,.0f}", ha="center", va="center",
+                fontsize=14, fontweight="bold")
+
+    ax.set_title(title)
+
+    return figure_png(fig)
+
+def excel_bytes(sheets):
+    """{sheet name: DataFrame} -> .xlsx file bytes."""
+    buffer = io.BytesIO()
+
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+    return buffer.getvalue()
@@ -2,12 +2,7 @@ import streamlit as st
 
 from db_helpers import (
     get_active_financial_year,
-    get_total_income,
-    get_total_expense,
-    get_cash_balance,
-    get_receivable,
-    get_payable,
-    get_monthly_income_expense
+    get_dashboard_kpis
 )
 
 st.set_page_config(page_title="Financial Dashboard", layout="wide")
@@ -16,13 +11,21 @@ st.title("🏠 Financial Dashboard")
 
 # ------------------ FETCH DATA ------------------
 
-total_income = get_total_income()
-total_expense = get_total_expense()
-net_profit = total_income - total_expense
-cash_balance = get_cash_balance()
-receivable = get_receivable()
-payable = get_payable()
-monthly_df = get_monthly_income_expense()
+active_year = get_active_financial_year()
+if not active_year:
+    st.warning("⚠️ No active financial year selected.")
+    st.stop()
+
+# One aggregate query for every figure on the page
+kpis = get_dashboard_kpis(active_year["id"])
+
+total_income = kpis.income
+total_expense = kpis.expense
+net_profit = kpis.net_profit
+cash_balance = kpis.cash_balance
+receivable = kpis.receivable
+payable = kpis.payable
+monthly_df = kpis.monthly
 
 # ------------------ KPI CARDS ------------------
 
@@ -31,7 +34,7 @@ col1, col2, col3, col4, col5, col6 = st.columns(6)
 col1.metric("💰 Total Income", f"₹ {total_income:,.2f}")
 col2.metric("💸 Total Expense", f"₹ {total_expense:,.2f}")
 col3.metric("📈 Net Profit", f"₹ {net_profit:,.2f}")
-col4.metric("🏦 Cash Balance", f"₹ {cash_balance:,.2f}")
+col4.metric("🏦 Cash & Bank", f"₹ {cash_balance:,.2f}")
 col5.metric("🧾 Receivable", f"₹ {receivable:,.2f}")
 col6.metric("💳 Payable", f"₹ {payable:,.2f}")
 
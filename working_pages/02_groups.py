@@ -1,17 +1,22 @@
 import streamlit as st
-from db_helpers import add_group, get_all_groups
+from db_helpers import add_group, get_all_groups, ACCOUNT_NATURES
 from db_helpers import update_group, delete_group, can_delete_group
 
 st.set_page_config(page_title="Account Groups", layout="wide")
 
 st.title("🏷 Account Groups Management")
 
+# Nature drives every report (P&L, Balance Sheet, Cash Flow, Dashboard)
+NATURE_LABELS = {None: "— Not set —", **ACCOUNT_NATURES}
+NATURE_OPTIONS = list(NATURE_LABELS)
+
 # -------------------------------
 # Add New Group
 # -------------------------------
 with st.expander("➕ Add New Group"):
     with st.form("add_group_form"):
         group_name = st.text_input("Group Name", placeholder="e.g. Assets, Income, Expenses")
+        nature = st.selectbox("Nature", NATURE_OPTIONS, format_func=NATURE_LABELS.get)
         submitted = st.form_submit_button("Save Group")
 
         if submitted:
@@ -19,7 +24,7 @@ with st.expander("➕ Add New Group"):
                 st.warning("⚠️ Group name cannot be empty")
             else:
                 try:
-                    add_group(group_name)
+                    add_group(group_name, nature)
                     st.success(f"✅ Group '{group_name}' added successfully")
                     st.rerun()
                 except Exception as e:
@@ -44,6 +49,7 @@ with st.expander("📋 View/Edit Existing Groups"):
             col1, col2 = st.columns([3, 2])
 
             col1.write(f"**{g['group_name']}**")
+            col1.caption(f"Nature: {NATURE_LABELS[g['nature']]}")
 
             with col2:
                 with st.expander("✏️ Edit / ❌ Delete"):
@@ -53,9 +59,17 @@ with st.expander("📋 View/Edit Existing Groups"):
                         key=f"grp_{g['id']}"
                     )
 
+                    new_nature = st.selectbox(
+                        "Nature",
+                        NATURE_OPTIONS,
+                        index=NATURE_OPTIONS.index(g["nature"]),
+                        format_func=NATURE_LABELS.get,
+                        key=f"nat_{g['id']}"
+                    )
+
                     if st.button("Update", key=f"upd_{g['id']}"):
                         try:
-                            update_group(g["id"], new_name)
+                            update_group(g["id"], new_name, new_nature)
                             st.success("✅ Group updated")
                             st.rerun()
                         except ValueError as e:
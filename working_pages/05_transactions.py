@@ -6,9 +6,12 @@ from db_helpers import (
     get_active_financial_year,
     get_all_accounts,
     add_transaction,
-    get_transactions_by_year,
-    delete_transaction,
-    update_transaction
+    get_transactions_page,
+    search_transactions,
+    get_transaction_totals,
+    get_account_turnover,
+    apply_transaction_changes,
+    MAX_KEY_ID
 )
 
 st.set_page_config(page_title="Transactions", layout="wide")
@@ -22,6 +25,10 @@ if "editor_version" not in st.session_state:
 if "form_reset_key" not in st.session_state:
     st.session_state.form_reset_key = 0
 
+# Keyset page cursor: None (newest) or ("after" / "before", (txn_date, id))
+if "txn_cursor" not in st.session_state:
+    st.session_state.txn_cursor = None
+
 st.title("💳 Transaction Management")
 
 # -----------------------------
@@ -39,9 +46,6 @@ fy_end = datetime.strptime(active_year["end_date"], "%Y-%m-%d").date()
 # -----------------------------
 # Load Data
 # -----------------------------
-rows = get_transactions_by_year(fy_id)
-df_all = pd.DataFrame([dict(r) for r in rows]) if rows else pd.DataFrame()
-
 accounts = get_all_accounts()
 active_accounts = [a for a in accounts if a["is_active"] == 1]
 acc_names = sorted([a["name"] for a in active_accounts])
@@ -50,12 +54,11 @@ acc_map = {a["name"]: a["id"] for a in active_accounts}
 # -----------------------------
 # 2. Summary
 # -----------------------------
-if not df_all.empty:
-    total_out = df_all[df_all['from_account'].str.contains('Cash', case=False, na=False)]['amount'].sum()
-    total_in = df_all[df_all['to_account'].str.contains('Cash', case=False, na=False)]['amount'].sum()
-    turnover = df_all["amount"].sum()
-else:
-    total_out = total_in = turnover = 0
+# Aggregate query, not the rows on screen
+totals = get_transaction_totals(fy_id)
+total_in = totals["cash_in"]
+total_out = totals["cash_out"]
+turnover = totals["turnover"]
 
 c1, c2, c3 = st.columns(3)
 c1.metric("Total Inflow (+)", f"₹ {total_in:,.2f}")
@@ -127,19 +130,45 @@ st.divider()
 with st.expander("📋 View/Edit Transactions", expanded=False):
     st.subheader("📋 Transaction History")
 
-    if not df_all.empty:
-        df_all["Edit_Amt"] = df_all["amount"]
+    def go_to(cursor):
+        st.session_state.txn_cursor = cursor
+        st.session_state.editor_version += 1
+
+    # -----------------------------
+    # Page Controls
+    # -----------------------------
+    f1, f2, f3, f4 = st.columns([3, 1, 2, 1])
+
+    search_q = f1.text_input("🔍 Search history...", on_change=go_to, args=(None,)).strip()
+    page_size = f2.selectbox("Rows / page", [25, 50, 100, 250], index=1, on_change=go_to, args=(None,))
+    jump_date = f3.date_input(
+        "Jump to date", value=fy_end, min_value=fy_start, max_value=fy_end, disabled=bool(search_q)
+    )
+
+    f4.write("")
+    f4.button(
+        "📅 Go", use_container_width=True, disabled=bool(search_q),
+        on_click=go_to, args=(("after", (str(jump_date), MAX_KEY_ID)),)
+    )
+
+    cursor = st.session_state.txn_cursor
+
+    if search_q:
+        # Ranked full-text results, paged by offset: ("offset", n)
+        offset = cursor[1] if cursor and cursor[0] == "offset" else 0
+        page = search_transactions(fy_id, search_q, page_size, offset)
+    else:
+        page = get_transactions_page(
+            fy_id,
+            page_size,
+            after=cursor[1] if cursor and cursor[0] == "after" else None,
+            before=cursor[1] if cursor and cursor[0] == "before" else None
+        )
 
-        search_q = st.text_input("🔍 Search history...").lower()
-        df_view = df_all.copy()
+    df_view = pd.DataFrame([dict(r) for r in page["rows"]])
 
-        if search_q:
-            mask = (
-                df_view["from_account"].str.lower().str.contains(search_q) |
-                df_view["to_account"].str.lower().str.contains(search_q) |
-                df_view["note"].fillna("").str.lower().str.contains(search_q)
-            )
-            df_view = df_view[mask]
+    if not df_view.empty:
+        df_view["Edit_Amt"] = df_view["amount"]
 
         editor_key = f"txn_editor_{st.session_state.editor_version}"
 
@@ -158,6 +187,32 @@ with st.expander("📋 View/Edit Transactions", expanded=False):
             key=editor_key
         )
 
+        first_key = (df_view.iloc[0]["txn_date"], int(df_view.iloc[0]["id"]))
+        last_key = (df_view.iloc[-1]["txn_date"], int(df_view.iloc[-1]["id"]))
+
+        p1, p2, p3 = st.columns([1, 2, 1])
+
+        if search_q:
+            p1.button(
+                "⬅️ Better matches", use_container_width=True, disabled=not page["has_prev"],
+                on_click=go_to, args=(("offset", max(offset - page_size, 0)),)
+            )
+            p2.caption(f"Showing matches {offset + 1} – {offset + len(df_view)} for “{search_q}”")
+            p3.button(
+                "More ➡️", use_container_width=True, disabled=not page["has_next"],
+                on_click=go_to, args=(("offset", offset + page_size),)
+            )
+        else:
+            p1.button(
+                "⬅️ Newer", use_container_width=True, disabled=not page["has_prev"],
+                on_click=go_to, args=(("before", first_key),)
+            )
+            p2.caption(f"Showing {len(df_view)} entries: {first_key[0]} → {last_key[0]}")
+            p3.button(
+                "Older ➡️", use_container_width=True, disabled=not page["has_next"],
+                on_click=go_to, args=(("after", last_key),)
+            )
+
         state = st.session_state[editor_key]
 
         if state.get("deleted_rows") or state.get("edited_rows"):
@@ -166,32 +221,45 @@ with st.expander("📋 View/Edit Transactions", expanded=False):
             c1, c2, _ = st.columns([1, 1, 4])
 
             if c1.button("✅ Confirm Save", type="primary"):
-                try:
-                    for idx in state.get("deleted_rows", []):
-                        delete_transaction(int(df_view.iloc[idx]["id"]))
+                deletes = [int(df_view.iloc[idx]["id"]) for idx in state.get("deleted_rows", [])]
+                updates = []
+
+                for idx_str, changes in state.get("edited_rows", {}).items():
+                    row = df_view.iloc[int(idx_str)]
 
-                    for idx_str, changes in state.get("edited_rows", {}).items():
-                        row_idx = int(idx_str)
-                        row = df_view.iloc[row_idx]
+                    updates.append({
+                        "id": int(row["id"]),
+                        "amount": changes.get("Edit_Amt", row["amount"]),
+                        "note": changes.get("note", row["note"]),
+                        "from_acc_id": acc_map.get(changes.get("from_account", row["from_account"])),
+                        "to_acc_id": acc_map.get(changes.get("to_account", row["to_account"]))
+                    })
 
-                        update_transaction(
-                            int(row["id"]),
-                            changes.get("Edit_Amt", row["amount"]),
-                            changes.get("note", row["note"]),
-                            acc_map[changes.get("from_account", row["from_account"])],
-                            acc_map[changes.get("to_account", row["to_account"])]
-                        )
+                # One atomic write: either every row is saved or none is
+                result = apply_transaction_changes(deletes, updates)
 
+                if result["ok"]:
+                    st.session_state.editor_version += 1
                     st.success("✅ Changes saved")
                     st.rerun()
+                else:
+                    dates = dict(zip(df_view["id"], df_view["txn_date"]))
 
-                except Exception as e:
-                    st.error(f"❌ Error: {e}")
+                    st.error("❌ Nothing was saved. Fix these rows and try again:")
+                    for r in result["rows"]:
+                        if r["error"]:
+                            st.write(f"• {r['action'].title()} of {dates.get(r['id'], '')} entry #{r['id']}: {r['error']}")
 
             if c2.button("❌ Undo"):
                 st.session_state.editor_version += 1
                 st.rerun()
 
+    else:
+        st.info("No transactions found.")
+
+        if st.session_state.txn_cursor is not None:
+            st.button("⏮ Back to newest", on_click=go_to, args=(None,))
+
 # -----------------------------
 # 5. Account Balances
 # -----------------------------
@@ -199,22 +267,15 @@ st.divider()
 with st.expander("📊 View Account Balances", expanded=False):
     st.subheader("📊 Account Balances")
 
-    if not df_all.empty:
-        credits = df_all.groupby('from_account')['amount'].sum().rename('Total_Out')
-        debits = df_all.groupby('to_account')['amount'].sum().rename('Total_In')
-
-        balance_df = (
-            pd.DataFrame(index=acc_names)
-            .join(debits)
-            .join(credits)
-            .fillna(0)
-        )
+    turnover_rows = get_account_turnover(fy_id)
 
-        balance_df['Net Balance'] = balance_df['Total_In'] - balance_df['Total_Out']
+    if turnover_rows:
+        active_balance = pd.DataFrame(
+            [tuple(r) for r in turnover_rows],
+            columns=["Account", "Total_In", "Total_Out"]
+        ).set_index("Account")
 
-        active_balance = balance_df[
-            (balance_df['Total_In'] > 0) | (balance_df['Total_Out'] > 0)
-        ]
+        active_balance['Net Balance'] = active_balance['Total_In'] - active_balance['Total_Out']
 
         st.table(
             active_balance.style
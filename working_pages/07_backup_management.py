@@ -4,6 +4,9 @@ import os
 import time
 from datetime import datetime
 
+from db_helpers import close_all_connections, checkpoint_wal, clear_txn_stores, clear_master_cache, clear_report_cache
+from setup_db import migrate
+
 st.title("💾 Backup Management")
 
 # Security Check
@@ -19,8 +22,12 @@ with st.expander("💾 Backup Database"):
     if st.button("Create Local Backup Copy"):
         backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         try:
-            shutil.copy(DB_FILE, backup_name)
-            st.success(f"✅ Backup created: {backup_name}")
+            # Flush the WAL into the .db file so the copy is complete
+            if not checkpoint_wal():
+                st.error("❌ Database is busy, try the backup again in a moment.")
+            else:
+                shutil.copy(DB_FILE, backup_name)
+                st.success(f"✅ Backup created: {backup_name}")
         except Exception as e:
             st.error(f"Error: {e}")
 
@@ -29,10 +36,18 @@ with st.expander("💾 Backup Database"):
     # --- SECTION 2: DOWNLOAD ---
     st.subheader("Download Current Database")
     if os.path.exists(DB_FILE):
-        with open(DB_FILE, "rb") as f:
+        # The file is read (and the WAL flushed) only when asked for
+        if st.button("📦 Prepare Download"):
+            if checkpoint_wal():
+                with open(DB_FILE, "rb") as f:
+                    st.session_state.db_download = f.read()
+            else:
+                st.error("❌ Database is busy, try again in a moment.")
+
+        if "db_download" in st.session_state:
             st.download_button(
                 label="📥 Download .db File",
-                data=f,
+                data=st.session_state.db_download,
                 file_name=f"business_ledger_{datetime.now().strftime('%Y%m%d')}.db",
                 mime="application/octet-stream"
             )
@@ -64,8 +79,22 @@ else:
             
             if st.button("🔥 Execute Restore", disabled=not confirm):
                 try:
+                    close_all_connections()
+
+                    # Stale WAL files belong to the old database
+                    for suffix in ("-wal", "-shm"):
+                        if os.path.exists(DB_FILE + suffix):
+                            os.remove(DB_FILE + suffix)
+
                     with open(DB_FILE, "wb") as f:
                         f.write(uploaded_file.getbuffer())
+
+                    # Older backups: bring the schema up to date, drop data held in memory
+                    migrate(DB_FILE)
+                    clear_txn_stores()
+                    clear_master_cache()
+                    clear_report_cache()
+                    st.session_state.pop("db_download", None)
                     
                     st.session_state.restore_success = True
                     st.info("Restoring... Please wait.")
@@ -0,0 +1,121 @@
+import io
+import streamlit as st
+import pandas as pd
+
+from db_helpers import (
+    get_active_financial_year,
+    import_transactions,
+    IMPORT_COLUMNS
+)
+
+st.set_page_config(page_title="Import Transactions", layout="wide")
+
+st.title("📥 Import Transactions")
+
+# -----------------------------
+# 1. Active Financial Year
+# -----------------------------
+active_year = get_active_financial_year()
+if not active_year:
+    st.error("❌ No active financial year selected.")
+    st.stop()
+
+fy_id = active_year["id"]
+
+st.info(
+    f"Rows are imported into **{active_year['label']}** "
+    f"({active_year['start_date']} to {active_year['end_date']})."
+)
+
+# -----------------------------
+# 2. File Format
+# -----------------------------
+with st.expander("ℹ️ File format", expanded=False):
+    st.markdown(
+        "- One transaction per row, first row is the header\n"
+        "- **Date**: YYYY-MM-DD, DD-MM-YYYY, DD/MM/YYYY or an Excel date\n"
+        "- **From / To**: account names exactly as in 👤 Accounts (case ignored)\n"
+        "- **Amount**: greater than zero, commas allowed\n"
+        "- **Note**: optional"
+    )
+
+    st.caption(
+        "Accepted header names: "
+        + "; ".join(f"{field} = {', '.join(aliases)}" for field, aliases in IMPORT_COLUMNS.items())
+    )
+
+    template = pd.DataFrame(
+        [[active_year["start_date"], "Cash", "Office Expenses", "1500.00", "Stationery"]],
+        columns=["Date", "From", "To", "Amount", "Note"]
+    )
+
+    st.download_button(
+        "⬇️ Download CSV template",
+        data=template.to_csv(index=False).encode("utf-8"),
+        file_name="transactions_template.csv",
+        mime="text/csv"
+    )
+
+# -----------------------------
+# 3. Upload & Import
+# -----------------------------
+uploaded = st.file_uploader("Select CSV or Excel file", type=["csv", "xlsx"])
+
+if uploaded is not None and st.button("📥 Import", type="primary"):
+    status = st.empty()
+    rejected_buf = io.StringIO()
+
+    def show_progress(inserted, rejected):
+        status.info(f"⏳ Imported {inserted:,} rows, rejected {rejected:,} so far...")
+
+    try:
+        result = import_transactions(
+            uploaded,
+            fy_id,
+            created_by=st.session_state.get("user_id", 1),
+            rejected_file=rejected_buf,
+            progress=show_progress
+        )
+        status.empty()
+
+        # Kept in session state so the download button survives its rerun
+        st.session_state.import_result = {
+            "file": uploaded.name,
+            "inserted": result["inserted"],
+            "rejected": result["rejected"],
+            "rejected_csv": rejected_buf.getvalue()
+        }
+
+    except Exception as e:
+        status.empty()
+        st.error(f"❌ Import stopped: {e}")
+
+# -----------------------------
+# 4. Result
+# -----------------------------
+result = st.session_state.get("import_result")
+
+if result:
+    st.divider()
+    st.subheader(f"📊 Result: {result['file']}")
+
+    c1, c2 = st.columns(2)
+    c1.metric("Imported", f"{result['inserted']:,}")
+    c2.metric("Rejected", f"{result['rejected']:,}")
+
+    if result["rejected"]:
+        st.warning("⚠️ Some rows were not imported. Fix them in the file below and import it again.")
+
+        st.download_button(
+            "⬇️ Download rejected rows",
+            data=result["rejected_csv"].encode("utf-8"),
+            file_name=f"rejected_{result['file']}.csv",
+            mime="text/csv"
+        )
+
+        st.dataframe(
+            pd.read_csv(io.StringIO(result["rejected_csv"]), dtype=str, nrows=200),
+            use_container_width=True
+        )
+    else:
+        st.success("✅ All rows imported")